@@ -9,10 +9,17 @@ import requests
 import time
 import json
 import random
+import argparse
+import csv
+import math
+import threading
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
 import logging
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from urllib.parse import urlparse, parse_qs
 
 # Setup logging
@@ -40,6 +47,304 @@ class TestResult:
     blocked: bool = False
     response_size: int = 0
     response_headers: Dict = None
+    account: Optional[str] = None
+    run_id: Optional[str] = None
+    completion_status: Optional[str] = None    # "succeeded" or the run's error_type once tracked to the end
+    completion_latency: Optional[float] = None # seconds from submit to terminal run status
+
+# Only these response headers are kept on a TestResult; the rest are dropped
+# so long soak tests don't carry (or write) a full header dict per request
+RATE_LIMIT_HEADER_PREFIXES = ("x-ratelimit", "x-rate-limit", "retry-after")
+
+def rate_limit_headers(headers) -> Dict:
+    """
+    The rate-limit related subset of a response's headers
+    """
+    return {k: v for k, v in headers.items() if k.lower().startswith(RATE_LIMIT_HEADER_PREFIXES)}
+
+def result_to_dict(result: TestResult) -> Dict:
+    d = asdict(result)
+    d["timestamp"] = result.timestamp.isoformat()
+    return d
+
+def result_from_dict(d: Dict) -> TestResult:
+    d = dict(d)
+    d["timestamp"] = datetime.fromisoformat(d["timestamp"])
+    return TestResult(**d)
+
+class ResultLog:
+    """
+    Append-only JSONL file of TestResults, one line per finished request.
+
+    Each line is flushed as soon as it is written, so a crashed or killed
+    soak test keeps everything recorded up to that point. Read it back with
+    iter_results() or InstagramRateLimitTester.analyze_file().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.written = 0
+        self._f = open(path, 'a')
+        self._lock = threading.Lock()
+
+    def write(self, result: TestResult):
+        line = json.dumps(result_to_dict(result), separators=(',', ':'))
+        with self._lock:
+            self._f.write(line + '\n')
+            self._f.flush()
+            self.written += 1
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+def iter_results(path: str) -> Iterator[TestResult]:
+    """
+    Stream TestResults back from a JSONL log, skipping a torn last line
+    """
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                d = json.loads(line)
+            except ValueError:
+                continue
+            yield result_from_dict(d)
+
+def percentile(sorted_values, q: float) -> Optional[float]:
+    """
+    q-th percentile of already-sorted values, linearly interpolated
+    """
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * q / 100
+    lo = math.floor(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+def latency_percentiles(values, prefix: str) -> Dict:
+    ordered = sorted(values)
+    return {
+        f"{prefix}_p{q}_seconds": round(v, 3) if v is not None else None
+        for q, v in ((q, percentile(ordered, q)) for q in (50, 90, 99))
+    }
+
+class _Window:
+    """Counters and latency samples for one time window"""
+    __slots__ = ("requests", "successful", "rate_limited", "blocked_or_captcha",
+                 "response_times", "completion_latencies")
+
+    def __init__(self):
+        self.requests = 0
+        self.successful = 0
+        self.rate_limited = 0
+        self.blocked_or_captcha = 0
+        # Packed float arrays: 8 bytes per sample, no per-object overhead
+        self.response_times = array('d')
+        self.completion_latencies = array('d')
+
+def _earliest(current, value):
+    return value if current is None or value < current else current
+
+def _latest(current, value):
+    return value if current is None or value > current else current
+
+class ResultStats:
+    """
+    Running counters over TestResults.
+
+    Results are folded in one at a time with add(), so analysis costs the
+    same memory whether it runs live during a multi-hour soak test or over a
+    JSONL log afterwards. Besides the totals, results are bucketed into
+    `window_sec` windows (by submit time) holding packed latency samples,
+    which back the percentiles and the time series.
+    """
+
+    def __init__(self, by_account: bool = True, window_sec: float = 60.0):
+        self.total = 0
+        self.successful = 0
+        self.rate_limited = 0
+        self.blocked = 0
+        self.captcha = 0
+        self.blocked_or_captcha = 0
+        self.first_rate_limit: Optional[int] = None
+        self.first_block: Optional[int] = None
+        self.first_captcha: Optional[int] = None
+        self.success_time_sum = 0.0
+        self.success_time_count = 0
+        self.first_timestamp: Optional[datetime] = None
+        self.last_timestamp: Optional[datetime] = None
+        self.tracked = 0
+        self.tracked_succeeded = 0
+        self.completion_latency_sum = 0.0
+        self.first_tracked_submit: Optional[datetime] = None
+        self.last_done: Optional[datetime] = None
+        self.accounts: Optional[Dict[str, "ResultStats"]] = {} if by_account else None
+        self.window_sec = window_sec
+        self.windows: Dict[int, _Window] = {}
+
+    def add(self, r: TestResult):
+        self.total += 1
+        if r.success:
+            self.successful += 1
+            if r.response_time > 0:
+                self.success_time_sum += r.response_time
+                self.success_time_count += 1
+        if r.rate_limited:
+            self.rate_limited += 1
+            self.first_rate_limit = _earliest(self.first_rate_limit, r.request_number)
+        if r.blocked:
+            self.blocked += 1
+            self.first_block = _earliest(self.first_block, r.request_number)
+        if r.captcha_detected:
+            self.captcha += 1
+            self.first_captcha = _earliest(self.first_captcha, r.request_number)
+        if r.blocked or r.captcha_detected:
+            self.blocked_or_captcha += 1
+        self.first_timestamp = _earliest(self.first_timestamp, r.timestamp)
+        self.last_timestamp = _latest(self.last_timestamp, r.timestamp)
+        if r.completion_latency is not None:
+            self.tracked += 1
+            if r.completion_status == "succeeded":
+                self.tracked_succeeded += 1
+            self.completion_latency_sum += r.completion_latency
+            self.first_tracked_submit = _earliest(self.first_tracked_submit, r.timestamp)
+            self.last_done = _latest(self.last_done, r.timestamp + timedelta(seconds=r.completion_latency))
+        if self.window_sec:
+            key = int(r.timestamp.timestamp() // self.window_sec)
+            w = self.windows.get(key)
+            if w is None:
+                w = self.windows[key] = _Window()
+            w.requests += 1
+            w.successful += r.success
+            w.rate_limited += r.rate_limited
+            w.blocked_or_captcha += r.blocked or r.captcha_detected
+            if r.response_time > 0:
+                w.response_times.append(r.response_time)
+            if r.completion_latency is not None:
+                w.completion_latencies.append(r.completion_latency)
+        if self.accounts is not None:
+            # Per-account stats only need totals, not windows
+            self.accounts.setdefault(r.account or "unknown",
+                                     ResultStats(by_account=False, window_sec=0)).add(r)
+
+    @classmethod
+    def from_results(cls, results: Iterator[TestResult], window_sec: float = 60.0) -> "ResultStats":
+        stats = cls(window_sec=window_sec)
+        for r in results:
+            stats.add(r)
+        return stats
+
+    def latency(self) -> Dict:
+        """
+        p50/p90/p99 submit response time and end-to-end completion latency
+        """
+        windows = self.windows.values()
+        response = array('d')
+        completion = array('d')
+        for w in windows:
+            response.extend(w.response_times)
+            completion.extend(w.completion_latencies)
+        return {
+            **latency_percentiles(response, "response_time"),
+            **latency_percentiles(completion, "completion_latency"),
+        }
+
+    def timeseries(self) -> List[Dict]:
+        """
+        One row per window: throughput, error rate and latency percentiles
+        """
+        rows = []
+        minutes = self.window_sec / 60
+
+        def pct(values, q):
+            v = percentile(values, q)
+            return round(v, 3) if v is not None else None
+
+        for key in sorted(self.windows):
+            w = self.windows[key]
+            response = sorted(w.response_times)
+            completion = sorted(w.completion_latencies)
+            rows.append({
+                "window_start": datetime.fromtimestamp(key * self.window_sec).isoformat(),
+                "requests": w.requests,
+                "successful": w.successful,
+                "rate_limited": w.rate_limited,
+                "blocked_or_captcha": w.blocked_or_captcha,
+                "requests_per_minute": round(w.requests / minutes, 2),
+                "successful_per_minute": round(w.successful / minutes, 2),
+                "error_rate": round(1 - w.successful / w.requests, 4),
+                "response_time_p50": pct(response, 50),
+                "response_time_p90": pct(response, 90),
+                "response_time_p99": pct(response, 99),
+                "completion_latency_p50": pct(completion, 50),
+                "completion_latency_p90": pct(completion, 90),
+            })
+        return rows
+
+    def degradation(self, slowdown_factor: float = 2.0, baseline_windows: int = 3,
+                    sustain: int = 2) -> Dict:
+        """
+        When things started getting worse: the first window after the
+        baseline whose p50 response time exceeds `slowdown_factor` x the
+        baseline p50 for `sustain` windows in a row, and the first windows
+        with errors and with 429s. The baseline p50 is taken over all samples
+        of the first `baseline_windows` windows, so one noisy window can't
+        set it.
+        """
+        rows = self.timeseries()
+        timed = [k for k in sorted(self.windows) if len(self.windows[k].response_times)]
+        pooled = sorted(x for k in timed[:baseline_windows] for x in self.windows[k].response_times)
+        baseline = percentile(pooled, 50)
+
+        slowdown, run = None, []
+        for k in timed[baseline_windows:]:
+            p50 = percentile(sorted(self.windows[k].response_times), 50)
+            run = run + [k] if baseline and p50 > slowdown_factor * baseline else []
+            if len(run) >= sustain:
+                slowdown = datetime.fromtimestamp(run[0] * self.window_sec).isoformat()
+                break
+        return {
+            "window_seconds": self.window_sec,
+            "windows": len(rows),
+            "baseline_windows": min(baseline_windows, len(timed)),
+            "baseline_response_time_p50_seconds": round(baseline, 3) if baseline else None,
+            "slowdown_started_at": slowdown,
+            "first_error_window": next((r["window_start"] for r in rows if r["error_rate"] > 0), None),
+            "first_rate_limit_window": next((r["window_start"] for r in rows if r["rate_limited"]), None),
+        }
+
+    def write_timeseries_csv(self, path: str) -> str:
+        rows = self.timeseries()
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["window_start"])
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def throughput(self, duration_sec: float) -> Dict:
+        """
+        Per-account and aggregate throughput over `duration_sec`
+        """
+        minutes = duration_sec / 60 if duration_sec > 0 else 0
+
+        def block(s: "ResultStats") -> Dict:
+            return {
+                "requests_sent": s.total,
+                "successful_requests": s.successful,
+                "rate_limited_requests": s.rate_limited,
+                "blocked_requests": s.blocked,
+                "sent_per_minute": round(s.total / minutes, 2) if minutes else 0,
+                "successful_per_minute": round(s.successful / minutes, 2) if minutes else 0,
+            }
+
+        return {
+            "duration_seconds": round(duration_sec, 2),
+            "accounts": {name: block(s) for name, s in sorted((self.accounts or {}).items())},
+            "aggregate": block(self),
+        }
 
 @dataclass
 class AccountConfig:
@@ -50,13 +355,136 @@ class AccountConfig:
     proxy: Optional[str] = None
     session_cookies: Optional[Dict] = None
 
+@dataclass
+class LoadProfile:
+    """
+    Arrival process for concurrent load tests (per account)
+
+    constant: `rate_per_min` requests/min for `duration_sec`
+    ramp:     linear from `rate_per_min` to `ramp_to_per_min` over `duration_sec`
+    burst:    `burst_size` back-to-back requests every `burst_interval_sec`
+    """
+    kind: str = "constant"
+    rate_per_min: float = 10.0
+    duration_sec: float = 300.0
+    ramp_to_per_min: Optional[float] = None
+    burst_size: int = 10
+    burst_interval_sec: float = 60.0
+    max_in_flight: int = 8  # per account; caps concurrent requests when latency > inter-arrival time
+
+def arrival_offsets(profile: LoadProfile) -> Iterator[float]:
+    """
+    Yield request send times (seconds from test start) for a load profile
+    """
+    if profile.kind == "constant":
+        if profile.rate_per_min <= 0:
+            return
+        gap = 60.0 / profile.rate_per_min
+        t = 0.0
+        while t < profile.duration_sec:
+            yield t
+            t += gap
+
+    elif profile.kind == "ramp":
+        start = profile.rate_per_min
+        end = profile.ramp_to_per_min if profile.ramp_to_per_min is not None else start
+        t = 0.0
+        while t < profile.duration_sec:
+            rate = start + (end - start) * (t / profile.duration_sec)
+            if rate <= 0:
+                t += 1.0
+                continue
+            yield t
+            t += 60.0 / rate
+
+    elif profile.kind == "burst":
+        t = 0.0
+        while t < profile.duration_sec:
+            for _ in range(profile.burst_size):
+                yield t
+            t += profile.burst_interval_sec
+
+    else:
+        raise ValueError(f"Unknown arrival process: {profile.kind!r}")
+
+class RunTracker:
+    """
+    Tracks submitted Apify runs to completion in the background.
+
+    Submission and completion are separate stages: the tester submits a run
+    and moves on, and this tracker polls every pending run's status on its own
+    thread. Submit throughput and end-to-end completion latency are therefore
+    measured independently instead of every request blocking for up to
+    `max_wait` seconds before the next one is sent.
+    """
+
+    def __init__(self, tester: "InstagramRateLimitTester", poll_interval: float = 5.0,
+                 max_wait: float = 120.0, workers: int = 8,
+                 on_done: Optional[Callable[[TestResult], None]] = None):
+        self.tester = tester
+        self.on_done = on_done
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self._pending: Dict[str, Tuple[TestResult, str, requests.Session, float]] = {}
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def track(self, result: TestResult, api_token: str, session: requests.Session):
+        with self._lock:
+            self._pending[result.run_id] = (result, api_token, session, time.time())
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def drain(self):
+        """
+        Stop accepting new work and wait until every tracked run is terminal
+        """
+        self._closing.set()
+        self._thread.join()
+        self._pool.shutdown(wait=True)
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                items = list(self._pending.items())
+            if not items and self._closing.is_set():
+                return
+            futures = [self._pool.submit(self._poll, run_id, entry) for run_id, entry in items]
+            for f in futures:
+                f.result()
+            time.sleep(self.poll_interval if items else 0.2)
+
+    def _poll(self, run_id: str, entry: Tuple[TestResult, str, requests.Session, float]):
+        result, api_token, session, submitted_at = entry
+        elapsed = time.time() - submitted_at
+        outcome = self.tester._check_run_status(api_token, run_id, session=session)
+        if outcome is None and elapsed >= self.max_wait:
+            outcome = {"success": False, "error_type": "run_timeout"}
+        if outcome is None:
+            return
+        self.tester._apply_run_outcome(result, outcome, time.time() - submitted_at)
+        with self._lock:
+            self._pending.pop(run_id, None)
+        if self.on_done:
+            self.on_done(result)
+
 class InstagramRateLimitTester:
     """
     Comprehensive rate limiting tester for Instagram APIs
     """
     
-    def __init__(self):
-        self.results: List[TestResult] = []
+    def __init__(self, results_path: Optional[str] = None, keep_last: int = 1000,
+                 window_sec: float = 60.0):
+        # Only the most recent results stay in memory; with `results_path`
+        # every finished result is also streamed to a JSONL log
+        self.results: Deque[TestResult] = deque(maxlen=keep_last)
+        self.log = ResultLog(results_path) if results_path else None
+        self.window_sec = window_sec  # time-series window for analysis
         self.test_urls = [
             "https://www.instagram.com/reel/C4QxQxQxQxQ/",  # Sample reel URLs
             "https://www.instagram.com/reel/C5RyRyRyRyR/",
@@ -66,10 +494,28 @@ class InstagramRateLimitTester:
         ]
         self.apify_actor_id = "shu8hvrXbJbY3Eb9W"
         self.session = requests.Session()
+        self._results_lock = threading.Lock()
+        
+    def _record(self, result: TestResult, stats: Optional[ResultStats] = None):
+        """
+        Record a finished result: recent-results window, running stats and log
+        """
+        with self._results_lock:
+            self.results.append(result)
+            if stats is not None:
+                stats.add(result)
+        if self.log:
+            self.log.write(result)
+    
+    def close(self):
+        if self.log:
+            self.log.close()
+            logger.info(f"💾 {self.log.written} results streamed to {self.log.path}")
         
-    def setup_session(self, account: AccountConfig):
+    def setup_session(self, account: AccountConfig, session: Optional[requests.Session] = None) -> requests.Session:
         """Setup session with account-specific configuration"""
-        self.session.headers.update({
+        session = session or self.session
+        session.headers.update({
             'User-Agent': account.user_agent,
             'Accept': 'application/json',
             'Accept-Language': 'en-US,en;q=0.9',
@@ -79,13 +525,14 @@ class InstagramRateLimitTester:
         })
         
         if account.session_cookies:
-            self.session.cookies.update(account.session_cookies)
+            session.cookies.update(account.session_cookies)
             
         if account.proxy:
-            self.session.proxies.update({
+            session.proxies.update({
                 'http': account.proxy,
                 'https': account.proxy
             })
+        return session
     
     def test_apify_rate_limits(self, account: AccountConfig, max_requests: int = 100) -> List[TestResult]:
         """
@@ -96,6 +543,7 @@ class InstagramRateLimitTester:
         
         self.setup_session(account)
         results = []
+        tracker = RunTracker(self, on_done=self._record)
         
         for i in range(1, max_requests + 1):
             # Use random URL to avoid caching
@@ -103,16 +551,17 @@ class InstagramRateLimitTester:
             
             logger.info(f"📤 Request {i}/{max_requests}: Testing {test_url}")
             
-            start_time = time.time()
-            result = self._make_apify_request(account.apify_token, test_url, i)
-            result.response_time = time.time() - start_time
-            
+            result = self._make_apify_request(account.apify_token, test_url, i,
+                                              tracker=tracker, account=account.name)
             results.append(result)
-            self.results.append(result)
+            # Tracked runs are recorded by the tracker once they finish
+            if result.run_id is None:
+                self._record(result)
             
             # Log result
             status = "✅ SUCCESS" if result.success else "❌ FAILED"
-            logger.info(f"{status} - Code: {result.response_code}, Time: {result.response_time:.2f}s")
+            logger.info(f"{status} - Code: {result.response_code}, Submit time: {result.response_time:.2f}s, "
+                        f"Runs in flight: {tracker.pending()}")
             
             if result.captcha_detected:
                 logger.warning("🤖 CAPTCHA detected - stopping test")
@@ -131,13 +580,24 @@ class InstagramRateLimitTester:
             logger.info(f"⏳ Waiting {delay:.1f}s before next request...")
             time.sleep(delay)
             
+        logger.info(f"⏳ Waiting for {tracker.pending()} in-flight runs to finish...")
+        tracker.drain()
         logger.info(f"🏁 Test completed. Total requests: {len(results)}")
         return results
     
-    def _make_apify_request(self, api_token: str, instagram_url: str, request_num: int) -> TestResult:
+    def _make_apify_request(self, api_token: str, instagram_url: str, request_num: int,
+                            session: Optional[requests.Session] = None,
+                            tracker: Optional[RunTracker] = None,
+                            account: Optional[str] = None) -> TestResult:
         """
-        Make a single request to Apify API and analyze the response
+        Make a single request to Apify API and analyze the response.
+
+        With a `tracker`, only the run submission happens here and the run is
+        handed to the tracker for completion; without one, this blocks until
+        the run finishes. `response_time` is the submit time either way.
         """
+        session = session or self.session
+        started = time.time()
         try:
             # Prepare Apify actor run request
             run_url = f"https://api.apify.com/v2/acts/{self.apify_actor_id}/runs?token={api_token}"
@@ -151,7 +611,7 @@ class InstagramRateLimitTester:
             }
             
             # Make the request
-            response = self.session.post(
+            response = session.post(
                 run_url,
                 json=payload,
                 timeout=30
@@ -163,9 +623,10 @@ class InstagramRateLimitTester:
                 request_number=request_num,
                 success=response.status_code == 201,
                 response_code=response.status_code,
-                response_time=0,  # Will be set by caller
+                response_time=time.time() - started,
                 response_size=len(response.content),
-                response_headers=dict(response.headers)
+                response_headers=rate_limit_headers(response.headers),
+                account=account
             )
             
             # Check for various error conditions
@@ -195,19 +656,21 @@ class InstagramRateLimitTester:
             except Exception as e:
                 logger.debug(f"Could not analyze response text: {e}")
                 
-            # If successful, wait for run completion and check dataset
+            # If submitted, track the run to completion and check dataset
             if result.success:
                 try:
                     run_data = response.json()
                     run_id = run_data.get('data', {}).get('id')
                     
                     if run_id:
-                        # Wait for completion and check results
-                        dataset_result = self._wait_for_run_completion(api_token, run_id)
-                        if dataset_result:
-                            result.success = dataset_result['success']
-                            if not dataset_result['success']:
-                                result.error_type = dataset_result.get('error_type', 'dataset_error')
+                        result.run_id = run_id
+                        if tracker is not None:
+                            tracker.track(result, api_token, session)
+                        else:
+                            submitted_at = time.time()
+                            dataset_result = self._wait_for_run_completion(api_token, run_id, session=session)
+                            if dataset_result:
+                                self._apply_run_outcome(result, dataset_result, time.time() - submitted_at)
                                 
                 except Exception as e:
                     logger.debug(f"Could not process run completion: {e}")
@@ -221,7 +684,8 @@ class InstagramRateLimitTester:
                 request_number=request_num,
                 success=False,
                 response_code=0,
-                response_time=0,
+                response_time=time.time() - started,
+                account=account,
                 error_type="timeout"
             )
             
@@ -231,7 +695,8 @@ class InstagramRateLimitTester:
                 request_number=request_num,
                 success=False,
                 response_code=0,
-                response_time=0,
+                response_time=time.time() - started,
+                account=account,
                 error_type="connection_error"
             )
             
@@ -242,55 +707,82 @@ class InstagramRateLimitTester:
                 request_number=request_num,
                 success=False,
                 response_code=0,
-                response_time=0,
+                response_time=time.time() - started,
+                account=account,
                 error_type=f"unexpected_error: {str(e)}"
             )
     
-    def _wait_for_run_completion(self, api_token: str, run_id: str, max_wait: int = 120) -> Optional[Dict]:
+    def _apply_run_outcome(self, result: TestResult, outcome: Dict, latency: float):
+        """
+        Record a finished run's outcome on the submit-stage result
+        """
+        result.success = outcome['success']
+        result.completion_latency = latency
+        if outcome['success']:
+            result.completion_status = "succeeded"
+        else:
+            result.error_type = outcome.get('error_type', 'dataset_error')
+            result.completion_status = result.error_type
+    
+    def _check_run_status(self, api_token: str, run_id: str,
+                          session: Optional[requests.Session] = None) -> Optional[Dict]:
+        """
+        Check an Apify run once. Returns None while it is still running,
+        otherwise the analyzed outcome.
+        """
+        session = session or self.session
+        try:
+            status_url = f"https://api.apify.com/v2/actor-runs/{run_id}?token={api_token}"
+            status_response = session.get(status_url, timeout=10)
+            
+            if status_response.status_code != 200:
+                return {"success": False, "error_type": "status_check_failed"}
+                
+            status_data = status_response.json()
+            run_status = status_data.get('data', {}).get('status')
+            
+            if run_status == 'SUCCEEDED':
+                # Get dataset results
+                dataset_id = status_data.get('data', {}).get('defaultDatasetId')
+                if dataset_id:
+                    return self._check_dataset_results(api_token, dataset_id, session=session)
+                else:
+                    return {"success": False, "error_type": "no_dataset_id"}
+                    
+            elif run_status in ['FAILED', 'ABORTED', 'TIMED-OUT']:
+                return {"success": False, "error_type": f"run_{run_status.lower()}"}
+                
+            return None
+            
+        except Exception as e:
+            logger.debug(f"Error checking run status: {e}")
+            return {"success": False, "error_type": "status_check_error"}
+    
+    def _wait_for_run_completion(self, api_token: str, run_id: str, max_wait: int = 120,
+                                 session: Optional[requests.Session] = None) -> Optional[Dict]:
         """
         Wait for Apify run completion and analyze results
         """
         start_time = time.time()
         
         while time.time() - start_time < max_wait:
-            try:
-                # Check run status
-                status_url = f"https://api.apify.com/v2/actor-runs/{run_id}?token={api_token}"
-                status_response = self.session.get(status_url, timeout=10)
-                
-                if status_response.status_code != 200:
-                    return {"success": False, "error_type": "status_check_failed"}
-                    
-                status_data = status_response.json()
-                run_status = status_data.get('data', {}).get('status')
-                
-                if run_status == 'SUCCEEDED':
-                    # Get dataset results
-                    dataset_id = status_data.get('data', {}).get('defaultDatasetId')
-                    if dataset_id:
-                        return self._check_dataset_results(api_token, dataset_id)
-                    else:
-                        return {"success": False, "error_type": "no_dataset_id"}
-                        
-                elif run_status in ['FAILED', 'ABORTED', 'TIMED-OUT']:
-                    return {"success": False, "error_type": f"run_{run_status.lower()}"}
-                    
-                # Still running, wait a bit
-                time.sleep(5)
-                
-            except Exception as e:
-                logger.debug(f"Error checking run status: {e}")
-                return {"success": False, "error_type": "status_check_error"}
+            outcome = self._check_run_status(api_token, run_id, session=session)
+            if outcome is not None:
+                return outcome
+            # Still running, wait a bit
+            time.sleep(5)
                 
         return {"success": False, "error_type": "run_timeout"}
     
-    def _check_dataset_results(self, api_token: str, dataset_id: str) -> Dict:
+    def _check_dataset_results(self, api_token: str, dataset_id: str,
+                               session: Optional[requests.Session] = None) -> Dict:
         """
         Check dataset results for successful data extraction
         """
+        session = session or self.session
         try:
             dataset_url = f"https://api.apify.com/v2/datasets/{dataset_id}/items?token={api_token}"
-            dataset_response = self.session.get(dataset_url, timeout=10)
+            dataset_response = session.get(dataset_url, timeout=10)
             
             if dataset_response.status_code != 200:
                 return {"success": False, "error_type": "dataset_fetch_failed"}
@@ -322,6 +814,208 @@ class InstagramRateLimitTester:
             logger.debug(f"Error checking dataset: {e}")
             return {"success": False, "error_type": "dataset_check_error"}
     
+    def test_concurrent_accounts(self, accounts: List[AccountConfig], profile: LoadProfile) -> Dict:
+        """
+        Drive several accounts in parallel, each with its own session and the
+        same open-loop arrival process, and measure per-account and aggregate
+        throughput. Requests are sent on schedule regardless of how long
+        earlier ones take (up to `profile.max_in_flight` per account), so the
+        numbers reflect what the fleet can actually sustain.
+        """
+        logger.info(f"🚀 Starting concurrent test: {len(accounts)} accounts, "
+                    f"{profile.kind} arrivals, {profile.duration_sec:.0f}s")
+
+        stats = ResultStats(window_sec=self.window_sec)
+        record = lambda r: self._record(r, stats)
+        tracker = RunTracker(self, on_done=record)
+        start = time.time()
+
+        def run_account(account: AccountConfig):
+            session = self.setup_session(account, requests.Session())
+            stop = threading.Event()
+            counter = [0]
+
+            def fire(request_num: int):
+                if stop.is_set():
+                    return
+                test_url = random.choice(self.test_urls)
+                result = self._make_apify_request(account.apify_token, test_url, request_num,
+                                                  session=session, tracker=tracker, account=account.name)
+                if result.run_id is None:
+                    record(result)
+                if result.captcha_detected or result.blocked:
+                    logger.warning(f"🚫 [{account.name}] blocked/challenged at request {request_num} - stopping account")
+                    stop.set()
+
+            # One slot per in-flight request: when all are busy the schedule
+            # waits instead of queueing the rest of the run in the executor
+            slots = threading.Semaphore(profile.max_in_flight)
+            with ThreadPoolExecutor(max_workers=profile.max_in_flight) as pool:
+                for offset in arrival_offsets(profile):
+                    if stop.is_set():
+                        break
+                    delay = start + offset - time.time()
+                    if delay > 0 and stop.wait(delay):
+                        break
+                    while not slots.acquire(timeout=1.0):
+                        if stop.is_set():
+                            break
+                    if stop.is_set():
+                        break
+                    counter[0] += 1
+                    pool.submit(fire, counter[0]).add_done_callback(lambda _: slots.release())
+
+            logger.info(f"🏁 [{account.name}] sent {counter[0]} requests")
+
+        threads = [threading.Thread(target=run_account, args=(a,), daemon=True) for a in accounts]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        submit_duration = time.time() - start
+
+        logger.info(f"⏳ Waiting for {tracker.pending()} in-flight runs to finish...")
+        tracker.drain()
+
+        summary = stats.throughput(submit_duration)
+        agg = summary["aggregate"]
+        logger.info(f"📊 Aggregate: {agg['sent_per_minute']} sent/min, "
+                    f"{agg['successful_per_minute']} ok/min across {len(accounts)} accounts")
+        summary["stats"] = stats
+        return summary
+    
+    def _run_trial(self, accounts: List[AccountConfig], rate_per_min: float, duration_sec: float,
+                   max_error_rate: float) -> Dict:
+        """
+        Run one fixed-rate experiment and decide whether the rate is sustainable.
+        `rate_per_min` is the combined rate, split evenly across `accounts`.
+        """
+        profile = LoadProfile(kind="constant", rate_per_min=rate_per_min / len(accounts),
+                              duration_sec=duration_sec)
+        stats: ResultStats = self.test_concurrent_accounts(accounts, profile).pop("stats")
+        sent = stats.total
+        limited = stats.rate_limited
+        blocked = stats.blocked_or_captcha
+        error_rate = (sent - stats.successful) / sent if sent else 1.0
+        return {
+            "rate_per_min": round(rate_per_min, 2),
+            "requests": sent,
+            "rate_limited": limited,
+            "blocked_or_challenged": blocked,
+            "error_rate": round(error_rate, 3),
+            "average_completion_latency_seconds": (
+                round(stats.completion_latency_sum / stats.tracked, 2) if stats.tracked else None
+            ),
+            "sustainable": sent > 0 and limited == 0 and blocked == 0 and error_rate <= max_error_rate,
+        }
+    
+    def find_rate_limit_boundary(self, accounts: List[AccountConfig], strategy: str = "step",
+                                 min_rate: float = 2.0, max_rate: float = 60.0, step_rate: float = 4.0,
+                                 trial_duration: float = 180.0, cooldown_sec: float = 300.0,
+                                 max_error_rate: float = 0.1, tolerance: float = 1.0) -> Dict:
+        """
+        Find the highest sustainable request rate (requests/min, combined
+        across `accounts`) with controlled fixed-rate experiments.
+
+        step:   min_rate, min_rate + step_rate, ... until the first failing trial
+        binary: bisect between a passing and a failing rate until they are
+                within `tolerance` requests/min
+
+        Every trial is followed by `cooldown_sec` of silence so limits tripped
+        by one experiment don't leak into the next.
+        """
+        names = ", ".join(a.name for a in accounts)
+        logger.info(f"🔎 Boundary search ({strategy}) for [{names}] between {min_rate} and {max_rate} req/min")
+        trials: List[Dict] = []
+
+        def trial(rate: float) -> bool:
+            if trials:
+                logger.info(f"🧊 Cooling down {cooldown_sec:.0f}s before next trial...")
+                time.sleep(cooldown_sec)
+            logger.info(f"🧪 Trial at {rate:.1f} req/min for {trial_duration:.0f}s")
+            t = self._run_trial(accounts, rate, trial_duration, max_error_rate)
+            trials.append(t)
+            logger.info(f"   {'✅ sustainable' if t['sustainable'] else '❌ not sustainable'} "
+                        f"(429s={t['rate_limited']}, errors={t['error_rate']:.0%})")
+            return t["sustainable"]
+
+        best = 0.0
+        if strategy == "step":
+            rate = min_rate
+            while rate <= max_rate and trial(rate):
+                best = rate
+                rate += step_rate
+
+        elif strategy == "binary":
+            lo, hi = 0.0, max_rate
+            if trial(min_rate):
+                best = lo = min_rate
+                if trial(max_rate):
+                    best = lo = hi = max_rate
+            else:
+                hi = min_rate
+            while hi - lo > tolerance:
+                mid = (lo + hi) / 2
+                if trial(mid):
+                    best = lo = mid
+                else:
+                    hi = mid
+
+        else:
+            raise ValueError(f"Unknown search strategy: {strategy!r}")
+
+        logger.info(f"🎯 Max sustainable rate for [{names}]: {best:.1f} req/min")
+        return {"max_sustainable_per_min": round(best, 2), "trials": trials}
+    
+    def build_limits_profile(self, accounts: List[AccountConfig], safety_factor: float = 0.8,
+                             **search_kwargs) -> Dict:
+        """
+        Search the boundary per account, then per proxy for proxies shared by
+        several accounts, and return a machine-readable limits profile.
+        The refresh scripts load it via scripts/throttle_profile.py.
+        """
+        def limits(found: Dict) -> Dict:
+            recommended = found["max_sustainable_per_min"] * safety_factor
+            return {
+                "max_sustainable_per_min": found["max_sustainable_per_min"],
+                "recommended_per_min": round(recommended, 2),
+                "min_delay_sec": round(60.0 / recommended, 2) if recommended > 0 else None,
+                "trials": found["trials"],
+            }
+
+        profile = {
+            "client": "apify",
+            "generated_at": datetime.now().isoformat(),
+            "safety_factor": safety_factor,
+            "search": search_kwargs,
+            "accounts": {},
+            "proxies": {},
+        }
+        for account in accounts:
+            entry = limits(self.find_rate_limit_boundary([account], **search_kwargs))
+            entry["proxy"] = account.proxy
+            profile["accounts"][account.name] = entry
+
+        by_proxy: Dict[str, List[AccountConfig]] = {}
+        for account in accounts:
+            if account.proxy:
+                by_proxy.setdefault(account.proxy, []).append(account)
+        for proxy, group in by_proxy.items():
+            if len(group) > 1:
+                entry = limits(self.find_rate_limit_boundary(group, **search_kwargs))
+                entry["accounts"] = [a.name for a in group]
+                profile["proxies"][proxy] = entry
+
+        # Fallback for accounts the profile doesn't know: the most conservative measured limit
+        measured = [a for a in profile["accounts"].values() if a["recommended_per_min"] > 0]
+        if measured:
+            slowest = min(measured, key=lambda a: a["recommended_per_min"])
+            profile["default"] = {
+                "recommended_per_min": slowest["recommended_per_min"],
+                "min_delay_sec": slowest["min_delay_sec"],
+            }
+        return profile
+    
     def test_direct_instagram_requests(self, max_requests: int = 50) -> List[TestResult]:
         """
         Test direct requests to Instagram to understand their rate limiting
@@ -348,7 +1042,7 @@ class InstagramRateLimitTester:
                     response_code=response.status_code,
                     response_time=response_time,
                     response_size=len(response.content),
-                    response_headers=dict(response.headers)
+                    response_headers=rate_limit_headers(response.headers)
                 )
                 
                 # Check for Instagram-specific blocking
@@ -366,6 +1060,7 @@ class InstagramRateLimitTester:
                     result.error_type = "login_challenge_redirect"
                     
                 results.append(result)
+                self._record(result)
                 
                 status = "✅ SUCCESS" if result.success else "❌ FAILED"
                 logger.info(f"{status} - Code: {result.response_code}, Time: {result.response_time:.2f}s")
@@ -387,6 +1082,7 @@ class InstagramRateLimitTester:
                     error_type=f"request_error: {str(e)}"
                 )
                 results.append(result)
+                self._record(result)
                 logger.error(f"❌ Request failed: {e}")
                 
         return results
@@ -395,94 +1091,108 @@ class InstagramRateLimitTester:
         """
         Analyze test results to determine rate limits and patterns
         """
-        if not results:
+        return self.analyze_stats(ResultStats.from_results(results, self.window_sec))
+    
+    def analyze_file(self, path: str) -> Dict:
+        """
+        Analyze a JSONL result log in one streaming pass
+        """
+        return self.analyze_stats(ResultStats.from_results(iter_results(path), self.window_sec))
+    
+    def analyze_stats(self, stats: ResultStats) -> Dict:
+        """
+        Build the analysis report from running stats
+        """
+        if not stats.total:
             return {"error": "No results to analyze"}
             
-        total_requests = len(results)
-        successful_requests = sum(1 for r in results if r.success)
-        rate_limited_requests = sum(1 for r in results if r.rate_limited)
-        blocked_requests = sum(1 for r in results if r.blocked)
-        captcha_requests = sum(1 for r in results if r.captcha_detected)
-        
-        # Calculate success rate over time
-        success_rate = (successful_requests / total_requests) * 100
-        
-        # Find when rate limiting started
-        first_rate_limit = next((r.request_number for r in results if r.rate_limited), None)
-        first_block = next((r.request_number for r in results if r.blocked), None)
-        first_captcha = next((r.request_number for r in results if r.captcha_detected), None)
-        
-        # Calculate average response times
-        successful_times = [r.response_time for r in results if r.success and r.response_time > 0]
-        avg_response_time = sum(successful_times) / len(successful_times) if successful_times else 0
+        total_requests = stats.total
+        success_rate = (stats.successful / total_requests) * 100
+        avg_response_time = (
+            stats.success_time_sum / stats.success_time_count if stats.success_time_count else 0
+        )
         
-        # Time analysis
-        if results:
-            test_duration = (results[-1].timestamp - results[0].timestamp).total_seconds()
-            requests_per_minute = (total_requests / test_duration) * 60 if test_duration > 0 else 0
+        # Time analysis (submit stage: how fast requests were accepted)
+        test_duration = (stats.last_timestamp - stats.first_timestamp).total_seconds()
+        requests_per_minute = (total_requests / test_duration) * 60 if test_duration > 0 else 0
+            
+        # Completion stage: how long submitted runs took to finish end to end
+        avg_completion_latency = stats.completion_latency_sum / stats.tracked if stats.tracked else 0
+        if stats.tracked:
+            completion_window = (stats.last_done - stats.first_tracked_submit).total_seconds()
+            completions_per_minute = stats.tracked / completion_window * 60 if completion_window > 0 else 0
         else:
-            test_duration = 0
-            requests_per_minute = 0
+            completions_per_minute = 0
             
         analysis = {
             "summary": {
                 "total_requests": total_requests,
-                "successful_requests": successful_requests,
+                "successful_requests": stats.successful,
                 "success_rate_percent": round(success_rate, 2),
-                "rate_limited_requests": rate_limited_requests,
-                "blocked_requests": blocked_requests,
-                "captcha_requests": captcha_requests,
+                "rate_limited_requests": stats.rate_limited,
+                "blocked_requests": stats.blocked,
+                "captcha_requests": stats.captcha,
             },
             "rate_limiting": {
-                "first_rate_limit_at_request": first_rate_limit,
-                "first_block_at_request": first_block,
-                "first_captcha_at_request": first_captcha,
-                "estimated_safe_request_limit": first_rate_limit - 1 if first_rate_limit else total_requests,
+                "first_rate_limit_at_request": stats.first_rate_limit,
+                "first_block_at_request": stats.first_block,
+                "first_captcha_at_request": stats.first_captcha,
+                "estimated_safe_request_limit": (
+                    stats.first_rate_limit - 1 if stats.first_rate_limit else total_requests
+                ),
             },
             "performance": {
                 "average_response_time_seconds": round(avg_response_time, 2),
                 "test_duration_seconds": round(test_duration, 2),
                 "requests_per_minute": round(requests_per_minute, 2),
             },
-            "recommendations": self._generate_recommendations(results)
+            "completion": {
+                "runs_tracked": stats.tracked,
+                "runs_succeeded": stats.tracked_succeeded,
+                "average_completion_latency_seconds": round(avg_completion_latency, 2),
+                "completions_per_minute": round(completions_per_minute, 2),
+            },
+            "latency": stats.latency(),
+            "timeseries": stats.degradation(),
+            "recommendations": self._generate_recommendations(stats)
         }
         
         return analysis
     
-    def _generate_recommendations(self, results: List[TestResult]) -> List[str]:
+    def _generate_recommendations(self, stats: ResultStats) -> List[str]:
         """
         Generate recommendations based on test results
         """
         recommendations = []
         
-        successful_requests = sum(1 for r in results if r.success)
-        rate_limited_requests = sum(1 for r in results if r.rate_limited)
-        
-        if successful_requests == 0:
+        if stats.successful == 0:
             recommendations.append("❌ No successful requests - check API credentials and network connectivity")
             
-        elif rate_limited_requests > 0:
-            first_rate_limit = next(r.request_number for r in results if r.rate_limited)
+        elif stats.rate_limited > 0:
+            first_rate_limit = stats.first_rate_limit
             recommendations.append(f"⏰ Rate limiting detected after {first_rate_limit} requests")
             recommendations.append(f"💡 Recommended batch size: {max(1, first_rate_limit - 5)} requests")
             recommendations.append("⏳ Implement delays of 60+ seconds between batches")
             
         else:
-            recommendations.append(f"✅ No rate limiting detected up to {len(results)} requests")
+            recommendations.append(f"✅ No rate limiting detected up to {stats.total} requests")
             recommendations.append("💡 Consider testing with larger batches")
             
-        if any(r.captcha_detected for r in results):
+        if stats.captcha:
             recommendations.append("🤖 Captcha/challenge detected - consider using residential proxies")
             recommendations.append("🔄 Implement account rotation to avoid detection")
             
-        if any(r.blocked for r in results):
+        if stats.blocked:
             recommendations.append("🚫 Account blocking detected - implement IP rotation")
             recommendations.append("👥 Use multiple accounts to distribute load")
             
         # Performance recommendations
-        avg_time = sum(r.response_time for r in results if r.success and r.response_time > 0)
-        if avg_time > 0:
-            avg_time = avg_time / sum(1 for r in results if r.success and r.response_time > 0)
+        slowdown = stats.degradation()["slowdown_started_at"] if stats.window_sec else None
+        if slowdown:
+            recommendations.append(f"📉 Response times degraded from {slowdown} - back off before that load level")
+            
+        if stats.success_time_count:
+            avg_time = stats.success_time_sum / stats.success_time_count
             if avg_time > 10:
                 recommendations.append("🐌 Slow response times detected - consider using faster proxies")
                 
@@ -490,42 +1200,135 @@ class InstagramRateLimitTester:
     
     def save_results(self, results: List[TestResult], filename: str = None):
         """
-        Save test results to JSON file
+        Save test results as JSONL, one compact line per result
         """
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"rate_limit_test_results_{timestamp}.json"
-            
-        # Convert results to serializable format
-        serializable_results = []
-        for result in results:
-            result_dict = {
-                "timestamp": result.timestamp.isoformat(),
-                "request_number": result.request_number,
-                "success": result.success,
-                "response_code": result.response_code,
-                "response_time": result.response_time,
-                "error_type": result.error_type,
-                "captcha_detected": result.captcha_detected,
-                "rate_limited": result.rate_limited,
-                "blocked": result.blocked,
-                "response_size": result.response_size,
-                "response_headers": result.response_headers
-            }
-            serializable_results.append(result_dict)
+            filename = f"rate_limit_test_results_{timestamp}.jsonl"
             
         with open(filename, 'w') as f:
-            json.dump(serializable_results, f, indent=2)
+            for result in results:
+                f.write(json.dumps(result_to_dict(result), separators=(',', ':')) + '\n')
             
         logger.info(f"💾 Results saved to {filename}")
         return filename
 
+def load_accounts(path: str) -> List[AccountConfig]:
+    """
+    Load accounts from a JSON list of AccountConfig fields
+    """
+    with open(path) as f:
+        return [AccountConfig(**a) for a in json.load(f)]
+
+def run_concurrent(args):
+    """
+    Concurrent multi-account load test (--mode concurrent)
+    """
+    accounts = load_accounts(args.accounts)
+    profile = LoadProfile(
+        kind=args.arrival,
+        rate_per_min=args.rate,
+        duration_sec=args.duration,
+        ramp_to_per_min=args.ramp_to,
+        burst_size=args.burst_size,
+        burst_interval_sec=args.burst_interval,
+        max_in_flight=args.max_in_flight,
+    )
+    results_path = args.results_out or f"concurrent_{profile.kind}_rate_limit_results.jsonl"
+    tester = InstagramRateLimitTester(results_path=results_path, window_sec=args.window)
+    try:
+        summary = tester.test_concurrent_accounts(accounts, profile)
+    finally:
+        tester.close()
+    stats = summary.pop("stats")
+
+    print("\n📊 Throughput:")
+    print(json.dumps(summary, indent=2))
+    print("\n📊 Aggregate analysis:")
+    print(json.dumps(tester.analyze_stats(stats), indent=2))
+    print(f"\n💾 Results streamed to: {results_path} (re-analyze with --analyze {results_path})")
+    if args.timeseries_csv:
+        print(f"📈 Time series written to {stats.write_timeseries_csv(args.timeseries_csv)}")
+
+def run_search(args):
+    """
+    Rate-limit boundary search (--mode search); writes a limits profile
+    """
+    accounts = load_accounts(args.accounts)
+    tester = InstagramRateLimitTester(results_path=args.results_out)
+    profile = tester.build_limits_profile(
+        accounts,
+        safety_factor=args.safety,
+        strategy=args.strategy,
+        min_rate=args.min_rate,
+        max_rate=args.max_rate,
+        step_rate=args.step_rate,
+        trial_duration=args.duration,
+        cooldown_sec=args.cooldown,
+        max_error_rate=args.max_error_rate,
+    )
+    tester.close()
+    with open(args.limits_out, 'w') as f:
+        json.dump(profile, f, indent=2)
+
+    print("\n🎯 Limits profile:")
+    for name, entry in profile["accounts"].items():
+        print(f"   {name}: max {entry['max_sustainable_per_min']} req/min → "
+              f"use {entry['recommended_per_min']} req/min (≥{entry['min_delay_sec']}s apart)")
+    for proxy, entry in profile["proxies"].items():
+        print(f"   proxy {proxy}: max {entry['max_sustainable_per_min']} req/min across {len(entry['accounts'])} accounts")
+    print(f"\n💾 Saved to {args.limits_out} (load with RATE_LIMITS_PROFILE={args.limits_out})")
+
 def main():
     """
     Main function to run rate limiting tests
     """
+    ap = argparse.ArgumentParser(description="Instagram / Apify rate limit tester")
+    ap.add_argument("--mode", choices=["sequential", "concurrent", "search"], default="sequential",
+                    help="sequential: single-account test plan (default); concurrent: N accounts in parallel; "
+                         "search: find max sustainable rate per account/proxy")
+    ap.add_argument("--accounts", help="JSON file with a list of AccountConfig objects (concurrent mode)")
+    ap.add_argument("--arrival", choices=["constant", "ramp", "burst"], default="constant")
+    ap.add_argument("--rate", type=float, default=10.0, help="Requests/min per account (start rate for ramp)")
+    ap.add_argument("--ramp-to", type=float, default=None, help="End rate for ramp arrivals (requests/min)")
+    ap.add_argument("--duration", type=float, default=300.0, help="Test duration in seconds")
+    ap.add_argument("--burst-size", type=int, default=10)
+    ap.add_argument("--burst-interval", type=float, default=60.0, help="Seconds between bursts")
+    ap.add_argument("--max-in-flight", type=int, default=8, help="Max concurrent requests per account")
+    ap.add_argument("--strategy", choices=["step", "binary"], default="step", help="Boundary search strategy")
+    ap.add_argument("--min-rate", type=float, default=2.0, help="Search: lowest rate to try (req/min)")
+    ap.add_argument("--max-rate", type=float, default=60.0, help="Search: highest rate to try (req/min)")
+    ap.add_argument("--step-rate", type=float, default=4.0, help="Search: step size for step ramps (req/min)")
+    ap.add_argument("--cooldown", type=float, default=300.0, help="Search: seconds of silence between trials")
+    ap.add_argument("--max-error-rate", type=float, default=0.1, help="Search: error rate above which a trial fails")
+    ap.add_argument("--safety", type=float, default=0.8, help="Search: recommended rate = max sustainable x safety")
+    ap.add_argument("--limits-out", default="rate_limits.json", help="Search: where to write the limits profile")
+    ap.add_argument("--results-out", help="JSONL file every result is streamed to as it finishes")
+    ap.add_argument("--analyze", metavar="JSONL", help="Analyze an existing result log (e.g. from a crashed run) and exit")
+    ap.add_argument("--window", type=float, default=60.0, help="Time-series window in seconds")
+    ap.add_argument("--timeseries-csv", metavar="CSV",
+                    help="Write per-window throughput, error rate and latency percentiles here for plotting")
+    args = ap.parse_args()
+
     print("🚀 Instagram Rate Limiting Test System")
     print("=" * 50)
+
+    if args.analyze:
+        tester = InstagramRateLimitTester(window_sec=args.window)
+        print(json.dumps(tester.analyze_file(args.analyze), indent=2))
+        if args.timeseries_csv:
+            stats = ResultStats.from_results(iter_results(args.analyze), args.window)
+            print(f"📈 Time series written to {stats.write_timeseries_csv(args.timeseries_csv)}")
+        return
+
+    if args.mode in ("concurrent", "search"):
+        if not args.accounts:
+            ap.error(f"--accounts is required in {args.mode} mode")
+        if args.mode == "concurrent":
+            run_concurrent(args)
+        else:
+            run_search(args)
+        return
     
     # Test configuration
     test_account = AccountConfig(
@@ -534,7 +1337,7 @@ def main():
         user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
     )
     
-    tester = InstagramRateLimitTester()
+    tester = InstagramRateLimitTester(results_path=args.results_out, window_sec=args.window)
     
     print("📋 Test Plan:")
     print("1. Test Apify API rate limits (up to 100 requests)")
@@ -549,6 +1352,9 @@ def main():
     print("\n📊 Apify Test Results:")
     apify_analysis = tester.analyze_results(apify_results)
     print(json.dumps(apify_analysis, indent=2))
+    if args.timeseries_csv:
+        stats = ResultStats.from_results(apify_results, args.window)
+        print(f"📈 Time series written to {stats.write_timeseries_csv(args.timeseries_csv)}")
     
     # Test 2: Direct Instagram Requests
     print("\n🔍 Phase 2: Testing Direct Instagram Requests...")
@@ -559,8 +1365,9 @@ def main():
     print(json.dumps(instagram_analysis, indent=2))
     
     # Save results
-    apify_file = tester.save_results(apify_results, "apify_rate_limit_results.json")
-    instagram_file = tester.save_results(instagram_results, "instagram_rate_limit_results.json")
+    apify_file = tester.save_results(apify_results, "apify_rate_limit_results.jsonl")
+    instagram_file = tester.save_results(instagram_results, "instagram_rate_limit_results.jsonl")
+    tester.close()
     
     print(f"\n💾 Results saved:")
     print(f"   - Apify results: {apify_file}")
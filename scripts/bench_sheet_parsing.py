@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for sheet_parsing on a synthetic payment sheet.
+
+Builds a 10k-row sheet that looks like the real one (ordinal dates, "arpil"
+typos, "1500+2000 Bonus" amounts, handler name variants, reel/p/username URL
+forms, blank rows), then times:
+
+  - row-wise:    calling the per-cell parsers row by row (what the sync scripts used to do)
+  - column-wise: parse_worksheet() over the whole sheet
+
+and checks both produce identical results, so parsing cost and behavior stay
+consistent between the two sync paths.
+
+Usage:
+    python3 scripts/bench_sheet_parsing.py
+    python3 scripts/bench_sheet_parsing.py --rows 50000 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import time
+
+from sheet_parsing import (
+    _parse_day_month, COL_DATE, COL_HANDLER, COL_PAYMENT, COL_REEL_URL,
+    handler_to_email, parse_amount, parse_reel_url, parse_sheet_date,
+    parse_worksheet,
+)
+
+HANDLERS = ["Gurimar", "Muskan", "Yash", "Yash Madaan", "Rajoshree", "chirag",
+            "Mansoor", "Laksh", "Eyaz", "Venkat", "Samarth", "Akshay", "Gurnimarjit", "?"]
+DATES    = ["1 April", "1st April", "12th arpil", "3rd may", "21 June", "5 july",
+           "30th Sept", "15", "", "N/A"]
+AMOUNTS  = ["1500", "₹2,000", "1500+2000 Bonus", "2000 (Bonus on 1M)", "No payment", "", "500/-"]
+URL_FORMS = [
+    "https://www.instagram.com/reel/{sc}/?igsh=abc",
+    "https://instagram.com/p/{sc}/",
+    "instagram.com/someuser/reel/{sc}",
+    "https://www.instagram.com/reels/{sc}/",
+    "story promo",
+    "",
+]
+
+
+def synthetic_sheet(n_rows: int, seed: int = 42) -> list[list[str]]:
+    rnd = random.Random(seed)
+    header = [f"col{i}" for i in range(16)]
+    rows = [header]
+    for _ in range(n_rows):
+        if rnd.random() < 0.02:
+            rows.append([""] * 16)
+            continue
+        sc = "".join(rnd.choices(string.ascii_letters + string.digits + "_-", k=11))
+        r = [""] * 16
+        r[0] = f"creator_{rnd.randint(1, 800)}"
+        r[COL_PAYMENT] = rnd.choice(AMOUNTS)
+        r[COL_DATE] = rnd.choice(DATES)
+        r[9] = rnd.choice(["Done", "done ✅", "pending", ""])
+        r[COL_HANDLER] = rnd.choice(HANDLERS)
+        r[11] = rnd.choice(["Delhi", "Mumbai", ""])
+        r[13] = rnd.choice(["", "bonus for 1M", "Bonus"])
+        r[COL_REEL_URL] = rnd.choice(URL_FORMS).format(sc=sc)
+        rows.append(r)
+    return rows
+
+
+def parse_rowwise(name: str, rows: list[list[str]]) -> list[tuple]:
+    out = []
+    for r in rows[1:]:
+        if not any(r):
+            continue
+        cell = lambda i: (r[i] if len(r) > i else "").strip()
+        out.append((
+            parse_amount(cell(COL_PAYMENT)),
+            parse_sheet_date(cell(COL_DATE), fallback_month=4),
+            handler_to_email(cell(COL_HANDLER)),
+            parse_reel_url(cell(COL_REEL_URL)),
+        ))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows",   type=int, default=10_000, help="Synthetic rows (default 10000)")
+    ap.add_argument("--repeat", type=int, default=3,      help="Timed repetitions (best is reported)")
+    args = ap.parse_args()
+
+    rows = synthetic_sheet(args.rows)
+    print(f"🧪 Synthetic sheet: {args.rows} rows\n")
+
+    def best_of(fn):
+        best = float("inf")
+        for _ in range(args.repeat):
+            handler_to_email.cache_clear()
+            _parse_day_month.cache_clear()
+            t0 = time.perf_counter()
+            res = fn()
+            best = min(best, time.perf_counter() - t0)
+        return best, res
+
+    t_row, row_res = best_of(lambda: parse_rowwise("April", rows))
+    t_col, parsed  = best_of(lambda: parse_worksheet("April", rows))
+
+    col_res = list(zip(
+        parsed.payment, parsed.date, parsed.email, zip(parsed.url, parsed.shortcode),
+    ))
+    mismatches = sum(1 for a, b in zip(row_res, col_res) if a != b)
+    mismatches += abs(len(row_res) - len(col_res))
+
+    print(f"   row-wise    : {t_row * 1000:8.1f} ms  ({t_row / args.rows * 1e6:.2f} µs/row)")
+    print(f"   column-wise : {t_col * 1000:8.1f} ms  ({t_col / args.rows * 1e6:.2f} µs/row)")
+    print(f"   parsed rows : {len(parsed)}  (reels={sum(1 for u in parsed.url if u)}, "
+          f"bonus={sum(parsed.is_bonus)}, dated={sum(1 for d in parsed.date if d)})")
+    if mismatches:
+        print(f"\n❌ {mismatches} rows differ between row-wise and column-wise parsing")
+        raise SystemExit(1)
+    print("\n✅ Row-wise and column-wise parsing agree")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ Bulk-refresh all reels in Supabase via VM cache + Render server.
 
 Read path:  GET /api/reel-info?url=<url>  → cached play_count/likes/comments (fast)
 Write path: POST /api/bulk-update-views   → Render server writes with service-role key
+            (only reels whose counts changed, and only the changed fields)
+Touch path: POST /api/touch-reels         → one UPDATE per batch bumps lastupdatedat for
+            reels whose counts are unchanged (no row rewrite, no snapshot)
 
 Usage:
     python3 scripts/bulk_refresh_reels.py             # refresh all 2970
@@ -30,20 +33,24 @@ except ImportError:
     from supabase import create_client
     import requests
 
+from shortcodes import reel_url as get_url  # canonical URL, rebuilt from the shortcode
+from run_events import RunPublisher
+
 SUPABASE_URL = os.environ.get("VITE_SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("VITE_SUPABASE_PUBLISHABLE_KEY")
 API_SERVER   = "https://instagram-pr-api.onrender.com"
 PAGE_SIZE    = 1000
 WRITE_BATCH  = 50   # flush to server every N updates
+TOUCH_BATCH  = 100  # one UPDATE per touch request (server splits bigger ones)
 
 
-def fetch_all_reels(sb):
+def fetch_all_reels(sb, columns: str = "id,shortcode,permalink,url,inputurl,videoplaycount,likescount,commentscount"):
     all_reels = []
     from_ = 0
     while True:
         resp = (
             sb.table("reels")
-            .select("id,shortcode,permalink,url,inputurl,videoplaycount")
+            .select(columns)
             .range(from_, from_ + PAGE_SIZE - 1)
             .execute()
         )
@@ -55,17 +62,6 @@ def fetch_all_reels(sb):
     return all_reels
 
 
-def get_url(reel: dict) -> str | None:
-    for field in ("permalink", "url", "inputurl"):
-        v = (reel.get(field) or "").strip()
-        if v:
-            return v
-    sc = reel.get("shortcode")
-    if sc:
-        return f"https://www.instagram.com/reel/{sc}/"
-    return None
-
-
 def fetch_cached(reel_url: str):
     """Returns (play, likes, comments) from VM cache or None."""
     try:
@@ -94,6 +90,43 @@ def fetch_cached(reel_url: str):
         return None
 
 
+def diff_update(reel: dict, play: int, likes, comments) -> dict:
+    """Return only the count fields that differ from the loaded row.
+
+    Views never go down (a flaky cache read can't erase progress), so a lower
+    play count is treated as unchanged.
+    """
+    changed = {}
+    new_play = max(int(play), int(reel.get("videoplaycount") or 0))
+    if new_play != reel.get("videoplaycount"):
+        changed["videoplaycount"] = new_play
+    if likes is not None and likes != reel.get("likescount"):
+        changed["likescount"] = likes
+    if comments is not None and comments != reel.get("commentscount"):
+        changed["commentscount"] = comments
+    return changed
+
+
+def touch_on_server(shortcodes: list) -> tuple[int, int]:
+    """POST unchanged shortcodes to /api/touch-reels. Returns (touched, errors)."""
+    if not shortcodes:
+        return 0, 0
+    try:
+        r = requests.post(
+            f"{API_SERVER}/api/touch-reels",
+            json={"shortcodes": shortcodes},
+            timeout=30,
+        )
+        if r.ok:
+            d = r.json()
+            return d.get("touched", 0), d.get("errors", 0)
+        print(f"  ⚠️  touch returned {r.status_code}: {r.text[:100]}")
+        return 0, len(shortcodes)
+    except Exception as e:
+        print(f"  ⚠️  touch error: {e}")
+        return 0, len(shortcodes)
+
+
 def flush_to_server(batch: list) -> tuple[int, int]:
     """POST batch to /api/bulk-update-views. Returns (applied, errors)."""
     if not batch:
@@ -114,7 +147,8 @@ def flush_to_server(batch: list) -> tuple[int, int]:
         return 0, len(batch)
 
 
-def reader_worker(task_q: Queue, pending_q: Queue, counters: dict, lock: threading.Lock):
+def reader_worker(task_q: Queue, pending_q: Queue, counters: dict, lock: threading.Lock,
+                  run: RunPublisher):
     """Read view counts from cache and push update dicts to pending_q."""
     while True:
         try:
@@ -137,47 +171,55 @@ def reader_worker(task_q: Queue, pending_q: Queue, counters: dict, lock: threadi
             continue
 
         play, likes, comments = counts
-        old_play = reel.get("videoplaycount") or 0
-        new_play = max(int(play), int(old_play))
-
-        update = {
-            "shortcode": reel["shortcode"],
-            "videoplaycount": new_play,
-        }
-        if likes    is not None: update["likescount"]    = likes
-        if comments is not None: update["commentscount"] = comments
-
-        pending_q.put(update)
+        changed = diff_update(reel, play, likes, comments)
+        run.set_view(reel["shortcode"], changed.get("videoplaycount", reel.get("videoplaycount") or 0))
+        if changed:
+            pending_q.put(("update", {"shortcode": reel["shortcode"], **changed}))
+        else:
+            pending_q.put(("touch", reel["shortcode"]))
         task_q.task_done()
 
 
 def writer_worker(pending_q: Queue, done_event: threading.Event, counters: dict, lock: threading.Lock):
-    """Drain pending_q in batches and flush to server."""
-    buf = []
+    """Drain pending_q in batches and flush updates / touches to server."""
+    updates, touches = [], []
+
+    def flush_updates():
+        applied, errors = flush_to_server(updates)
+        with lock:
+            counters["ok"]   += applied
+            counters["fail"] += errors
+        updates.clear()
+
+    def flush_touches():
+        touched, errors = touch_on_server(touches)
+        with lock:
+            counters["unchanged"] += touched
+            counters["fail"]      += errors
+        touches.clear()
+
     while not done_event.is_set() or not pending_q.empty():
         try:
-            item = pending_q.get(timeout=2)
-            buf.append(item)
-            if len(buf) >= WRITE_BATCH:
-                applied, errors = flush_to_server(buf)
-                with lock:
-                    counters["ok"]   += applied
-                    counters["fail"] += errors
-                buf = []
+            kind, item = pending_q.get(timeout=2)
+            if kind == "update":
+                updates.append(item)
+                if len(updates) >= WRITE_BATCH:
+                    flush_updates()
+            else:
+                touches.append(item)
+                if len(touches) >= TOUCH_BATCH:
+                    flush_touches()
         except Empty:
             # Nothing new — flush what we have
-            if buf:
-                applied, errors = flush_to_server(buf)
-                with lock:
-                    counters["ok"]   += applied
-                    counters["fail"] += errors
-                buf = []
+            if updates:
+                flush_updates()
+            if touches:
+                flush_touches()
     # Final flush
-    if buf:
-        applied, errors = flush_to_server(buf)
-        with lock:
-            counters["ok"]   += applied
-            counters["fail"] += errors
+    if updates:
+        flush_updates()
+    if touches:
+        flush_touches()
 
 
 def main():
@@ -205,60 +247,67 @@ def main():
     reels = fetch_all_reels(sb)
     print(f"   Found {len(reels)} reels")
 
+    fetched = reels  # the published views map covers every reel, even with --limit
     if args.limit:
         reels = reels[:args.limit]
         print(f"   Capped to {len(reels)}")
 
-    task_q: Queue    = Queue()
-    pending_q: Queue = Queue()
-    for r in reels:
-        task_q.put(r)
-
-    counters   = {"ok": 0, "fail": 0, "skip": 0, "miss": 0}
-    lock       = threading.Lock()
-    done_event = threading.Event()
-    total      = len(reels)
-    n_readers  = min(args.concurrency, total)
-
-    print(f"🚀 Starting {n_readers} reader workers + 1 writer…\n")
-    start_time = time.time()
-
-    # Start writer
-    wt = threading.Thread(target=writer_worker, args=(pending_q, done_event, counters, lock), daemon=True)
-    wt.start()
-
-    # Start readers
-    readers = []
-    for _ in range(n_readers):
-        t = threading.Thread(target=reader_worker, args=(task_q, pending_q, counters, lock), daemon=True)
-        t.start()
-        readers.append(t)
-
-    # Progress
-    while any(t.is_alive() for t in readers):
-        time.sleep(15)
-        with lock:
-            read_done = counters["ok"] + counters["fail"] + counters["skip"] + counters["miss"]
-            ok        = counters["ok"]
-            miss      = counters["miss"]
+    # Publishes the views map as it goes and a completion event on exit
+    # (run_events.py), so exports wait on the run instead of polling for it
+    with RunPublisher("bulk_refresh_reels") as run:
+        run.seed(fetched)
+        task_q: Queue    = Queue()
+        pending_q: Queue = Queue()
+        for r in reels:
+            task_q.put(r)
+
+        counters   = {"ok": 0, "unchanged": 0, "fail": 0, "skip": 0, "miss": 0}
+        lock       = threading.Lock()
+        done_event = threading.Event()
+        total      = len(reels)
+        n_readers  = min(args.concurrency, total)
+
+        print(f"🚀 Starting {n_readers} reader workers + 1 writer…\n")
+        start_time = time.time()
+
+        # Start writer
+        wt = threading.Thread(target=writer_worker, args=(pending_q, done_event, counters, lock), daemon=True)
+        wt.start()
+
+        # Start readers
+        readers = []
+        for _ in range(n_readers):
+            t = threading.Thread(target=reader_worker, args=(task_q, pending_q, counters, lock, run), daemon=True)
+            t.start()
+            readers.append(t)
+
+        # Progress
+        while any(t.is_alive() for t in readers):
+            time.sleep(15)
+            with lock:
+                read_done = counters["ok"] + counters["unchanged"] + counters["fail"] + counters["skip"] + counters["miss"]
+                ok        = counters["ok"]
+                same      = counters["unchanged"]
+                miss      = counters["miss"]
+            elapsed = time.time() - start_time
+            rate    = read_done / elapsed * 60 if elapsed > 0 else 0
+            eta     = (total - read_done) / (rate / 60) if rate > 0 else 0
+            print(f"  {read_done}/{total}  ✅{ok} changed  💤{same} unchanged  ⚪{miss} not-in-cache  {rate:.0f}/min  ETA {eta/60:.1f}min")
+
+        for t in readers:
+            t.join()
+
+        # Signal writer to finish
+        done_event.set()
+        wt.join()
+
         elapsed = time.time() - start_time
-        rate    = read_done / elapsed * 60 if elapsed > 0 else 0
-        eta     = (total - read_done) / (rate / 60) if rate > 0 else 0
-        print(f"  {read_done}/{total}  ✅{ok} cached  ⚪{miss} not-in-cache  {rate:.0f}/min  ETA {eta/60:.1f}min")
-
-    for t in readers:
-        t.join()
-
-    # Signal writer to finish
-    done_event.set()
-    wt.join()
-
-    elapsed = time.time() - start_time
-    print(f"\n🎉 Done in {elapsed/60:.1f} min")
-    print(f"   ✅ Updated in Supabase : {counters['ok']}")
-    print(f"   ⚪ Not in VM cache     : {counters['miss']}  (these need a fresh scrape)")
-    print(f"   ❌ Write errors        : {counters['fail']}")
-    print(f"   ⏭  No URL (skipped)   : {counters['skip']}")
+        print(f"\n🎉 Done in {elapsed/60:.1f} min")
+        print(f"   ✅ Updated in Supabase : {counters['ok']}")
+        print(f"   💤 Unchanged (touched) : {counters['unchanged']}")
+        print(f"   ⚪ Not in VM cache     : {counters['miss']}  (these need a fresh scrape)")
+        print(f"   ❌ Write errors        : {counters['fail']}")
+        print(f"   ⏭  No URL (skipped)   : {counters['skip']}")
 
 
 if __name__ == "__main__":
@@ -34,6 +34,10 @@ except ImportError:
     from supabase import create_client
     import requests
 
+from traffic_trace import TraceRecorder
+from shortcodes import reel_url as get_url  # canonical URL, rebuilt from the shortcode
+from run_events import RunPublisher
+
 SUPABASE_URL  = os.environ.get("VITE_SUPABASE_URL")
 SUPABASE_KEY  = os.environ.get("VITE_SUPABASE_PUBLISHABLE_KEY")
 VM_API        = "https://api.rareme.shop"
@@ -44,6 +48,8 @@ WRITE_BATCH   = 50
 POLL_INTERVAL = 5     # seconds between status polls
 MAX_POLL      = 72    # 72 × 5s = 6 min max
 
+_trace = TraceRecorder.from_env("bulk_refresh_uncached")  # TRAFFIC_TRACE=path to record
+
 
 def fetch_all_reels(sb):
     all_reels = []
@@ -63,21 +69,17 @@ def fetch_all_reels(sb):
     return all_reels
 
 
-def get_url(reel: dict) -> str | None:
-    for field in ("permalink", "url", "inputurl"):
-        v = (reel.get(field) or "").strip()
-        if v:
-            return v
-    sc = reel.get("shortcode")
-    if sc:
-        return f"https://www.instagram.com/reel/{sc}/"
-    return None
-
-
 def fetch_cached(reel_url: str):
     """Returns (play, likes, comments) from VM cache or None."""
+    started = time.time()
     try:
         r = requests.get(f"{VM_API}/reel-info", params={"url": reel_url}, timeout=15)
+    except Exception:
+        _trace.record("vm_cache", "error", time.time() - started)
+        return None
+    _trace.record("vm_cache", "rate_limited" if r.status_code == 429 else "ok" if r.ok else "error",
+                  time.time() - started)
+    try:
         if not r.ok:
             return None
         d = r.json()
@@ -100,19 +102,30 @@ def fetch_cached(reel_url: str):
 
 def scrape_live(reel_url: str):
     """Submit async scrape to VM, poll for result. Returns (play, likes, comments) or None."""
+    started = time.time()
+    counts, status, polls = _scrape_live(reel_url)
+    # One trace event per live scrape: end-to-end latency and how many polls it took
+    _trace.record("vm_live", status, time.time() - started, polls=polls)
+    return counts
+
+
+def _scrape_live(reel_url: str):
+    """Returns (counts or None, trace status, polls made)."""
     # Submit
     try:
         r = requests.post(f"{VM_API}/api/async/scrape", params={"url": reel_url}, timeout=20)
+        if r.status_code == 429:
+            return None, "rate_limited", 0
         if not r.ok:
-            return None
+            return None, "error", 0
         job_id = r.json().get("job_id")
         if not job_id:
-            return None
+            return None, "error", 0
     except Exception:
-        return None
+        return None, "error", 0
 
     # Poll
-    for _ in range(MAX_POLL):
+    for poll in range(1, MAX_POLL + 1):
         time.sleep(POLL_INTERVAL)
         try:
             r = requests.get(f"{VM_API}/api/async/status/{job_id}", timeout=15)
@@ -134,13 +147,13 @@ def scrape_live(reel_url: str):
                         int(play),
                         int(likes)    if likes    is not None else None,
                         int(comments) if comments is not None else None,
-                    )
-                return None
+                    ), "ok", poll
+                return None, "empty", poll
             if d.get("status") == "failed":
-                return None
+                return None, "error", poll
         except Exception:
             pass
-    return None  # timeout
+    return None, "error", MAX_POLL  # timeout
 
 
 def flush_to_server(batch: list) -> tuple[int, int]:
@@ -161,7 +174,8 @@ def flush_to_server(batch: list) -> tuple[int, int]:
         return 0, len(batch)
 
 
-def reader_worker(task_q: Queue, pending_q: Queue, counters: dict, lock: threading.Lock):
+def reader_worker(task_q: Queue, pending_q: Queue, counters: dict, lock: threading.Lock,
+                  run: RunPublisher):
     while True:
         try:
             reel = task_q.get_nowait()
@@ -197,6 +211,7 @@ def reader_worker(task_q: Queue, pending_q: Queue, counters: dict, lock: threadi
         if comments is not None: update["commentscount"] = comments
 
         pending_q.put(update)
+        run.set_view(reel["shortcode"], new_play)
         with lock:
             counters["fetched"] += 1
         task_q.task_done()
@@ -252,59 +267,64 @@ def main():
     reels = fetch_all_reels(sb)
     print(f"   Found {len(reels)} reels")
 
+    fetched = reels  # the published views map covers every reel, even with --limit
     if args.limit:
         reels = reels[:args.limit]
         print(f"   Capped to {len(reels)}")
 
-    task_q: Queue    = Queue()
-    pending_q: Queue = Queue()
-    for r in reels:
-        task_q.put(r)
-
-    counters   = {"ok": 0, "fail": 0, "skip": 0, "fetched": 0}
-    lock       = threading.Lock()
-    done_event = threading.Event()
-    total      = len(reels)
-    n_readers  = min(args.concurrency, total)
-
-    print(f"🚀 Starting {n_readers} reader workers + 1 writer…")
-    print(f"   Cache hits → instant | Cache miss → live scrape (~30-60s each)\n")
-    start_time = time.time()
-
-    # Writer
-    wt = threading.Thread(target=writer_worker, args=(pending_q, done_event, counters, lock), daemon=True)
-    wt.start()
-
-    # Readers
-    readers = []
-    for _ in range(n_readers):
-        t = threading.Thread(target=reader_worker, args=(task_q, pending_q, counters, lock), daemon=True)
-        t.start()
-        readers.append(t)
-
-    # Progress
-    while any(t.is_alive() for t in readers):
-        time.sleep(20)
-        with lock:
-            done   = counters["fetched"] + counters["fail"] + counters["skip"]
-            ok_db  = counters["ok"]
-            fail   = counters["fail"]
-        elapsed = time.time() - start_time
-        rate    = done / elapsed * 60 if elapsed > 0 else 0
-        eta     = (total - done) / (rate / 60) if rate > 0 else 0
-        print(f"  {done}/{total}  ✅{ok_db} written  ❌{fail} failed  {rate:.0f}/min  ETA {eta/60:.1f}min")
+    # Publishes the views map as it goes and a completion event on exit
+    # (run_events.py), so exports wait on the run instead of polling for it
+    with RunPublisher("bulk_refresh_uncached") as run:
+        run.seed(fetched)
+        task_q: Queue    = Queue()
+        pending_q: Queue = Queue()
+        for r in reels:
+            task_q.put(r)
+
+        counters   = {"ok": 0, "fail": 0, "skip": 0, "fetched": 0}
+        lock       = threading.Lock()
+        done_event = threading.Event()
+        total      = len(reels)
+        n_readers  = min(args.concurrency, total)
+
+        print(f"🚀 Starting {n_readers} reader workers + 1 writer…")
+        print(f"   Cache hits → instant | Cache miss → live scrape (~30-60s each)\n")
+        start_time = time.time()
+
+        # Writer
+        wt = threading.Thread(target=writer_worker, args=(pending_q, done_event, counters, lock), daemon=True)
+        wt.start()
+
+        # Readers
+        readers = []
+        for _ in range(n_readers):
+            t = threading.Thread(target=reader_worker, args=(task_q, pending_q, counters, lock, run), daemon=True)
+            t.start()
+            readers.append(t)
+
+        # Progress
+        while any(t.is_alive() for t in readers):
+            time.sleep(20)
+            with lock:
+                done   = counters["fetched"] + counters["fail"] + counters["skip"]
+                ok_db  = counters["ok"]
+                fail   = counters["fail"]
+            elapsed = time.time() - start_time
+            rate    = done / elapsed * 60 if elapsed > 0 else 0
+            eta     = (total - done) / (rate / 60) if rate > 0 else 0
+            print(f"  {done}/{total}  ✅{ok_db} written  ❌{fail} failed  {rate:.0f}/min  ETA {eta/60:.1f}min")
 
-    for t in readers:
-        t.join()
+        for t in readers:
+            t.join()
 
-    done_event.set()
-    wt.join()
+        done_event.set()
+        wt.join()
 
-    elapsed = time.time() - start_time
-    print(f"\n🎉 Done in {elapsed/60:.1f} min")
-    print(f"   ✅ Updated in Supabase : {counters['ok']}")
-    print(f"   ❌ Failed (scrape/write): {counters['fail']}")
-    print(f"   ⏭  No URL (skipped)   : {counters['skip']}")
+        elapsed = time.time() - start_time
+        print(f"\n🎉 Done in {elapsed/60:.1f} min")
+        print(f"   ✅ Updated in Supabase : {counters['ok']}")
+        print(f"   ❌ Failed (scrape/write): {counters['fail']}")
+        print(f"   ⏭  No URL (skipped)   : {counters['skip']}")
 
 
 if __name__ == "__main__":
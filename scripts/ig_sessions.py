@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Warm, logged-in instagrapi clients shared by the VM scripts.
+
+scraper_instagrapi.fetch_engagement(url, cookie_file, account) is handed a
+cookie file on every call. This module keeps one logged-in Client per account
+for the life of the process instead: the cookie file is read and the session
+established once, and the client is only rebuilt when Instagram says the
+session is no longer valid (LoginRequired). After that, each reel costs just
+the media request.
+
+Drop-in replacement:
+
+    from ig_sessions import fetch_engagement     # instead of scraper_instagrapi
+    result = fetch_engagement(url, cookie_file, account)
+    # → {"engagement": {"play_count", "view_count", "like_count", "comment_count"},
+    #    "timestamp": <unix seconds>,
+    #    "fields": {<reels column>: value}}   # caption, owner, audio, duration, ...
+
+    update = reel_update(reel, result)   # one bulk-update-views payload with everything
+
+Cookie files may be Netscape cookies.txt exports, a JSON list/dict of
+cookies, or a raw "name=value; ..." header; only `sessionid` is required.
+IG_SCRAPER_PROXY (e.g. socks5h://127.0.0.1:40000) is applied to every client.
+If instagrapi is missing or a cookie file has no sessionid, calls fall back
+to scraper_instagrapi.fetch_engagement.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+VM_API_DIR = "/home/ubuntu/instagram_view_counter_api"
+sys.path.insert(0, VM_API_DIR)
+
+try:
+    from instagrapi import Client
+    from instagrapi.exceptions import LoginRequired
+except ImportError:
+    Client = None
+
+    class LoginRequired(Exception):
+        pass
+
+
+class NoSessionId(Exception):
+    """The cookie file has no sessionid, so no instagrapi client can be built."""
+
+
+def resolve_cookie_file(cookie_file: str) -> str:
+    if os.path.isabs(cookie_file) or os.path.exists(cookie_file):
+        return cookie_file
+    return os.path.join(VM_API_DIR, cookie_file)
+
+
+def read_cookies(cookie_file: str) -> dict[str, str]:
+    """Parses a cookie file (Netscape, JSON or header string) into {name: value}."""
+    with open(resolve_cookie_file(cookie_file)) as f:
+        text = f.read().strip()
+
+    if text.startswith(("[", "{")):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return {k: str(v) for k, v in data.items()}
+        return {c["name"]: str(c["value"]) for c in data if "name" in c}
+
+    cookies = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("#HttpOnly_"):
+            line = line[len("#HttpOnly_"):]
+        elif not line or line.startswith("#"):
+            continue
+        parts = line.split("\t")
+        if len(parts) >= 7:
+            cookies[parts[5]] = parts[6]
+        else:
+            for pair in line.split(";"):
+                if "=" in pair:
+                    k, v = pair.split("=", 1)
+                    cookies[k.strip()] = v.strip()
+    return cookies
+
+
+class SessionManager:
+    """
+    One logged-in instagrapi Client per account, created on first use.
+    Requests on one account are serialised on its lock.
+    """
+
+    def __init__(self, proxy: Optional[str] = None):
+        self.proxy = proxy if proxy is not None else os.environ.get("IG_SCRAPER_PROXY")
+        self._clients: dict[str, "Client"] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.logins = 0
+
+    def _account_lock(self, account: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(account, threading.Lock())
+
+    def _login(self, account: str, cookie_file: str) -> "Client":
+        sessionid = read_cookies(cookie_file).get("sessionid")
+        if not sessionid:
+            raise NoSessionId(f"no sessionid in {cookie_file}")
+        cl = Client()
+        if self.proxy:
+            cl.set_proxy(self.proxy)
+        cl.login_by_sessionid(sessionid)
+        self.logins += 1
+        return cl
+
+    def fetch_engagement(self, reel_url: str, cookie_file: str, account: str) -> Optional[dict]:
+        if Client is None:
+            return _legacy_fetch(reel_url, cookie_file, account)
+
+        # A Client keeps per-request state (last_json, last_response, headers),
+        # so each account's client serves one request at a time; threads on
+        # other accounts are not blocked.
+        with self._account_lock(account):
+            cl = self._clients.get(account)
+            if cl is None:
+                try:
+                    cl = self._clients[account] = self._login(account, cookie_file)
+                except NoSessionId:
+                    cl = None
+            if cl is not None:
+                try:
+                    media = cl.media_info(cl.media_pk_from_url(reel_url))
+                except LoginRequired:
+                    # Session expired or was revoked: re-read the cookie file once and retry
+                    cl = self._clients[account] = self._login(account, cookie_file)
+                    media = cl.media_info(cl.media_pk_from_url(reel_url))
+        if cl is None:
+            return _legacy_fetch(reel_url, cookie_file, account)
+
+        play = media.play_count or media.view_count
+        return {
+            "engagement": {
+                "play_count": play,
+                "view_count": media.view_count,
+                "like_count": media.like_count,
+                "comment_count": media.comment_count,
+            },
+            "timestamp": int(media.taken_at.timestamp()) if media.taken_at else None,
+            "fields": media_fields(media),
+        }
+
+
+def media_fields(media) -> dict:
+    """reels columns (other than counts and takenat) from an instagrapi Media."""
+    clips = media.clips_metadata or {}
+    music = (clips.get("music_info") or {}).get("music_asset_info") or {}
+    sound = clips.get("original_sound_info") or {}
+    if music:
+        audioname = " - ".join(x for x in (music.get("display_artist"), music.get("title")) if x)
+        audiourl = music.get("progressive_download_url")
+    else:
+        audioname = sound.get("original_audio_title")
+        audiourl = sound.get("progressive_download_url")
+    user = media.user
+    fields = {
+        "videoviewcount": media.view_count,
+        "video_duration": round(media.video_duration) if media.video_duration else None,  # integer column
+        "caption": media.caption_text or None,
+        "ownerusername": user.username if user else None,
+        "ownerfullname": user.full_name if user else None,
+        "ownerid": str(user.pk) if user and user.pk else None,
+        "audioname": audioname or None,
+        "audiourl": audiourl,
+        "thumbnailurl": str(media.thumbnail_url) if media.thumbnail_url else None,
+        "displayurl": str(media.thumbnail_url) if media.thumbnail_url else None,
+        "videourl": str(media.video_url) if media.video_url else None,
+        "producttype": media.product_type or None,
+    }
+    return {k: v for k, v in fields.items() if v is not None}
+
+
+def reel_update(reel: dict, result: dict) -> dict:
+    """
+    The /api/bulk-update-views payload for one scraped reel: counts (views
+    never go down), the publish date and owner if the reel has none, and every
+    other metadata column the scrape returned. locationname is never sent: it
+    holds the POC from the sheet, not the Instagram geotag.
+    """
+    eng = result.get("engagement") or {}
+    play = eng.get("play_count") or eng.get("view_count") or eng.get("views")
+    likes = eng.get("like_count")
+    comments = eng.get("comment_count")
+    ts = result.get("timestamp")
+
+    upd = {"shortcode": reel["shortcode"], **(result.get("fields") or {})}
+    if reel.get("ownerusername"):
+        upd.pop("ownerusername", None)  # set by the sheet import; the server also only fills blanks
+    if play is not None:
+        upd["videoplaycount"] = max(int(play), int(reel.get("videoplaycount") or 0))
+    if likes is not None:
+        upd["likescount"] = int(likes)
+    if comments is not None:
+        upd["commentscount"] = int(comments)
+    if ts and not reel.get("takenat"):
+        upd["takenat"] = datetime.fromtimestamp(int(ts), tz=timezone.utc).isoformat()
+    return upd
+
+
+def _legacy_fetch(reel_url: str, cookie_file: str, account: str):
+    from scraper_instagrapi import fetch_engagement as legacy
+    return legacy(reel_url, cookie_file, account)
+
+
+_manager = SessionManager()
+fetch_engagement = _manager.fetch_engagement
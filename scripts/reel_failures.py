@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Structured scrape-failure classification and a negative cache for dead reels.
+
+classify(exc) turns an instagrapi / requests exception into a Failure with a
+kind and whether it is permanent:
+
+    not_found     reel deleted / never existed                 permanent
+    private       owner made the account private                permanent
+    rate_limited  429 / "please wait a few minutes"             transient
+    challenge     challenge / checkpoint / feedback_required    transient
+    auth          session expired or unauthorized               transient
+    network       connection errors and timeouts                transient
+    error         anything else                                 transient
+
+NegativeCache remembers reels that failed permanently and when to look at
+them again. Each further confirmation doubles the interval, so a reel
+re-checked after 1 day, then 2, 4, 8, ... (capped at 60 days) stops eating
+scrape budget on every problem run but is still re-verified now and then.
+A successful scrape removes the reel from the cache.
+
+    cache = NegativeCache()                  # REEL_NEGATIVE_CACHE or ./negative_cache.json
+    if cache.should_skip(sc): ...
+    cache.mark_dead(sc, failure.kind)
+    cache.clear(sc)
+    cache.save()
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from typing import NamedTuple, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE = os.path.join(HERE, "negative_cache.json")
+
+PERMANENT_KINDS = ("not_found", "private")
+
+# instagrapi exception class names (matched anywhere in the MRO, so the module
+# doesn't need to be importable here)
+_CLASS_KINDS = {
+    "MediaNotFound": "not_found",
+    "MediaUnavailable": "not_found",
+    "ClientNotFoundError": "not_found",
+    "UserNotFound": "not_found",
+    "PrivateError": "private",
+    "PrivateAccount": "private",
+    "PleaseWaitFewMinutes": "rate_limited",
+    "RateLimitError": "rate_limited",
+    "ClientThrottledError": "rate_limited",
+    "ChallengeRequired": "challenge",
+    "FeedbackRequired": "challenge",
+    "SentryBlock": "challenge",
+    "LoginRequired": "auth",
+    "ClientUnauthorizedError": "auth",
+    "ClientForbiddenError": "auth",
+    "ClientConnectionError": "network",
+    "ClientRequestTimeout": "network",
+    "ConnectionError": "network",
+    "Timeout": "network",
+    "TimeoutError": "network",
+}
+
+# Fallback for wrapped exceptions that only carry a message. not_found is
+# permanent (the reel gets archived), so only media-specific phrases count: a
+# bare "404" / "not found" may come from a proxy or the VM API and stays "error".
+_MESSAGE_KINDS = (
+    (("429", "please wait", "too many requests", "rate limit"), "rate_limited"),
+    (("challenge", "checkpoint", "feedback_required"), "challenge"),
+    (("login_required", "unauthorized", "401"), "auth"),
+    (("media not found", "media does not exist", "media unavailable",
+      "media has been deleted", "post has been deleted"), "not_found"),
+    (("is private", "private account", "not authorized to view"), "private"),
+    (("timed out", "timeout", "connection reset", "connection refused"), "network"),
+)
+
+# A 404 for an Instagram media endpoint, e.g. requests' "404 Client Error: Not
+# Found for url: https://i.instagram.com/api/v1/media/123/info/"
+_MEDIA_404_RE = re.compile(r"\b404\b.*instagram\.com/(?:api/v1/)?media/")
+
+
+class Failure(NamedTuple):
+    kind: str
+    permanent: bool
+    message: str
+
+
+def classify(exc: BaseException) -> Failure:
+    kind = next((_CLASS_KINDS[c.__name__] for c in type(exc).__mro__ if c.__name__ in _CLASS_KINDS), None)
+    msg = str(exc)
+    if kind is None:
+        low = msg.lower()
+        kind = next((k for needles, k in _MESSAGE_KINDS if any(n in low for n in needles)), None)
+        if kind is None and _MEDIA_404_RE.search(low):
+            kind = "not_found"
+        kind = kind or "error"
+    return Failure(kind, kind in PERMANENT_KINDS, msg[:200])
+
+
+class NegativeCache:
+    """shortcode → {kind, checks, first_seen, next_check}, persisted as JSON."""
+
+    def __init__(self, path: Optional[str] = None, base_sec: float = 86400.0,
+                 max_sec: float = 60 * 86400.0, autosave_every: int = 50):
+        self.path = path or os.environ.get("REEL_NEGATIVE_CACHE") or DEFAULT_CACHE
+        self.base_sec = base_sec
+        self.max_sec = max_sec
+        self.autosave_every = autosave_every
+        self._lock = threading.Lock()
+        self._dirty = 0
+        try:
+            with open(self.path) as f:
+                self.entries: dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def should_skip(self, shortcode: str, now: Optional[float] = None) -> bool:
+        entry = self.entries.get(shortcode)
+        return bool(entry) and (now or time.time()) < entry["next_check"]
+
+    def mark_dead(self, shortcode: str, kind: str, now: Optional[float] = None) -> float:
+        """Records one more permanent failure; returns seconds until the next re-check."""
+        now = now or time.time()
+        with self._lock:
+            entry = self.entries.get(shortcode) or {"first_seen": now, "checks": 0}
+            entry["checks"] += 1
+            entry["kind"] = kind
+            interval = min(self.max_sec, self.base_sec * 2 ** (entry["checks"] - 1))
+            entry["next_check"] = now + interval
+            self.entries[shortcode] = entry
+            self._dirty += 1
+            autosave = self._dirty >= self.autosave_every
+        if autosave:
+            self.save()
+        return interval
+
+    def clear(self, shortcode: str):
+        with self._lock:
+            if self.entries.pop(shortcode, None) is not None:
+                self._dirty += 1
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp, self.path)
+            self._dirty = 0
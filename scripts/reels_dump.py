@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Parse, diff and bulk-load the reels SQL dumps (reels_rows.sql,
+reels_rows_new.sql, reels_insert_ready.sql).
+
+The dumps are Supabase "export as SQL" output: one
+`INSERT INTO "public"."reels" (...) VALUES (...), (...), ...;` statement with
+hundreds of row tuples and multi-line captions. This tool tokenizes a dump in
+fixed-size chunks (never the whole file as one string) into a columnar
+ReelsTable (one list per column, plus an id → row index). Two tables, or a
+table and the live `reels` table, can then be diffed column by column. Only
+rows that were added or changed are loaded, with one COPY into a temp table
+and one INSERT ... ON CONFLICT (id) DO UPDATE, instead of a statement per
+row.
+
+Values are kept exactly as dumped (text, None for NULL). Comparisons
+normalize numbers, booleans and timestamps, so '0.00' == 0 and
+'2025-11-01 13:08:55+00' == '2025-11-01T13:08:55+00:00'.
+
+Usage:
+    python3 scripts/reels_dump.py stats reels_rows.sql
+    python3 scripts/reels_dump.py diff reels_rows.sql reels_rows_new.sql      # which rows changed
+    python3 scripts/reels_dump.py diff live reels_rows_new.sql --show 20      # dump vs Supabase
+    python3 scripts/reels_dump.py copy reels_rows_new.sql --against live --out load.sql
+    psql "$DATABASE_URL" -f load.sql                                          # COPY-based restore
+    python3 scripts/reels_dump.py apply reels_rows_new.sql --against live     # same, via psycopg2
+
+`live` reads the reels table with the publishable key (VITE_SUPABASE_URL /
+VITE_SUPABASE_PUBLISHABLE_KEY). `apply` writes through DATABASE_URL (the
+Postgres connection string from Supabase → Project Settings → Database) and
+needs psycopg2; without it, use `copy` + psql.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Iterator, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+KEY = "id"
+PAGE_SIZE = 1000
+CHUNK_SIZE = 1 << 16
+
+NUMERIC_COLS = {
+    "likescount", "commentscount", "videoviewcount", "videoplaycount", "videowatchcount",
+    "repostcount", "payout", "sentcount", "sharecount", "video_duration",
+    "refresh_count", "decay_priority",
+}
+TIMESTAMP_COLS = {
+    "timestamp", "takenat", "lastupdatedat", "publishedtime", "created_at", "updated_at",
+    "last_refresh_at",
+}
+
+_TOKEN = re.compile(r"""
+    '(?P<str>(?:[^']|'')*)'            # literal, '' is an escaped quote
+  | "(?P<ident>(?:[^"]|"")*)"          # quoted identifier
+  | (?P<num>-?\d+(?:\.\d+)?)
+  | (?P<word>[A-Za-z_][A-Za-z_0-9]*)   # INSERT / INTO / VALUES / NULL / true / false
+  | (?P<punct>[(),;.])
+  | (?P<ws>\s+)
+""", re.X)
+
+
+def _tokens(f, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple[str, str]]:
+    """(kind, text) tokens from a file object, reading `chunk_size` chars at a time."""
+    buf, pos, eof = "", 0, False
+    while True:
+        m = _TOKEN.match(buf, pos)
+        # A token touching the end of the buffer may continue in the next chunk
+        # (a literal's '' escape, a longer number); refill and match again.
+        if (m is None or m.end() == len(buf)) and not eof:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        if m is None:
+            rest = buf[pos:pos + 40]
+            if rest.strip():
+                raise ValueError(f"unexpected input near {rest!r}")
+            return
+        pos = m.end()
+        kind = m.lastgroup
+        if kind != "ws":
+            yield kind, m.group(kind)
+
+
+def iter_dump(path: str) -> Iterator[tuple[list[str], list[Optional[str]]]]:
+    """Yields (columns, values) for every row tuple of every INSERT in the dump."""
+    with open(path, encoding="utf-8") as f:
+        toks = _tokens(f)
+        for kind, text in toks:
+            if kind == "punct" and text == ";":
+                continue
+            if (kind, text.upper()) != ("word", "INSERT"):
+                raise ValueError(f"{path}: expected INSERT, got {text!r}")
+            columns = _read_header(toks, path)
+            while True:
+                yield columns, _read_tuple(toks, len(columns), path)
+                kind, text = next(toks, ("punct", ";"))
+                if text == ";":
+                    break
+                if text != ",":
+                    raise ValueError(f"{path}: expected ',' or ';' after row, got {text!r}")
+
+
+def _read_header(toks, path: str) -> list[str]:
+    columns = []
+    for kind, text in toks:
+        if kind == "punct" and text == "(":
+            break
+    for kind, text in toks:
+        if kind == "ident":
+            columns.append(text.replace('""', '"'))
+        elif text == ")":
+            break
+    kind, text = next(toks)
+    if text.upper() != "VALUES":
+        raise ValueError(f"{path}: expected VALUES, got {text!r}")
+    return columns
+
+
+def _read_tuple(toks, width: int, path: str) -> list[Optional[str]]:
+    kind, text = next(toks)
+    if text != "(":
+        raise ValueError(f"{path}: expected '(' to start a row, got {text!r}")
+    values: list[Optional[str]] = []
+    for kind, text in toks:
+        if kind == "str":
+            values.append(text.replace("''", "'"))
+        elif kind == "num":
+            values.append(text)
+        elif kind == "word":
+            values.append(None if text.upper() == "NULL" else text.lower())
+        elif text == ")":
+            break
+        elif text != ",":
+            raise ValueError(f"{path}: unexpected {text!r} in row")
+    if len(values) != width:
+        raise ValueError(f"{path}: row has {len(values)} values, header has {width} columns")
+    return values
+
+
+def normalize(column: str, value) -> Optional[str]:
+    """Comparable text form of a dump or API value."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if column in NUMERIC_COLS:
+        try:
+            return str(Decimal(str(value)).normalize())
+        except InvalidOperation:
+            return str(value)
+    if column in TIMESTAMP_COLS and isinstance(value, str):
+        text = value.replace(" ", "T", 1)
+        if re.search(r"[+-]\d\d$", text):
+            text += ":00"
+        try:
+            return datetime.fromisoformat(text.replace("Z", "+00:00")).isoformat()
+        except ValueError:
+            return value
+    return str(value)
+
+
+class ReelsTable:
+    """Column-oriented reels rows: {column: [values]} plus an id → row index."""
+
+    def __init__(self, columns: list[str], source: str = ""):
+        if KEY not in columns:
+            raise ValueError(f"{source or 'table'} has no {KEY!r} column")
+        self.columns = list(columns)
+        self.source = source
+        self.data: dict[str, list] = {c: [] for c in columns}
+        self.index: dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def append(self, values) -> None:
+        key = values[self.columns.index(KEY)] if isinstance(values, list) else values[KEY]
+        if isinstance(values, dict):
+            values = [values.get(c) for c in self.columns]
+        row = self.index.get(key)
+        if row is None:
+            self.index[key] = len(self.data[KEY])
+            for c, v in zip(self.columns, values):
+                self.data[c].append(v)
+        else:  # later duplicate of the same id wins, like a replayed INSERT
+            for c, v in zip(self.columns, values):
+                self.data[c][row] = v
+
+    def row(self, key: str) -> dict:
+        i = self.index[key]
+        return {c: self.data[c][i] for c in self.columns}
+
+    @classmethod
+    def from_dump(cls, path: str) -> "ReelsTable":
+        table = None
+        for columns, values in iter_dump(path):
+            if table is None:
+                table = cls(columns, path)
+            elif columns != table.columns:
+                raise ValueError(f"{path}: INSERT statements with different column lists")
+            table.append(values)
+        if table is None:
+            raise ValueError(f"{path}: no INSERT statements")
+        return table
+
+    @classmethod
+    def from_live(cls, columns: list[str]) -> "ReelsTable":
+        from dotenv import load_dotenv
+        from supabase import create_client
+
+        load_dotenv(os.path.join(os.path.dirname(HERE), ".env"))
+        sb = create_client(os.environ["VITE_SUPABASE_URL"], os.environ["VITE_SUPABASE_PUBLISHABLE_KEY"])
+        table = cls(columns, "live")
+        select = ",".join(columns)
+        from_ = 0
+        while True:
+            page = sb.table("reels").select(select).order(KEY).range(from_, from_ + PAGE_SIZE - 1).execute().data or []
+            for rec in page:
+                table.append(rec)
+            if len(page) < PAGE_SIZE:
+                return table
+            from_ += PAGE_SIZE
+
+
+def load(spec: str, columns: Optional[list[str]] = None) -> ReelsTable:
+    """A dump path, or `live` (reads `columns` from Supabase)."""
+    if spec == "live":
+        if not columns:
+            raise ValueError("`live` needs the column list of a dump to compare against")
+        return ReelsTable.from_live(columns)
+    return ReelsTable.from_dump(spec)
+
+
+@dataclass
+class DumpDiff:
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: dict[str, list[str]] = field(default_factory=dict)  # id -> changed columns
+    only_in_base: list[str] = field(default_factory=list)        # columns
+    only_in_target: list[str] = field(default_factory=list)
+
+    @property
+    def to_load(self) -> list[str]:
+        return self.added + list(self.changed)
+
+
+def diff(base: ReelsTable, target: ReelsTable) -> DumpDiff:
+    """What must change in `base` to make it match `target`, compared column by column."""
+    d = DumpDiff(
+        only_in_base=[c for c in base.columns if c not in target.columns],
+        only_in_target=[c for c in target.columns if c not in base.columns],
+    )
+    d.added = [k for k in target.index if k not in base.index]
+    d.removed = [k for k in base.index if k not in target.index]
+    common_keys = [k for k in target.index if k in base.index]
+    t_rows = [target.index[k] for k in common_keys]
+    b_rows = [base.index[k] for k in common_keys]
+
+    for c in target.columns:
+        if c not in base.columns or c == KEY:
+            continue
+        tcol, bcol = target.data[c], base.data[c]
+        for k, ti, bi in zip(common_keys, t_rows, b_rows):
+            tv, bv = tcol[ti], bcol[bi]
+            if tv != bv and normalize(c, tv) != normalize(c, bv):
+                d.changed.setdefault(k, []).append(c)
+    return d
+
+
+def _copy_text(value) -> str:
+    """One field in Postgres COPY text format."""
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def copy_rows(table: ReelsTable, keys: list[str]) -> Iterator[str]:
+    cols = [table.data[c] for c in table.columns]
+    for k in keys:
+        i = table.index[k]
+        yield "\t".join(_copy_text(col[i]) for col in cols) + "\n"
+
+
+def _quote(ident: str) -> str:
+    return '"' + ident.replace('"', '""') + '"'
+
+
+def upsert_sql(columns: list[str], delete_keys: list[str] = ()) -> tuple[str, str, str]:
+    """(setup, COPY statement, merge) for loading rows into public.reels through a temp table."""
+    cols = ", ".join(_quote(c) for c in columns)
+    setup = "CREATE TEMP TABLE reels_load (LIKE public.reels INCLUDING DEFAULTS) ON COMMIT DROP;"
+    copy = f"COPY reels_load ({cols}) FROM STDIN;"
+    updates = ", ".join(f"{_quote(c)} = EXCLUDED.{_quote(c)}" for c in columns if c != KEY)
+    merge = (f"INSERT INTO public.reels ({cols}) SELECT {cols} FROM reels_load\n"
+             f"ON CONFLICT ({_quote(KEY)}) DO UPDATE SET {updates};")
+    if delete_keys:
+        ids = ", ".join("'" + k.replace("'", "''") + "'" for k in delete_keys)
+        merge += f"\nDELETE FROM public.reels WHERE {_quote(KEY)} IN ({ids});"
+    return setup, copy, merge
+
+
+def write_copy_script(table: ReelsTable, keys: list[str], out, delete_keys: list[str] = ()) -> None:
+    """A psql script: temp table, COPY ... FROM STDIN with the rows, one upsert."""
+    setup, copy, merge = upsert_sql(table.columns, delete_keys)
+    out.write("BEGIN;\n" + setup + "\n" + copy + "\n")
+    for line in copy_rows(table, keys):
+        out.write(line)
+    out.write("\\.\n" + merge + "\nCOMMIT;\n")
+
+
+def apply(table: ReelsTable, keys: list[str], database_url: str, delete_keys: list[str] = ()) -> None:
+    try:
+        import psycopg2
+    except ImportError:
+        sys.exit("❌ apply needs psycopg2 (pip install psycopg2-binary); or use `copy` and psql")
+    setup, copy, merge = upsert_sql(table.columns, delete_keys)
+    buf = io.StringIO()
+    buf.writelines(copy_rows(table, keys))
+    buf.seek(0)
+    with psycopg2.connect(database_url) as conn, conn.cursor() as cur:
+        cur.execute(setup)
+        cur.copy_expert(copy, buf)
+        cur.execute(merge)
+
+
+def _rows_to_load(args, table: ReelsTable) -> tuple[list[str], list[str]]:
+    if not args.against:
+        return list(table.index), []
+    base = load(args.against, table.columns)
+    d = diff(base, table)
+    print(f"📊 vs {args.against}: {len(d.added)} added, {len(d.changed)} changed, {len(d.removed)} only in {args.against}")
+    return d.to_load, (d.removed if args.delete_missing else [])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Parse, diff and bulk-load reels SQL dumps")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("stats", help="Parse a dump and summarize it")
+    p.add_argument("dump")
+
+    p = sub.add_parser("diff", help="Rows added/removed/changed from BASE to TARGET (dump path or `live`)")
+    p.add_argument("base")
+    p.add_argument("target")
+    p.add_argument("--show", type=int, default=10, help="Changed rows to print (default 10)")
+
+    for name, help_ in (("copy", "Write a psql COPY script loading the dump's rows"),
+                        ("apply", "Load the dump's rows through DATABASE_URL (psycopg2)")):
+        p = sub.add_parser(name, help=help_)
+        p.add_argument("dump")
+        p.add_argument("--against", help="Only load rows that differ from this dump or `live`")
+        p.add_argument("--delete-missing", action="store_true",
+                       help="Also delete rows that are in --against but not in the dump")
+        if name == "copy":
+            p.add_argument("--out", default="-", help="Output file (default stdout)")
+        else:
+            p.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+            p.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    started = time.time()
+    if args.cmd == "stats":
+        t = load(args.dump)
+        filled = {c: sum(v is not None for v in t.data[c]) for c in t.columns}
+        print(f"📦 {args.dump}: {len(t)} rows × {len(t.columns)} columns ({time.time() - started:.2f}s)")
+        for c in t.columns:
+            print(f"  {c:22s} {filled[c]:6d} non-null")
+        return
+
+    if args.cmd == "diff":
+        # Parse whichever side is a file first so `live` knows which columns to fetch
+        if args.base == "live":
+            target = load(args.target)
+            base = load(args.base, target.columns)
+        else:
+            base = load(args.base)
+            target = load(args.target, base.columns)
+        d = diff(base, target)
+        print(f"📊 {args.base} ({len(base)}) → {args.target} ({len(target)}) in {time.time() - started:.2f}s")
+        print(f"  ➕ added   : {len(d.added)}")
+        print(f"  ➖ removed : {len(d.removed)}")
+        print(f"  ✏️  changed : {len(d.changed)}")
+        if d.only_in_base or d.only_in_target:
+            print(f"  🧱 columns only in base: {d.only_in_base or '-'}; only in target: {d.only_in_target or '-'}")
+        by_col: dict[str, int] = {}
+        for cols in d.changed.values():
+            for c in cols:
+                by_col[c] = by_col.get(c, 0) + 1
+        for c, n in sorted(by_col.items(), key=lambda kv: -kv[1]):
+            print(f"     {c:22s} {n}")
+        for k in list(d.changed)[:args.show]:
+            b, t = base.row(k), target.row(k)
+            sc = t.get("shortcode") or k
+            changes = ", ".join(f"{c}: {str(b[c])[:30]!r} → {str(t[c])[:30]!r}" for c in d.changed[k][:4])
+            print(f"  {sc:14s} {changes}")
+        return
+
+    table = load(args.dump)
+    keys, delete_keys = _rows_to_load(args, table)
+
+    if args.cmd == "copy":
+        out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+        try:
+            write_copy_script(table, keys, out, delete_keys)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        print(f"✅ {len(keys)} rows, {len(delete_keys)} deletes → {args.out} ({time.time() - started:.2f}s)",
+              file=sys.stderr)
+        return
+
+    if args.dry_run or not keys and not delete_keys:
+        print(f"💡 Would load {len(keys)} rows and delete {len(delete_keys)}.")
+        return
+    if not args.database_url:
+        sys.exit("❌ DATABASE_URL not set (or pass --database-url)")
+    apply(table, keys, args.database_url, delete_keys)
+    print(f"✅ Loaded {len(keys)} rows, deleted {len(delete_keys)} in {time.time() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Local columnar snapshot of the reels table for offline analytics.
+
+`snapshot` pulls only rows whose updated_at (set by the update_reels_updated_at
+trigger on every write, so imports and dashboard edits count too) or
+created_at is newer than the last run, and merges them into a column store on
+disk; reels deleted since then are dropped after one `select id` pass.
+`query` answers totals per creator / handler / month from that store without
+touching Supabase.
+
+Layout (REELS_SNAPSHOT, default ./reels_snapshot/ in the project root):
+
+    meta.json              cursor, row count, id/shortcode lists, string dictionaries
+    <column>.i64 / .f64    counts and payout, one fixed-width value per row
+    <column>.i32           dictionary codes for ownerusername / created_by_email,
+                           and the takenat month as yyyymm (0 = unknown)
+
+Numeric files are raw native-endian arrays, so a query memory-maps just the
+columns it needs and scans them as typed memoryviews. Strings are dictionary
+encoded: ~3k reels from a few hundred creators and a dozen handlers cost
+4 bytes a row.
+
+Usage:
+    python3 scripts/reels_snapshot.py snapshot              # incremental (full on first run)
+    python3 scripts/reels_snapshot.py snapshot --full       # rebuild from scratch
+    python3 scripts/reels_snapshot.py query creator --top 20
+    python3 scripts/reels_snapshot.py query handler --metric likescount
+    python3 scripts/reels_snapshot.py query month --json
+    python3 scripts/reels_snapshot.py views --out /tmp/views_for_sheet.json   # {shortcode: plays}
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(os.path.dirname(HERE), "reels_snapshot")
+PAGE_SIZE = 1000
+
+INT_COLS = ("videoplaycount", "likescount", "commentscount", "videoviewcount")
+FLOAT_COLS = ("payout",)
+DICT_COLS = {"creator": "ownerusername", "handler": "created_by_email"}
+MONTH_COL = "takenat_month"
+METRICS = INT_COLS + FLOAT_COLS
+SELECT = ",".join(("id", "shortcode", "takenat", "updated_at", "created_at",
+                   *INT_COLS, *FLOAT_COLS, *DICT_COLS.values()))
+
+
+def snapshot_dir() -> str:
+    return os.environ.get("REELS_SNAPSHOT") or DEFAULT_DIR
+
+
+def _month(ts: Optional[str]) -> int:
+    if not ts:
+        return 0
+    try:
+        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    except ValueError:
+        return 0
+    dt = dt.astimezone(timezone.utc) if dt.tzinfo else dt
+    return dt.year * 100 + dt.month
+
+
+class Snapshot:
+    """Column arrays for every reel, loaded for merging or memory-mapped for queries."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or snapshot_dir()
+        self.meta = {"cursor": None, "rows": 0, "ids": [], "shortcodes": [],
+                     "dicts": {c: [] for c in DICT_COLS.values()}}
+        self._maps: list[mmap.mmap] = []
+
+    # -- on-disk format ------------------------------------------------------
+
+    @staticmethod
+    def _file(col: str) -> str:
+        if col in INT_COLS:
+            return f"{col}.i64"
+        if col in FLOAT_COLS:
+            return f"{col}.f64"
+        return f"{col}.i32"
+
+    @staticmethod
+    def _typecode(col: str) -> str:
+        return "q" if col in INT_COLS else "d" if col in FLOAT_COLS else "i"
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.path, "meta.json"))
+
+    def load_meta(self) -> "Snapshot":
+        with open(os.path.join(self.path, "meta.json")) as f:
+            self.meta = json.load(f)
+        return self
+
+    def column(self, col: str) -> memoryview:
+        """Read-only typed view over a column file (memory-mapped)."""
+        code = self._typecode(col)
+        if not self.meta["rows"]:
+            return memoryview(array(code))
+        with open(os.path.join(self.path, self._file(col)), "rb") as f:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(m)
+        return memoryview(m).cast(code)
+
+    def load_arrays(self) -> dict[str, array]:
+        """Every column as a mutable array (for merging new rows)."""
+        cols = {}
+        for col in (*METRICS, *DICT_COLS.values(), MONTH_COL):
+            a = array(self._typecode(col))
+            if self.meta["rows"]:
+                with open(os.path.join(self.path, self._file(col)), "rb") as f:
+                    a.frombytes(f.read())
+            cols[col] = a
+        return cols
+
+    def save(self, cols: dict[str, array]):
+        os.makedirs(self.path, exist_ok=True)
+        for col, a in cols.items():
+            dst = os.path.join(self.path, self._file(col))
+            with open(dst + ".tmp", "wb") as f:
+                a.tofile(f)
+            os.replace(dst + ".tmp", dst)
+        # meta.json last: a crash mid-save leaves the previous cursor, so the
+        # next run simply re-fetches the same rows
+        dst = os.path.join(self.path, "meta.json")
+        with open(dst + ".tmp", "w") as f:
+            json.dump(self.meta, f)
+        os.replace(dst + ".tmp", dst)
+
+    def close(self):
+        for m in self._maps:
+            try:
+                m.close()
+            except BufferError:  # a caller still holds a view
+                pass
+        self._maps.clear()
+
+    # -- merge ---------------------------------------------------------------
+
+    def merge(self, rows: list[dict], cols: dict[str, array]) -> tuple[int, int]:
+        """Upserts API rows into the arrays by id; returns (added, updated)."""
+        index = {rid: i for i, rid in enumerate(self.meta["ids"])}
+        codes = {c: {v: i for i, v in enumerate(self.meta["dicts"][c])} for c in DICT_COLS.values()}
+        added = updated = 0
+        for r in rows:
+            values = {c: int(r.get(c) or 0) for c in INT_COLS}
+            values.update({c: float(r.get(c) or 0) for c in FLOAT_COLS})
+            values[MONTH_COL] = _month(r.get("takenat"))
+            for c in DICT_COLS.values():
+                v = (r.get(c) or "").strip().lower()
+                if v not in codes[c]:
+                    codes[c][v] = len(self.meta["dicts"][c])
+                    self.meta["dicts"][c].append(v)
+                values[c] = codes[c][v]
+
+            i = index.get(r["id"])
+            if i is None:
+                index[r["id"]] = len(self.meta["ids"])
+                self.meta["ids"].append(r["id"])
+                self.meta["shortcodes"].append(r.get("shortcode"))
+                for c, v in values.items():
+                    cols[c].append(v)
+                added += 1
+            else:
+                self.meta["shortcodes"][i] = r.get("shortcode")
+                for c, v in values.items():
+                    cols[c][i] = v
+                updated += 1
+
+            for ts in (r.get("updated_at"), r.get("created_at")):
+                if ts and (self.meta["cursor"] is None or ts > self.meta["cursor"]):
+                    self.meta["cursor"] = ts
+        self.meta["rows"] = len(self.meta["ids"])
+        return added, updated
+
+    def prune(self, live_ids: set, cols: dict[str, array]) -> int:
+        """Drops rows whose id is no longer in the table; returns how many."""
+        keep = [i for i, rid in enumerate(self.meta["ids"]) if rid in live_ids]
+        removed = len(self.meta["ids"]) - len(keep)
+        if not removed:
+            return 0
+        self.meta["ids"] = [self.meta["ids"][i] for i in keep]
+        self.meta["shortcodes"] = [self.meta["shortcodes"][i] for i in keep]
+        for c, a in cols.items():
+            cols[c] = array(a.typecode, (a[i] for i in keep))
+        self.meta["rows"] = len(keep)
+        return removed
+
+
+def _client():
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    load_dotenv(os.path.join(os.path.dirname(HERE), ".env"))
+    return create_client(os.environ["VITE_SUPABASE_URL"], os.environ["VITE_SUPABASE_PUBLISHABLE_KEY"])
+
+
+def fetch_changed(sb, cursor: Optional[str]) -> list[dict]:
+    """reels rows changed since `cursor` (all rows when None), paged by id."""
+    rows, from_ = [], 0
+    while True:
+        q = sb.table("reels").select(SELECT)
+        if cursor:
+            q = q.or_(f"updated_at.gt.{cursor},created_at.gt.{cursor}")
+        page = q.order("id").range(from_, from_ + PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        from_ += PAGE_SIZE
+
+
+def fetch_live_ids(sb) -> set:
+    """Every id currently in the reels table (the cursor can't see deletions)."""
+    ids, from_ = set(), 0
+    while True:
+        page = sb.table("reels").select("id").order("id").range(from_, from_ + PAGE_SIZE - 1).execute().data or []
+        ids.update(r["id"] for r in page)
+        if len(page) < PAGE_SIZE:
+            return ids
+        from_ += PAGE_SIZE
+
+
+def take_snapshot(path: Optional[str] = None, full: bool = False) -> Snapshot:
+    snap = Snapshot(path)
+    if snap.exists() and not full:
+        snap.load_meta()
+    cols = snap.load_arrays()
+    started = time.time()
+    sb = _client()
+    incremental = snap.meta["cursor"] is not None
+    rows = fetch_changed(sb, snap.meta["cursor"])
+    # Read after the changed rows, so a reel added in between is never pruned
+    live_ids = fetch_live_ids(sb) if incremental else None
+    added, updated = snap.merge(rows, cols)
+    removed = snap.prune(live_ids, cols) if incremental else 0
+    snap.save(cols)
+    print(f"📸 {snap.path}: +{added} new, {updated} updated, -{removed} deleted → {snap.meta['rows']} reels "
+          f"(cursor {snap.meta['cursor']}, {time.time() - started:.1f}s)")
+    return snap
+
+
+def totals(snap: Snapshot, by: str, metric: str = "videoplaycount") -> dict:
+    """{group: (reels, sum of metric)} for by = creator | handler | month."""
+    values = snap.column(metric)
+    if by == "month":
+        keys = snap.column(MONTH_COL)
+        label = lambda k: f"{k // 100}-{k % 100:02d}" if k else "unknown"
+        size = None
+    else:
+        keys = snap.column(DICT_COLS[by])
+        names = snap.meta["dicts"][DICT_COLS[by]]
+        label = lambda k: names[k] or "unknown"
+        size = len(names)
+
+    if size is not None:
+        # Dense codes: accumulate into flat arrays indexed by code
+        counts, sums = [0] * size, [0] * size
+        for k, v in zip(keys, values):
+            counts[k] += 1
+            sums[k] += v
+        out = {label(k): (counts[k], sums[k]) for k in range(size) if counts[k]}
+    else:
+        acc: dict[int, list] = {}
+        for k, v in zip(keys, values):
+            a = acc.get(k)
+            if a is None:
+                acc[k] = [1, v]
+            else:
+                a[0] += 1
+                a[1] += v
+        out = {label(k): tuple(a) for k, a in acc.items()}
+    values.release()
+    keys.release()
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local columnar snapshot of the reels table")
+    ap.add_argument("--dir", default=None, help="Snapshot directory (default REELS_SNAPSHOT or ./reels_snapshot)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("snapshot", help="Fetch rows changed since the last run and merge them")
+    p.add_argument("--full", action="store_true", help="Ignore the cursor and rebuild")
+
+    p = sub.add_parser("query", help="Totals per creator, handler or month")
+    p.add_argument("by", choices=("creator", "handler", "month"))
+    p.add_argument("--metric", choices=METRICS, default="videoplaycount")
+    p.add_argument("--top", type=int, default=25)
+    p.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+
+    p = sub.add_parser("views", help="Write {shortcode: videoplaycount} from the snapshot")
+    p.add_argument("--out", default="-")
+    args = ap.parse_args()
+
+    if args.cmd == "snapshot":
+        take_snapshot(args.dir, args.full)
+        return
+
+    snap = Snapshot(args.dir)
+    if not snap.exists():
+        sys.exit(f"❌ No snapshot in {snap.path}. Run: python3 scripts/reels_snapshot.py snapshot")
+    snap.load_meta()
+    started = time.perf_counter()
+
+    if args.cmd == "views":
+        plays = snap.column("videoplaycount")
+        views = {sc: plays[i] for i, sc in enumerate(snap.meta["shortcodes"]) if sc}
+        plays.release()
+        if args.out == "-":
+            json.dump(views, sys.stdout)
+        else:
+            with open(args.out, "w") as f:
+                json.dump(views, f)
+            print(f"✅ {len(views)} view counts → {args.out}")
+        snap.close()
+        return
+
+    result = totals(snap, args.by, args.metric)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    order = sorted(result.items(), key=lambda kv: kv[0]) if args.by == "month" \
+        else sorted(result.items(), key=lambda kv: -kv[1][1])[:args.top]
+    if args.json:
+        json.dump({k: {"reels": n, args.metric: s} for k, (n, s) in order}, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"📊 {args.metric} by {args.by} — {snap.meta['rows']} reels, snapshot {snap.meta['cursor']} "
+              f"({elapsed_ms:.1f} ms)")
+        for k, (n, s) in order:
+            print(f"  {k:32s} {n:6d} reels  {s:>16,.0f}")
+    snap.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Completion events for refresh runs, so downstream steps start the moment a
+run ends instead of polling pgrep, and reuse its views instead of
+re-downloading the reels table.
+
+A run holds an exclusive flock on <dir>/<name>.lock for its whole lifetime.
+While it works it keeps a shortcode → videoplaycount map (seeded from the rows
+it fetched, updated as each reel is refreshed) and writes it to
+<name>.views.json every few hundred updates. On exit it writes <name>.done.json
+and only then releases the lock. A waiter blocks on the same flock, so the
+kernel wakes it as soon as the run exits, crash included (the fd closes).
+
+    from run_events import RunPublisher, wait_for_run
+
+    with RunPublisher("bulk_refresh_uncached") as run:    # in the refresh script
+        run.seed(reels)
+        run.set_view(shortcode, plays)
+
+    done = wait_for_run("bulk_refresh_uncached", since=time.time(), start_timeout=300)
+    views = load_views(done)                              # None if the run published none
+
+Pass `since` when the waiter may start before the run takes the lock: the
+marker left by an earlier run is then ignored, and the waiter keeps polling
+for up to `start_timeout` seconds for a run that finishes after `since`.
+
+Files live in REEL_RUN_DIR (default /tmp/reel_runs).
+"""
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+DEFAULT_DIR = "/tmp/reel_runs"
+
+
+def run_dir() -> str:
+    return os.environ.get("REEL_RUN_DIR") or DEFAULT_DIR
+
+
+def _paths(name: str, directory: Optional[str] = None) -> tuple[str, str, str]:
+    d = directory or run_dir()
+    os.makedirs(d, exist_ok=True)
+    base = os.path.join(d, name)
+    return f"{base}.lock", f"{base}.views.json", f"{base}.done.json"
+
+
+def _write_json(path: str, data) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+class RunPublisher:
+    """Marks a refresh run as in progress and publishes its views map and completion."""
+
+    def __init__(self, name: str, flush_every: int = 200, directory: Optional[str] = None):
+        self.name = name
+        self.flush_every = flush_every
+        self.lock_path, self.views_path, self.done_path = _paths(name, directory)
+        self.views: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self._fd: Optional[int] = None
+        self.started_at: Optional[float] = None
+
+    def __enter__(self) -> "RunPublisher":
+        self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self._fd)
+            self._fd = None
+            raise RuntimeError(f"another {self.name} run is in progress ({self.lock_path})")
+        os.ftruncate(self._fd, 0)
+        os.write(self._fd, f"{os.getpid()}\n".encode())
+        self.started_at = time.time()
+        # A stale marker from the previous run must not satisfy waiters
+        try:
+            os.remove(self.done_path)
+        except FileNotFoundError:
+            pass
+        return self
+
+    def seed(self, reels: list[dict]) -> None:
+        """Starts the map from the rows the run fetched (current counts)."""
+        with self._lock:
+            for r in reels:
+                if r.get("shortcode"):
+                    self.views[r["shortcode"]] = int(r.get("videoplaycount") or 0)
+
+    def set_view(self, shortcode: str, plays: int) -> None:
+        with self._lock:
+            self.views[shortcode] = int(plays)
+            self._dirty += 1
+            flush = self._dirty >= self.flush_every
+        if flush:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            snapshot = dict(self.views)
+            self._dirty = 0
+        _write_json(self.views_path, snapshot)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.flush()
+            _write_json(self.done_path, {
+                "name": self.name,
+                "pid": os.getpid(),
+                "ok": exc_type is None,
+                "error": repr(exc) if exc is not None else None,
+                "started_at": self.started_at,
+                "finished_at": time.time(),
+                "reels": len(self.views),
+                "views_path": self.views_path,
+            })
+        finally:
+            # Releasing the lock is the event: blocked waiters wake up now
+            os.close(self._fd)
+            self._fd = None
+        return False
+
+
+def _read_done(lock_path: str, done_path: str) -> Optional[dict]:
+    """Blocks until no run holds the lock, then reads the completion marker."""
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        try:
+            with open(done_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    finally:
+        os.close(fd)
+
+
+def wait_for_run(name: str, directory: Optional[str] = None, since: Optional[float] = None,
+                 start_timeout: float = 0.0, poll: float = 2.0) -> Optional[dict]:
+    """
+    Blocks until no `name` run holds the lock (returns at once if none is
+    running) and returns its completion marker, or None if the last run
+    didn't leave one (crashed before writing it, or never ran).
+
+    With `since` (unix seconds, usually the caller's own start time), only a
+    marker whose run finished at or after `since` counts. Until one shows up
+    the lock is polled for up to `start_timeout` seconds, so a run that hasn't
+    taken the lock yet is still waited for; after that, None.
+    """
+    lock_path, _, done_path = _paths(name, directory)
+    deadline = time.time() + start_timeout
+    while True:
+        done = _read_done(lock_path, done_path)
+        if since is None or (done and (done.get("finished_at") or 0) >= since):
+            return done
+        if time.time() >= deadline:
+            return None
+        time.sleep(poll)
+
+
+def load_views(done: Optional[dict]) -> Optional[dict[str, int]]:
+    """The views map a finished run published, or None."""
+    if not done or not done.get("ok"):
+        return None
+    try:
+        with open(done["views_path"]) as f:
+            return json.load(f)
+    except (OSError, ValueError, KeyError):
+        return None
@@ -2,7 +2,8 @@
 import sys, json, requests, time
 from datetime import datetime, timezone
 sys.path.insert(0, '/home/ubuntu/instagram_view_counter_api')
-from scraper_instagrapi import fetch_engagement
+from ig_sessions import fetch_engagement  # warm per-account client, falls back to scraper_instagrapi
+from shortcodes import canonical_url
 from supabase import create_client
 
 sb = create_client(
@@ -35,7 +36,7 @@ updates = []
 ok = fail = 0
 for i, reel in enumerate(july_reels):
     sc = reel['shortcode']
-    url = reel.get('permalink') or reel.get('url') or f'https://www.instagram.com/reel/{sc}/'
+    url = canonical_url(sc)
     cf = COOKIES[i % len(COOKIES)]
     acct = cf.replace('cookies_', '').replace('.txt', '')
     result = fetch_engagement(url, cf, acct)
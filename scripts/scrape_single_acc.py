@@ -3,7 +3,8 @@
 import sys, json, requests, time
 from datetime import datetime, timezone
 sys.path.insert(0, '/home/ubuntu/instagram_view_counter_api')
-from scraper_instagrapi import fetch_engagement
+from ig_sessions import fetch_engagement  # warm per-account client, falls back to scraper_instagrapi
+from shortcodes import canonical_url
 from supabase import create_client
 
 sb = create_client(
@@ -31,7 +32,7 @@ db_map = {x['shortcode']: x for x in all_db if x.get('shortcode')}
 updates = []
 ok = fail = 0
 for i, sc in enumerate(scs):
-    url = f'https://www.instagram.com/reel/{sc}/'
+    url = canonical_url(sc)
     result = fetch_engagement(url, COOKIE, ACCT)
     if result:
         eng = result.get('engagement', {}); play = eng.get('play_count') or 0
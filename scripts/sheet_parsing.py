@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Shared parsing helpers for the payment-tracking Google Sheet.
+
+Used by sync_sheet_to_supabase.py and sync_sheet_via_server.py so both sync
+paths read the sheet the same way. All regexes are compiled once at import,
+handler/date normalization is memoized (the same dozen handlers and a few
+dozen date strings repeat across thousands of rows), and `parse_worksheet`
+parses a whole worksheet column by column instead of row by row.
+
+Sheet columns (0-indexed):
+  A=0 username, E=4 payment, H=7 date, J=9 confirmation,
+  K=10 handler, L=11 poc, N=13 details, O=14 reel url
+
+The views column written back by sync_sheet_via_server.py --export-views has
+no fixed position; `find_views_column` locates it from the header row.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+from shortcodes import SHORTCODE_RE, canonical_url
+
+COL_USERNAME  = 0
+COL_PAYMENT   = 4
+COL_DATE      = 7
+COL_CONFIRMED = 9
+COL_HANDLER   = 10
+COL_POC       = 11
+COL_DETAILS   = 13
+COL_REEL_URL  = 14
+
+# Columns the syncs read; the views export must never write into one of these
+INPUT_COLUMNS = frozenset({
+    COL_USERNAME, COL_PAYMENT, COL_DATE, COL_CONFIRMED, COL_HANDLER,
+    COL_POC, COL_DETAILS, COL_REEL_URL,
+})
+
+# Normalize team-member name variants → canonical lowercase email local-part
+HANDLER_NORMALIZE = {
+    "gurimar":     "gurnimar",      # typo seen in sheet
+    "gurnimar":    "gurnimar",
+    "gurnimarjit": "gurnimar",
+    "muskan":      "muskan",
+    "yash":        "yash",
+    "yashmadaan":  "yashmadaan",
+    "rajoshree":   "rajoshree",
+    "chirag":      "chirag",
+    "mansoor":     "mansoor",
+    "laksh":       "laksh",
+    "eyaz":        "eyaz",
+    "venkat":      "venkat",
+    "samarth":     "samarth",
+    "akshay":      "akshay",
+}
+
+# Match "1 April", "1st April", "1st april", "12th arpil" (typo), etc.
+DAY_RE = re.compile(r"(\d{1,2})")
+MONTH_NAMES = {
+    "january": 1, "jan": 1,
+    "february": 2, "feb": 2,
+    "march": 3, "mar": 3,
+    "april": 4, "apr": 4, "arpil": 4,  # arpil typo seen in sheet
+    "may": 5,
+    "june": 6, "jun": 6,
+    "july": 7, "jul": 7,
+    "august": 8, "aug": 8,
+    "september": 9, "sep": 9, "sept": 9,
+    "october": 10, "oct": 10,
+    "november": 11, "nov": 11,
+    "december": 12, "dec": 12,
+}
+# Longest names first so "sept" wins over "sep" and "june" over "jun"
+MONTH_RE = re.compile(
+    "|".join(sorted(MONTH_NAMES, key=len, reverse=True))
+)
+
+# Map sheet tab name → month number for date fallback
+SHEET_MONTH = {
+    "January": 1, "February": 2, "March": 3, "April": 4,
+    "May": 5, "June": 6, "July": 7, "August": 8,
+    "September": 9, "October": 10, "November": 11, "December": 12,
+}
+
+AMOUNT_RE    = re.compile(r"\d+")
+THOUSANDS_RE = re.compile(r"(?<=\d),(?=\d{3}\b)")
+ALPHA_RE     = re.compile(r"[^\W\d_]")
+
+
+@lru_cache(maxsize=256)
+def handler_to_email(handler: str) -> Optional[str]:
+    if not handler:
+        return None
+    key = handler.strip().lower().replace(" ", "").replace(".", "")
+    canon = HANDLER_NORMALIZE.get(key, key)
+    if not canon.replace("_", "").isalnum():
+        return None
+    return f"{canon}@buyhatke.com"
+
+
+def parse_reel_url(raw: str) -> tuple[Optional[str], Optional[str]]:
+    """Returns (clean_url, shortcode) or (None, None) if not a valid reel link."""
+    if not raw or "instagram.com" not in raw:
+        return None, None
+    m = SHORTCODE_RE.search(raw.strip())
+    if not m:
+        return None, None
+    sc = m.group(1)
+    return canonical_url(sc), sc
+
+
+@lru_cache(maxsize=4096)
+def _parse_day_month(s: str) -> tuple[Optional[int], Optional[int]]:
+    day_m = DAY_RE.search(s)
+    if not day_m:
+        return None, None
+    month_m = MONTH_RE.search(s)
+    return int(day_m.group(1)), (MONTH_NAMES[month_m.group(0)] if month_m else None)
+
+
+def parse_sheet_date(
+    raw: str,
+    fallback_month: Optional[int] = None,
+    default_year: Optional[int] = None,
+) -> Optional[datetime]:
+    """Parse a free-text sheet date like "12th April".
+
+    `fallback_month` (usually the worksheet's tab month) is used when the cell
+    has a day but no recognizable month name.
+    """
+    if not raw:
+        return None
+    day, month = _parse_day_month(raw.strip().lower())
+    if day is None:
+        return None
+    month = month or fallback_month
+    if not month:
+        return None
+    year = default_year or datetime.utcnow().year
+    try:
+        return datetime(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_amount(raw: str) -> int:
+    """Parse a payment cell into rupees.
+
+    "1500+2000 Bonus" and "2000 (Bonus on 1M)" style cells sum every number;
+    "₹2,000" is 2000; anything mentioning "no payment" is 0.
+    """
+    if not raw:
+        return 0
+    raw_str = THOUSANDS_RE.sub("", str(raw).strip())
+    if "no payment" in raw_str.lower():
+        return 0
+    nums = AMOUNT_RE.findall(raw_str)
+    if not nums:
+        return 0
+    if "+" in raw_str or (len(nums) > 1 and ALPHA_RE.search(raw_str)):
+        return sum(int(n) for n in nums)
+    return int(nums[0])
+
+
+@dataclass
+class ParsedSheet:
+    """Column-wise parse of one worksheet. Every list has one entry per data row."""
+    name: str
+    row_num:   list[int]                = field(default_factory=list)
+    username:  list[str]                = field(default_factory=list)
+    payment:   list[int]                = field(default_factory=list)
+    date:      list[Optional[datetime]] = field(default_factory=list)
+    confirmed: list[bool]               = field(default_factory=list)
+    handler:   list[str]                = field(default_factory=list)
+    email:     list[Optional[str]]      = field(default_factory=list)
+    poc:       list[str]                = field(default_factory=list)
+    details:   list[str]                = field(default_factory=list)
+    url:       list[Optional[str]]      = field(default_factory=list)
+    shortcode: list[Optional[str]]      = field(default_factory=list)
+    is_bonus:  list[bool]               = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.row_num)
+
+
+def find_views_column(header: list[str]) -> Optional[int]:
+    """0-based index of the first header cell mentioning "views", or None."""
+    for i, cell in enumerate(header):
+        if i not in INPUT_COLUMNS and "views" in (cell or "").lower():
+            return i
+    return None
+
+
+def _column(rows: list[list[str]], idx: int) -> list[str]:
+    return [(r[idx] if len(r) > idx else "").strip() for r in rows]
+
+
+def parse_worksheet(
+    name: str,
+    rows: list[list[str]],
+    fallback_month: Optional[int] = None,
+    default_year: Optional[int] = None,
+) -> ParsedSheet:
+    """Parse `ws.get_all_values()` output (header row included) column by column.
+
+    Blank rows are dropped; `row_num` keeps the 1-based sheet row of each entry.
+    """
+    if fallback_month is None:
+        fallback_month = SHEET_MONTH.get(name)
+
+    body = []
+    row_num = []
+    for i, r in enumerate(rows[1:], start=2):  # skip header row
+        if any(r):
+            body.append(r)
+            row_num.append(i)
+
+    urls = [parse_reel_url(v) for v in _column(body, COL_REEL_URL)]
+    handlers = _column(body, COL_HANDLER)
+    details = _column(body, COL_DETAILS)
+
+    return ParsedSheet(
+        name=name,
+        row_num=row_num,
+        username=_column(body, COL_USERNAME),
+        payment=[parse_amount(v) for v in _column(body, COL_PAYMENT)],
+        date=[parse_sheet_date(v, fallback_month, default_year) for v in _column(body, COL_DATE)],
+        confirmed=["done" in v.lower() for v in _column(body, COL_CONFIRMED)],
+        handler=handlers,
+        email=[handler_to_email(v) for v in handlers],
+        poc=_column(body, COL_POC),
+        details=details,
+        url=[u for u, _ in urls],
+        shortcode=[sc for _, sc in urls],
+        is_bonus=["bonus" in v.lower() for v in details],
+    )
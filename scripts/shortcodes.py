@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Canonical reel keys: every reel is identified by its shortcode, and every URL
+we send anywhere (VM cache, live scrape, Supabase) is rebuilt from it.
+
+The same reel shows up as /reel/, /reels/, /p/ and /<user>/reel/ links, with
+or without www., query strings (?igsh=...) and trailing slashes. Looking reels
+up by raw URL made the VM cache miss on a different form of a URL it already
+had. Mirrors server/shortcode.js; keep the two in sync.
+
+    from shortcodes import extract_shortcode, canonical_url, reel_shortcode, reel_url
+
+    extract_shortcode("instagram.com/p/ABC123/?igsh=x")   # "ABC123"
+    canonical_url("ABC123")                               # "https://www.instagram.com/reel/ABC123/"
+    reel_url(row)       # canonical URL for a reels row (shortcode, else permalink/url/inputurl)
+"""
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+SHORTCODE_RE = re.compile(
+    r"instagram\.com/(?:[^/]+/)?(?:reels?|p)/([A-Za-z0-9_-]+)"
+)
+
+URL_FIELDS = ("permalink", "url", "inputurl")
+
+
+def extract_shortcode(url: Optional[str]) -> Optional[str]:
+    """Shortcode in an Instagram post/reel URL, or None."""
+    if not url:
+        return None
+    m = SHORTCODE_RE.search(url)
+    return m.group(1) if m else None
+
+
+def canonical_url(shortcode: str) -> str:
+    return f"https://www.instagram.com/reel/{shortcode}/"
+
+
+def reel_shortcode(reel: dict) -> Optional[str]:
+    """The reels row's shortcode column, else the one in its first parseable URL."""
+    sc = (reel.get("shortcode") or "").strip()
+    if sc:
+        return sc
+    for field in URL_FIELDS:
+        sc = extract_shortcode(reel.get(field))
+        if sc:
+            return sc
+    return None
+
+
+def reel_url(reel: dict) -> Optional[str]:
+    """Canonical URL for a reels row; a raw URL only if no shortcode can be found."""
+    sc = reel_shortcode(reel)
+    if sc:
+        return canonical_url(sc)
+    for field in URL_FIELDS:
+        v = (reel.get(field) or "").strip()
+        if v:
+            return v
+    return None
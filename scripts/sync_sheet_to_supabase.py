@@ -34,15 +34,14 @@ from __future__ import annotations
 
 import argparse
 import os
-import re
 import sys
-from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Optional
 
 import gspread
 from dotenv import load_dotenv
 
+from sheet_parsing import parse_worksheet
+
 # load .env from project root (parent of scripts/)
 HERE = os.path.dirname(os.path.abspath(__file__))
 load_dotenv(os.path.join(os.path.dirname(HERE), ".env"))
@@ -60,91 +59,6 @@ SUPABASE_KEY = (
     or os.environ.get("SUPABASE_KEY")
 )
 
-# Normalize team-member name variants → canonical lowercase email local-part
-HANDLER_NORMALIZE = {
-    "gurimar": "gurnimar",          # typo seen in sheet
-    "muskan": "muskan",
-    "yash": "yash",
-    "rajoshree": "rajoshree",
-    "chirag": "chirag",
-    "mansoor": "mansoor",
-    "laksh": "laksh",
-}
-
-
-def handler_to_email(handler: str) -> Optional[str]:
-    if not handler:
-        return None
-    key = handler.strip().lower().replace(" ", "")
-    canon = HANDLER_NORMALIZE.get(key, key)
-    if not canon.replace("_", "").isalnum():
-        return None
-    return f"{canon}@buyhatke.com"
-
-
-SHORTCODE_RE = re.compile(
-    r"instagram\.com/(?:[^/]+/)?(?:reels?|p)/([A-Za-z0-9_-]+)"
-)
-
-
-def parse_reel_url(raw: str) -> tuple[Optional[str], Optional[str]]:
-    """Returns (clean_url, shortcode) or (None, None) if not a valid reel link."""
-    if not raw or "instagram.com" not in raw:
-        return None, None
-    m = SHORTCODE_RE.search(raw.strip())
-    if not m:
-        return None, None
-    sc = m.group(1)
-    return f"https://www.instagram.com/reel/{sc}/", sc
-
-
-# Match "1 April", "1st April", "1st april", "12th arpil" (typo), etc.
-DAY_RE = re.compile(r"(\d{1,2})")
-MONTH_NAMES = {
-    "january": 1, "jan": 1,
-    "february": 2, "feb": 2,
-    "march": 3, "mar": 3,
-    "april": 4, "apr": 4, "arpil": 4,  # arpil typo seen in sheet
-    "may": 5,
-    "june": 6, "jun": 6,
-    "july": 7, "jul": 7,
-    "august": 8, "aug": 8,
-    "september": 9, "sep": 9, "sept": 9,
-    "october": 10, "oct": 10,
-    "november": 11, "nov": 11,
-    "december": 12, "dec": 12,
-}
-
-
-def parse_sheet_date(raw: str, default_year: int = None) -> Optional[datetime]:
-    if not raw:
-        return None
-    s = raw.strip().lower()
-    day_m = DAY_RE.search(s)
-    if not day_m:
-        return None
-    day = int(day_m.group(1))
-    month = None
-    for name, num in MONTH_NAMES.items():
-        if name in s:
-            month = num
-            break
-    if not month:
-        return None
-    year = default_year or datetime.utcnow().year
-    try:
-        return datetime(year, month, day)
-    except ValueError:
-        return None
-
-
-def parse_amount(raw: str) -> int:
-    if not raw:
-        return 0
-    digits = "".join(c for c in str(raw) if c.isdigit())
-    return int(digits) if digits else 0
-
-
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--apply", action="store_true", help="Actually write to Supabase. Default: dry-run.")
@@ -157,38 +71,35 @@ def main():
     gc = gspread.service_account(filename=SERVICE_ACCOUNT_JSON)
     sh = gc.open_by_url(SHEET_URL)
 
-    all_rows = []  # (worksheet, row_num, row_data, date_obj)
+    sheets = []
     for ws_name in ("April", "May", "June"):
         try:
             ws = sh.worksheet(ws_name)
         except gspread.WorksheetNotFound:
             continue
-        rows = ws.get_all_values()
-        for i, r in enumerate(rows[1:], start=2):  # skip header row
-            if not any(r):
-                continue
-            date_str = r[7] if len(r) > 7 else ""
-            dt = parse_sheet_date(date_str)
-            if not dt or dt < cutoff:
-                continue
-            all_rows.append((ws_name, i, r, dt))
-    print(f"🗂  {len(all_rows)} rows in window across April + May sheets\n")
+        sheets.append(parse_worksheet(ws_name, ws.get_all_values()))
+    in_window = [
+        (p, j) for p in sheets for j in range(len(p))
+        if p.date[j] and p.date[j] >= cutoff
+    ]
+    print(f"🗂  {len(in_window)} rows in window across {', '.join(p.name for p in sheets)} sheets\n")
 
     new_reels = []      # rows that create/update a reel record
     bonus_payments = [] # rows that bump an existing reel's payout
     skipped = []        # rows skipped (non-reel / no handler / etc.)
 
-    for ws_name, row_num, r, dt in all_rows:
-        username = (r[0] if len(r) > 0 else "").strip()
-        payment = parse_amount(r[4] if len(r) > 4 else "")
-        handler = (r[10] if len(r) > 10 else "").strip()
-        poc = (r[11] if len(r) > 11 else "").strip()
-        details = (r[13] if len(r) > 13 else "").strip()
-        reel_raw = (r[14] if len(r) > 14 else "").strip()
-        url, shortcode = parse_reel_url(reel_raw)
-        email = handler_to_email(handler)
-        is_bonus = "bonus" in details.lower()
-        is_payment_done = "done" in (r[9] if len(r) > 9 else "").strip().lower()
+    for p, j in in_window:
+        ws_name, row_num = p.name, p.row_num[j]
+        username = p.username[j]
+        payment = p.payment[j]
+        handler = p.handler[j]
+        poc = p.poc[j]
+        details = p.details[j]
+        url, shortcode = p.url[j], p.shortcode[j]
+        email = p.email[j]
+        is_bonus = p.is_bonus[j]
+        is_payment_done = p.confirmed[j]
+        dt = p.date[j]
 
         if not is_payment_done:
             skipped.append((ws_name, row_num, "Payment confirmation NOT done"))
@@ -14,20 +14,28 @@ Usage:
     python3 scripts/sync_sheet_via_server.py --apply   # write for real
     python3 scripts/sync_sheet_via_server.py --days 90 # wider window (default 90)
     python3 scripts/sync_sheet_via_server.py --sheet June  # single sheet only
+
+    # Write view counts into each tab's "Views" column (dry-run without --apply)
+    python3 scripts/sync_sheet_via_server.py --export-views /tmp/views_for_sheet.json --apply
+    python3 scripts/sync_sheet_via_server.py --export-views --views-col Q   # tabs without a header
 """
 from __future__ import annotations
 
 import argparse
+import json
 import os
 import re
 import sys
 from datetime import datetime, timedelta
-from typing import Optional
 
 import gspread
 import requests
 from dotenv import load_dotenv
 
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+
+from sheet_parsing import INPUT_COLUMNS, find_views_column, parse_worksheet
+
 HERE = os.path.dirname(os.path.abspath(__file__))
 load_dotenv(os.path.join(os.path.dirname(HERE), ".env"))
 
@@ -38,118 +46,155 @@ SERVICE_ACCOUNT_JSON = os.environ.get(
 SHEET_URL = "https://docs.google.com/spreadsheets/d/1dbXp9qvp2ul1CJiwu7-CrmQ4PQ6oFzcgqqKNKoYMfZM/edit"
 API_SERVER = "https://instagram-pr-api.onrender.com"
 IMPORT_TOKEN = os.environ.get("IMPORT_REELS_TOKEN", "")  # optional auth header
+NDJSON = "application/x-ndjson"
+DEFAULT_SHEETS = ["April", "May", "June", "july"]
+DEFAULT_VIEWS_JSON = "/tmp/views_for_sheet.json"  # written by wait_and_update_july.py
+
+
+def iter_ndjson(resp):
+    """Yields each JSON line of a streamed NDJSON response as it arrives."""
+    for line in resp.iter_lines():
+        if line:
+            yield json.loads(line)
+
+
+def import_chunk(chunk: list[dict], headers: dict) -> dict:
+    """
+    POSTs one chunk to /api/import-reels and reads the per-reel NDJSON results
+    as they stream in. Results already received are kept if the connection
+    drops; reels without a result are re-sent once.
+    """
+    counts = {"inserted": 0, "updated": 0, "error": 0}
+    pending = {r["shortcode"]: r for r in chunk}
+    for attempt in (1, 2):
+        try:
+            with requests.post(
+                f"{API_SERVER}/api/import-reels",
+                json={"reels": list(pending.values())},
+                headers={**headers, "Accept": NDJSON},
+                stream=True,
+                timeout=(15, 120),  # 120s max gap between lines, not for the whole batch
+            ) as resp:
+                if not resp.ok:
+                    print(f"  ❌ HTTP {resp.status_code}: {resp.text[:300]}")
+                    break
+                if NDJSON not in resp.headers.get("Content-Type", ""):
+                    # Server without streaming support: one JSON summary
+                    data = resp.json()
+                    for e in (data.get("errorDetails") or [])[:3]:
+                        print(f"     ⚠️  {e}")
+                    return {"inserted": data.get("inserted", 0), "updated": data.get("updated", 0),
+                            "error": data.get("errors", 0)}
+                for msg in iter_ndjson(resp):
+                    if msg.get("type") != "result":
+                        continue
+                    pending.pop(msg.get("shortcode"), None)
+                    status = msg.get("status")
+                    counts[status if status in counts else "error"] += 1
+                    if msg.get("error"):
+                        print(f"     ⚠️  {msg.get('shortcode')}: {msg['error']}")
+        except (requests.RequestException, ValueError) as e:
+            print(f"  ⚠️  Stream interrupted after {len(chunk) - len(pending)}/{len(chunk)} results: {e}")
+        if not pending:
+            break
+        if attempt == 1:
+            print(f"  🔁 Re-sending {len(pending)} reels without a result...")
+    counts["error"] += len(pending)
+    return counts
+
+
+def _cell_int(v: str):
+    digits = re.sub(r"[^\d]", "", v or "")
+    return int(digits) if digits else None
+
+
+def export_views(sh, sheet_names: list[str], views: dict[str, int], apply: bool,
+                 views_col: int | None = None):
+    """
+    Writes view counts into the views column of every row whose column-O
+    shortcode is in `views`. All worksheets are read with one batchGet, and
+    only cells whose value differs are written with one batchUpdate.
+
+    The views column is `views_col` (0-based) when given, otherwise the
+    header cell mentioning "views" in each tab. Nothing is written if any
+    tab has no such column.
+    """
+    titles = {ws.title for ws in sh.worksheets()}
+    names = [n for n in sheet_names if n in titles]
+    for n in sheet_names:
+        if n not in titles:
+            print(f"⚠️  Sheet '{n}' not found — skipping")
+    if not names:
+        return
 
-# Normalize handler name variants → canonical email local-part
-HANDLER_NORMALIZE = {
-    "gurimar":    "gurnimar",
-    "gurnimar":   "gurnimar",
-    "gurnimarjit":"gurnimar",
-    "muskan":     "muskan",
-    "yash":       "yash",
-    "yashmadaan": "yashmadaan",
-    "rajoshree":  "rajoshree",
-    "chirag":     "chirag",
-    "mansoor":    "mansoor",
-    "laksh":      "laksh",
-    "eyaz":       "eyaz",
-    "venkat":     "venkat",
-    "samarth":    "samarth",
-    "akshay":     "akshay",
-}
-
-def handler_to_email(handler: str) -> Optional[str]:
-    if not handler:
-        return None
-    key = handler.strip().lower().replace(" ", "").replace(".", "")
-    canon = HANDLER_NORMALIZE.get(key, key)
-    if not canon.replace("_", "").isalnum():
-        return None
-    return f"{canon}@buyhatke.com"
-
-SHORTCODE_RE = re.compile(
-    r"instagram\.com/(?:[^/]+/)?(?:reels?|p)/([A-Za-z0-9_-]+)"
-)
+    got = sh.values_batch_get([f"'{n}'" for n in names])
+    tabs = []
+    for name, vr in zip(names, got.get("valueRanges", [])):
+        rows = vr.get("values", [])
+        col = views_col if views_col is not None else find_views_column(rows[0] if rows else [])
+        if col is None:
+            sys.exit(f"❌ Sheet '{name}' has no header cell containing \"views\". "
+                     f"Add one, or pass --views-col.")
+        tabs.append((name, rows, col))
+
+    data = []
+    matched = 0
+    for name, rows, col in tabs:
+        p = parse_worksheet(name, rows)
+        for j in range(len(p)):
+            plays = views.get(p.shortcode[j])
+            if plays is None:
+                continue
+            matched += 1
+            row = rows[p.row_num[j] - 1]
+            current = row[col] if len(row) > col else ""
+            if _cell_int(current) != plays:
+                data.append({"range": f"'{name}'!{rowcol_to_a1(p.row_num[j], col + 1)}",
+                             "values": [[plays]]})
+
+    print(f"📈 {matched} sheet rows have a view count; {len(data)} cells changed")
+    for d in data[:5]:
+        print(f"  {d['range']:16s} → {d['values'][0][0]:,}")
+    if not data:
+        return
+    if not apply:
+        print("\n💡 Dry-run. Re-run with --apply to write the sheet.")
+        return
+    sh.values_batch_update({"valueInputOption": "RAW", "data": data})
+    print(f"✅ Wrote {len(data)} cells in one batchUpdate")
 
-def parse_reel_url(raw: str):
-    if not raw or "instagram.com" not in raw:
-        return None, None
-    m = SHORTCODE_RE.search(raw.strip())
-    if not m:
-        return None, None
-    sc = m.group(1)
-    return f"https://www.instagram.com/reel/{sc}/", sc
-
-DAY_RE = re.compile(r"(\d{1,2})")
-MONTH_NAMES = {
-    "january": 1, "jan": 1,
-    "february": 2, "feb": 2,
-    "march": 3, "mar": 3,
-    "april": 4, "apr": 4, "arpil": 4,
-    "may": 5,
-    "june": 6, "jun": 6,
-    "july": 7, "jul": 7,
-    "august": 8, "aug": 8,
-    "september": 9, "sep": 9, "sept": 9,
-    "october": 10, "oct": 10,
-    "november": 11, "nov": 11,
-    "december": 12, "dec": 12,
-}
-
-def parse_sheet_date(raw: str, fallback_month: int = None, default_year: int = None):
-    if not raw:
-        return None
-    s = raw.strip().lower()
-    day_m = DAY_RE.search(s)
-    if not day_m:
-        return None
-    day = int(day_m.group(1))
-    month = None
-    for name, num in MONTH_NAMES.items():
-        if name in s:
-            month = num
-            break
-    if not month:
-        month = fallback_month  # use sheet tab month as fallback
-    if not month:
-        return None
-    year = default_year or datetime.utcnow().year
-    try:
-        return datetime(year, month, day)
-    except ValueError:
-        return None
-
-def parse_amount(raw: str) -> int:
-    if not raw:
-        return 0
-    raw_str = str(raw).strip()
-    if 'no payment' in raw_str.lower():
-        return 0
-    import re as _re
-    nums = _re.findall(r'\d+', raw_str)
-    if not nums:
-        return 0
-    # If '+' or text mixed with numbers (e.g. "1500+2000 Bonus", "2000 (Bonus on 1M)"),
-    # sum ALL numbers to get the correct total.
-    if '+' in raw_str or (len(nums) > 1 and any(c.isalpha() for c in raw_str)):
-        return sum(int(n) for n in nums)
-    return int(nums[0])
-
-# Map sheet tab name → month number for date fallback
-SHEET_MONTH = {
-    "January": 1, "February": 2, "March": 3, "April": 4,
-    "May": 5, "June": 6, "July": 7, "August": 8,
-    "September": 9, "October": 10, "November": 11, "December": 12,
-}
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--apply", action="store_true", help="POST to server. Default: dry-run.")
     ap.add_argument("--days", type=int, default=90, help="Window of days back (default 90)")
     ap.add_argument("--sheet", type=str, default=None, help="Process only this sheet tab (e.g. June)")
+    ap.add_argument("--export-views", nargs="?", const=DEFAULT_VIEWS_JSON, default=None, metavar="JSON",
+                    help=f"Write {{shortcode: views}} from JSON into the sheet instead of syncing "
+                         f"(default {DEFAULT_VIEWS_JSON})")
+    ap.add_argument("--views-col", type=str, default=None, metavar="LETTER",
+                    help="Column to write views into (e.g. Q). Default: the header cell containing \"views\"")
     args = ap.parse_args()
 
+    views_col = None
+    if args.views_col:
+        try:
+            views_col = a1_to_rowcol(f"{args.views_col.strip().upper()}1")[1] - 1
+        except Exception:
+            sys.exit(f"❌ --views-col must be a column letter, got {args.views_col!r}")
+        if views_col in INPUT_COLUMNS:
+            sys.exit(f"❌ --views-col {args.views_col} is a column the sync reads; pick another")
+
+    if args.export_views:
+        with open(args.export_views) as f:
+            views = {sc: int(v) for sc, v in json.load(f).items()}
+        print(f"📥 {len(views)} view counts from {args.export_views}")
+        sh = gspread.service_account(filename=SERVICE_ACCOUNT_JSON).open_by_url(SHEET_URL)
+        export_views(sh, [args.sheet] if args.sheet else DEFAULT_SHEETS, views, args.apply, views_col)
+        return
+
     cutoff = datetime.utcnow() - timedelta(days=args.days)
-    sheets_to_process = [args.sheet] if args.sheet else ["April", "May", "June", "july"]
+    sheets_to_process = [args.sheet] if args.sheet else DEFAULT_SHEETS
     print(f"📅 Window: last {args.days} days (>= {cutoff.date()})")
     print(f"📋 Sheets: {sheets_to_process}\n")
 
@@ -167,32 +212,23 @@ def main():
             print(f"⚠️  Sheet '{ws_name}' not found — skipping")
             continue
 
-        fallback_month = SHEET_MONTH.get(ws_name)
         rows = ws.get_all_values()
         print(f"  {ws_name}: {len(rows)-1} data rows")
-
-        for i, r in enumerate(rows[1:], start=2):
-            if not any(r):
-                continue
-
-            # Columns (0-indexed): A=0 username, E=4 payment, H=7 date,
-            # J=9 confirmation, K=10 handler, L=11 poc, N=13 details, O=14 reel url
-            username    = (r[0]  if len(r) > 0  else "").strip()
-            payment     = parse_amount(r[4]  if len(r) > 4  else "")
-            date_str    = (r[7]  if len(r) > 7  else "").strip()
-            confirmed   = (r[9]  if len(r) > 9  else "").strip().lower()
-            handler_raw = (r[10] if len(r) > 10 else "").strip()
-            poc         = (r[11] if len(r) > 11 else "").strip()
-            details     = (r[13] if len(r) > 13 else "").strip()
-            reel_raw    = (r[14] if len(r) > 14 else "").strip()
-
-            url, shortcode = parse_reel_url(reel_raw)
-            email = handler_to_email(handler_raw)
-            is_bonus = "bonus" in details.lower()
+        p = parse_worksheet(ws_name, rows)
+
+        for j in range(len(p)):
+            i           = p.row_num[j]
+            username    = p.username[j]
+            payment     = p.payment[j]
+            handler_raw = p.handler[j]
+            poc         = p.poc[j]
+            url, shortcode = p.url[j], p.shortcode[j]
+            email       = p.email[j]
+            is_bonus    = p.is_bonus[j]
 
             # Only process rows where payment is confirmed
-            if "done" not in confirmed:
-                skipped.append((ws_name, i, f"Payment not confirmed ({confirmed!r})"))
+            if not p.confirmed[j]:
+                skipped.append((ws_name, i, "Payment not confirmed"))
                 continue
 
             if not email:
@@ -200,7 +236,7 @@ def main():
                 continue
 
             # Date filter
-            dt = parse_sheet_date(date_str, fallback_month=fallback_month)
+            dt = p.date[j]
             if dt and dt < cutoff:
                 skipped.append((ws_name, i, f"Too old ({dt.date()})"))
                 continue
@@ -250,34 +286,18 @@ def main():
     if IMPORT_TOKEN:
         headers["X-Import-Token"] = IMPORT_TOKEN
 
-    # Batch into chunks of 50 — Render free tier can be slow, keep batches small
-    CHUNK = 50
+    # Results stream back per reel, so batches no longer need to finish inside one timeout
+    CHUNK = 200
     total_inserted = total_updated = total_errors = 0
 
     for start in range(0, len(new_reels), CHUNK):
         chunk = new_reels[start:start + CHUNK]
         print(f"\n⬆️  Sending reels {start+1}–{start+len(chunk)} of {len(new_reels)}...")
-        resp = requests.post(
-            f"{API_SERVER}/api/import-reels",
-            json={"reels": chunk},
-            headers=headers,
-            timeout=120,
-        )
-        if not resp.ok:
-            print(f"  ❌ HTTP {resp.status_code}: {resp.text[:300]}")
-            total_errors += len(chunk)
-            continue
-        data = resp.json()
-        ins = data.get("inserted", 0)
-        upd = data.get("updated", 0)
-        err = data.get("errors", 0)
-        total_inserted += ins
-        total_updated  += upd
-        total_errors   += err
-        print(f"  ✅ inserted={ins}, updated={upd}, errors={err}")
-        if data.get("errorDetails"):
-            for e in data["errorDetails"][:3]:
-                print(f"     ⚠️  {e}")
+        c = import_chunk(chunk, headers)
+        total_inserted += c["inserted"]
+        total_updated  += c["updated"]
+        total_errors   += c["error"]
+        print(f"  ✅ inserted={c['inserted']}, updated={c['updated']}, errors={c['error']}")
 
     # Bonuses
     if bonus_payments:
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Load a limits profile and turn it into throttle settings for the refresh
+scripts.
+
+Limits depend on the client, so each client type has its own profile, keyed
+by that client's account names:
+
+    client       written by                                path (env, default)
+    apify        rate_limit_tester.py --mode search        RATE_LIMITS_PROFILE, rate_limits.json
+                 (keys: AccountConfig names)
+    instagrapi   traffic_trace.py profile <trace>          IG_RATE_LIMITS_PROFILE, rate_limits_instagrapi.json
+                 (keys: cookie account names)
+
+A profile records its client; one written for another client is ignored.
+When there is no profile every helper falls back to the caller's hard-coded
+default, so scripts behave exactly as before.
+
+    from throttle_profile import AccountThrottle, min_delay_sec
+
+    DELAY_SEC = min_delay_sec(default=1.5, client="instagrapi")   # one global delay
+    throttle  = AccountThrottle(client="instagrapi")              # per-account spacing
+    throttle.wait("hatke_automation")                             # blocks until allowed
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+PROFILES = {
+    "apify":      ("RATE_LIMITS_PROFILE",    os.path.join(ROOT, "rate_limits.json")),
+    "instagrapi": ("IG_RATE_LIMITS_PROFILE", os.path.join(ROOT, "rate_limits_instagrapi.json")),
+}
+
+_cache: dict = {}
+
+
+def profile_path(client: str = "apify") -> str:
+    env, default = PROFILES[client]
+    return os.environ.get(env) or default
+
+
+def load_profile(path: Optional[str] = None, client: str = "apify") -> dict:
+    """Returns the parsed limits profile for `client`, or {} if there is none."""
+    path = path or profile_path(client)
+    if path not in _cache:
+        try:
+            with open(path) as f:
+                _cache[path] = json.load(f)
+        except (OSError, ValueError):
+            _cache[path] = {}
+    profile = _cache[path]
+    # Profiles from before the client field were all written by the Apify tester
+    if profile and profile.get("client", "apify") != client:
+        return {}
+    return profile
+
+
+def min_delay_sec(account: Optional[str] = None, default: float = 0.0,
+                  profile: Optional[dict] = None, client: str = "apify") -> float:
+    """Minimum seconds between requests for `account` (or the profile default)."""
+    profile = load_profile(client=client) if profile is None else profile
+    entry = (profile.get("accounts") or {}).get(account) if account else None
+    entry = entry or profile.get("default") or {}
+    delay = entry.get("min_delay_sec")
+    return float(delay) if delay else default
+
+
+class AccountThrottle:
+    """Thread-safe per-account request spacing driven by the limits profile."""
+
+    def __init__(self, default_delay: float = 0.0, profile: Optional[dict] = None,
+                 client: str = "apify"):
+        self.profile = load_profile(client=client) if profile is None else profile
+        self.default_delay = default_delay
+        self._next_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def delay_for(self, account: str) -> float:
+        return min_delay_sec(account, self.default_delay, self.profile)
+
+    def reserve(self, account: str) -> float:
+        """Claim the next request slot for `account`; returns seconds to wait for it."""
+        now = time.monotonic()
+        with self._lock:
+            at = max(now, self._next_at.get(account, now))
+            self._next_at[account] = at + self.delay_for(account)
+        return at - now
+
+    def wait(self, account: str):
+        wait = self.reserve(account)
+        if wait > 0:
+            time.sleep(wait)
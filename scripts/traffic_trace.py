@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Record upstream request timing from the scrapers and replay it offline.
+
+Recording
+---------
+Set TRAFFIC_TRACE=/path/to/trace.jsonl and the refreshers (vm_refresh_problems,
+vm_fill_dates, bulk_refresh_uncached) append one line per upstream request:
+
+    {"t": 1741600000.12, "source": "vm_refresh_problems", "account": "hatke_automation",
+     "status": "ok", "latency": 2.31}
+
+status is ok / empty, or a failure kind from reel_failures.classify()
+(not_found / private / rate_limited / challenge / auth / network / error).
+Result logs from `rate_limit_tester.py --results-out` can be replayed as-is.
+
+Simulation
+----------
+A trace is fitted into a per-account model:
+  - latency samples
+  - the error rate
+  - the requests in the window before each 429 (the limit)
+  - the time until the account worked again (the cooldown)
+Candidate scheduler settings are then run against that model in simulated
+time, so delays and concurrency can be compared in seconds without spending
+real account quota.
+
+Usage:
+    python3 scripts/traffic_trace.py summary  trace.jsonl
+    python3 scripts/traffic_trace.py simulate trace.jsonl --requests 5000 --workers 6 --account-gap 1.5
+    python3 scripts/traffic_trace.py sweep    trace.jsonl --requests 5000 --workers 2,4,6,8 --delay 0,1,2
+    python3 scripts/traffic_trace.py profile  trace.jsonl --out rate_limits_instagrapi.json
+
+`profile` turns the fitted per-account limits into an instagrapi limits
+profile (keyed by cookie account name) for throttle_profile.py.
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+
+from reel_failures import classify
+
+# ── Recording ────────────────────────────────────────────────────────────────
+
+def classify_error(exc: BaseException) -> str:
+    """Maps a scraper exception to a trace status."""
+    return classify(exc).kind
+
+
+class TraceRecorder:
+    """Thread-safe JSONL trace writer. With no path every call is a no-op."""
+
+    def __init__(self, path: Optional[str], source: str):
+        self.path = path
+        self.source = source
+        self._f = open(path, "a") if path else None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, source: str) -> "TraceRecorder":
+        return cls(os.environ.get("TRAFFIC_TRACE") or None, source)
+
+    def record(self, account: str, status: str, latency: float, **extra):
+        if not self._f:
+            return
+        event = {"t": round(time.time() - latency, 3), "source": self.source,
+                 "account": account, "status": status, "latency": round(latency, 3), **extra}
+        line = json.dumps(event, separators=(",", ":"))
+        with self._lock:
+            self._f.write(line + "\n")
+            self._f.flush()
+
+
+# ── Loading & fitting ────────────────────────────────────────────────────────
+
+@dataclass
+class TraceEvent:
+    t: float          # request start, unix seconds
+    account: str
+    status: str
+    latency: float
+
+
+def _from_tester(d: dict) -> TraceEvent:
+    """rate_limit_tester.py result log line → TraceEvent"""
+    if d.get("rate_limited"):
+        status = "rate_limited"
+    elif d.get("blocked") or d.get("captcha_detected"):
+        status = "challenge"
+    else:
+        status = "ok" if d.get("success") else "error"
+    return TraceEvent(datetime.fromisoformat(d["timestamp"]).timestamp(),
+                      d.get("account") or "unknown", status, float(d.get("response_time") or 0))
+
+
+def load_trace(path: str) -> list[TraceEvent]:
+    events = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                d = json.loads(line)
+            except ValueError:
+                continue  # torn last line from a killed run
+            if "request_number" in d:
+                events.append(_from_tester(d))
+            else:
+                events.append(TraceEvent(float(d["t"]), d.get("account") or "unknown",
+                                         d.get("status", "error"), float(d.get("latency") or 0)))
+    events.sort(key=lambda e: e.t)
+    return events
+
+
+@dataclass
+class AccountModel:
+    """What one account looked like from the outside during the trace"""
+    latencies: list[float]
+    error_rate: float = 0.0
+    window_sec: float = 60.0
+    limit: Optional[int] = None     # requests per window that triggered a 429 (None = never limited)
+    cooldown_sec: float = 60.0      # how long a 429 lasted before requests worked again
+    requests: int = 0
+
+    def describe(self) -> dict:
+        lat = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "latency_p50": round(statistics.median(lat), 2) if lat else None,
+            "latency_p90": round(lat[int(0.9 * (len(lat) - 1))], 2) if lat else None,
+            "error_rate": round(self.error_rate, 3),
+            "limit_per_window": self.limit,
+            "window_sec": self.window_sec,
+            "cooldown_sec": round(self.cooldown_sec, 1),
+        }
+
+
+def fit_models(events: Iterable[TraceEvent], window_sec: float = 60.0) -> dict[str, AccountModel]:
+    by_account: dict[str, list[TraceEvent]] = {}
+    for e in events:
+        by_account.setdefault(e.account, []).append(e)
+
+    models = {}
+    for account, evs in by_account.items():
+        ok_lat = [e.latency for e in evs if e.status in ("ok", "empty") and e.latency > 0]
+        all_lat = [e.latency for e in evs if e.latency > 0]
+        answered = [e for e in evs if e.status != "rate_limited"]
+        errors = sum(1 for e in answered if e.status in ("error", "challenge", "auth", "network"))
+
+        limits, cooldowns = [], []
+        recent: deque[float] = deque()
+        for i, e in enumerate(evs):
+            while recent and recent[0] <= e.t - window_sec:
+                recent.popleft()
+            if e.status == "rate_limited":
+                # Only the first 429 of a streak says where the limit is
+                if i == 0 or evs[i - 1].status != "rate_limited":
+                    limits.append(len(recent))
+                    nxt = next((x for x in evs[i + 1:] if x.status != "rate_limited"), None)
+                    if nxt:
+                        cooldowns.append(nxt.t - e.t)
+            recent.append(e.t)
+
+        models[account] = AccountModel(
+            latencies=ok_lat or all_lat or [1.0],
+            error_rate=errors / len(answered) if answered else 0.0,
+            window_sec=window_sec,
+            limit=max(1, min(limits)) if limits else None,
+            cooldown_sec=statistics.median(cooldowns) if cooldowns else window_sec,
+            requests=len(evs),
+        )
+    return models
+
+
+def pooled_model(models: dict[str, AccountModel]) -> AccountModel:
+    """One typical account built from all fitted accounts (for "what if we had N accounts")"""
+    ms = list(models.values())
+    limits = [m.limit for m in ms if m.limit]
+    return AccountModel(
+        latencies=[x for m in ms for x in m.latencies],
+        error_rate=statistics.mean(m.error_rate for m in ms),
+        window_sec=ms[0].window_sec,
+        limit=min(limits) if limits else None,
+        cooldown_sec=statistics.median(m.cooldown_sec for m in ms),
+        requests=sum(m.requests for m in ms),
+    )
+
+
+# ── Simulation ───────────────────────────────────────────────────────────────
+
+@dataclass
+class SchedulerSettings:
+    workers: int = 6              # parallel reader threads (CONCURRENCY / --concurrency)
+    delay_sec: float = 0.0        # per-worker sleep after each request (DELAY_SEC)
+    account_gap_sec: float = 0.0  # min spacing per account (AccountThrottle)
+    backoff_sec: float = 0.0      # extra sleep for a worker that just got a 429
+
+
+@dataclass
+class SimResult:
+    settings: SchedulerSettings
+    requests: int
+    ok: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+    makespan_sec: float = 0.0
+    per_account: dict = field(default_factory=dict)
+
+    def row(self) -> dict:
+        minutes = self.makespan_sec / 60 if self.makespan_sec else 0
+        return {
+            "workers": self.settings.workers,
+            "delay_sec": self.settings.delay_sec,
+            "account_gap_sec": self.settings.account_gap_sec,
+            "backoff_sec": self.settings.backoff_sec,
+            "ok": self.ok,
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+            "minutes": round(minutes, 1),
+            "ok_per_min": round(self.ok / minutes, 1) if minutes else 0,
+            "rate_limited_pct": round(100 * self.rate_limited / self.requests, 2) if self.requests else 0,
+        }
+
+
+def simulate(models: dict[str, AccountModel], n_requests: int, settings: SchedulerSettings,
+             seed: int = 0) -> SimResult:
+    """
+    Replay `n_requests` one-shot requests (each reel tried once, like the
+    refreshers) through `settings` against the fitted account models, in
+    simulated time. Accounts are used round-robin, as next_cookie() does.
+    """
+    rng = random.Random(seed)
+    names = sorted(models)
+    sent: dict[str, deque] = {a: deque() for a in names}
+    next_free = {a: 0.0 for a in names}
+    blocked_until = {a: 0.0 for a in names}
+    res = SimResult(settings, n_requests, per_account={a: {"ok": 0, "rate_limited": 0, "error": 0} for a in names})
+
+    workers = [(0.0, w) for w in range(max(1, settings.workers))]
+    heapq.heapify(workers)
+    rr = 0
+    for _ in range(n_requests):
+        now, w = heapq.heappop(workers)
+        account = names[rr % len(names)]
+        rr += 1
+        m = models[account]
+
+        start = max(now, next_free[account])
+        next_free[account] = start + settings.account_gap_sec
+        window = sent[account]
+        while window and window[0] <= start - m.window_sec:
+            window.popleft()
+
+        if start < blocked_until[account] or (m.limit is not None and len(window) >= m.limit):
+            if start >= blocked_until[account]:
+                blocked_until[account] = start + m.cooldown_sec
+            status, latency = "rate_limited", min(m.latencies)
+        else:
+            latency = rng.choice(m.latencies)
+            status = "error" if rng.random() < m.error_rate else "ok"
+        window.append(start)
+
+        if status == "ok":
+            res.ok += 1
+        elif status == "rate_limited":
+            res.rate_limited += 1
+        else:
+            res.errors += 1
+        res.per_account[account][status] += 1
+
+        done = start + latency
+        res.makespan_sec = max(res.makespan_sec, done)
+        pause = settings.delay_sec + (settings.backoff_sec if status == "rate_limited" else 0)
+        heapq.heappush(workers, (done + pause, w))
+    return res
+
+
+# ── Limits profile ───────────────────────────────────────────────────────────
+
+def limits_profile(models: dict[str, AccountModel], safety_factor: float = 0.8,
+                   client: str = "instagrapi") -> dict:
+    """
+    Per-account limits in the throttle_profile.py format. Accounts that never
+    hit a 429 in the trace get no entry (nothing was measured) and fall back
+    to the default: the most conservative measured account.
+    """
+    profile = {
+        "client": client,
+        "generated_at": datetime.now().isoformat(),
+        "safety_factor": safety_factor,
+        "accounts": {},
+    }
+    for account, m in sorted(models.items()):
+        if not m.limit:
+            continue
+        max_per_min = m.limit * 60.0 / m.window_sec
+        recommended = max_per_min * safety_factor
+        profile["accounts"][account] = {
+            "max_sustainable_per_min": round(max_per_min, 2),
+            "recommended_per_min": round(recommended, 2),
+            "min_delay_sec": round(60.0 / recommended, 2),
+            "cooldown_sec": round(m.cooldown_sec, 1),
+        }
+    if profile["accounts"]:
+        slowest = min(profile["accounts"].values(), key=lambda a: a["recommended_per_min"])
+        profile["default"] = {k: slowest[k] for k in ("recommended_per_min", "min_delay_sec")}
+    return profile
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+
+def _floats(s: str) -> list[float]:
+    return [float(x) for x in s.split(",") if x.strip()]
+
+
+def _models_for(args) -> dict[str, AccountModel]:
+    models = fit_models(load_trace(args.trace), window_sec=args.window)
+    if not models:
+        raise SystemExit(f"❌ No events in {args.trace}")
+    if args.accounts:
+        typical = pooled_model(models)
+        models = {f"account_{i + 1}": typical for i in range(args.accounts)}
+    return models
+
+
+def print_rows(rows: list[dict]):
+    cols = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in cols}
+    print("  ".join(c.rjust(widths[c]) for c in cols))
+    for r in rows:
+        print("  ".join(str(r[c]).rjust(widths[c]) for c in cols))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Traffic trace summary and offline scheduler simulation")
+    ap.add_argument("command", choices=["summary", "simulate", "sweep", "profile"])
+    ap.add_argument("trace", help="JSONL trace (TRAFFIC_TRACE output or rate_limit_tester --results-out)")
+    ap.add_argument("--window",      type=float, default=60.0, help="Sliding window for the limit model (s)")
+    ap.add_argument("--accounts",    type=int,   default=0,    help="Simulate N copies of a typical account instead of the traced ones")
+    ap.add_argument("--requests",    type=int,   default=1000, help="Requests to simulate")
+    ap.add_argument("--workers",     default="6",   help="Worker count (comma list for sweep)")
+    ap.add_argument("--delay",       default="0",   help="Per-worker delay after each request, s (comma list for sweep)")
+    ap.add_argument("--account-gap", default="0",   help="Min seconds between requests per account (comma list for sweep)")
+    ap.add_argument("--backoff",     default="0",   help="Extra worker sleep after a 429, s (comma list for sweep)")
+    ap.add_argument("--max-429-pct", type=float, default=1.0, help="Sweep: settings above this 429 %% are rejected")
+    ap.add_argument("--seed",        type=int,   default=0)
+    ap.add_argument("--safety",      type=float, default=0.8, help="Profile: fraction of the measured limit to use")
+    ap.add_argument("--out",         default=None, help="Profile: output path (default IG_RATE_LIMITS_PROFILE)")
+    args = ap.parse_args()
+
+    models = _models_for(args)
+
+    if args.command == "summary":
+        print(f"📼 {args.trace}: {sum(m.requests for m in models.values())} requests, {len(models)} accounts\n")
+        print_rows([{"account": a, **m.describe()} for a, m in sorted(models.items())])
+        return
+
+    if args.command == "profile":
+        from throttle_profile import profile_path
+        out = args.out or profile_path("instagrapi")
+        profile = limits_profile(models, args.safety)
+        with open(out, "w") as f:
+            json.dump(profile, f, indent=2)
+        for account, entry in profile["accounts"].items():
+            print(f"   {account}: use {entry['recommended_per_min']} req/min (≥{entry['min_delay_sec']}s apart)")
+        unmeasured = sorted(set(models) - set(profile["accounts"]))
+        if unmeasured:
+            print(f"   never rate-limited (default applies): {', '.join(unmeasured)}")
+        print(f"💾 Saved to {out}")
+        return
+
+    grid = [
+        SchedulerSettings(int(w), d, g, b)
+        for w in _floats(args.workers)
+        for d in _floats(args.delay)
+        for g in _floats(args.account_gap)
+        for b in _floats(args.backoff)
+    ]
+    if args.command == "simulate":
+        grid = grid[:1]
+
+    t0 = time.perf_counter()
+    results = [simulate(models, args.requests, s, seed=args.seed) for s in grid]
+    rows = [r.row() for r in results]
+    print(f"🧪 Simulated {len(grid)} setting(s) × {args.requests} requests over {len(models)} accounts "
+          f"in {time.perf_counter() - t0:.2f}s\n")
+    print_rows(rows)
+
+    if args.command == "simulate":
+        print("\nPer account:")
+        for account, c in sorted(results[0].per_account.items()):
+            print(f"   {account}: ✅{c['ok']}  ⏰{c['rate_limited']}  ❌{c['error']}")
+        return
+
+    ok = [r for r in rows if r["rate_limited_pct"] <= args.max_429_pct]
+    if ok:
+        best = max(ok, key=lambda r: r["ok_per_min"])
+        print(f"\n🎯 Best within {args.max_429_pct}% 429s: workers={best['workers']} delay={best['delay_sec']}s "
+              f"account_gap={best['account_gap_sec']}s backoff={best['backoff_sec']}s → {best['ok_per_min']} ok/min")
+    else:
+        print(f"\n⚠️  No setting stayed under {args.max_429_pct}% 429s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Trickle-refresh scheduler daemon: owns the refresh calendar for every reel
+and spreads the work evenly over the day instead of bursty manual sweeps.
+
+Each reel is due `--interval-hours` after its lastupdatedat. Due times live in
+a min-heap; one dispatcher pops the earliest reel once it is due and once the
+dispatch gap has passed, and hands it to a small worker pool running the same
+path as bulk_refresh_reels.py:
+
+    /api/reel-info (VM cache) → diff_update → /api/bulk-update-views (changed counts)
+                                            → /api/touch-reels (unchanged)
+
+With --live, cache misses fall back to bulk_refresh_uncached.scrape_live.
+
+The dispatch gap is interval / number of reels (so one interval's worth of
+reels is spread over the interval), never shorter than 60 / --max-per-min
+(with --live, also the instagrapi limits-profile min_delay_sec from
+throttle_profile.py). Reels that are already overdue when loaded are spread
+over --catchup-hours, oldest first, rather than fired at once; while that
+backlog lasts the gap shrinks to catch-up / backlog size, still bounded by the
+same floor. Failures are retried with exponential backoff. The calendar is
+rebuilt from lastupdatedat, which every write/touch bumps, so a restart
+resumes where the last run left off. The reel list is re-read every
+--reload-min to pick up new reels and drop deleted ones.
+
+Status: GET http://<host>:<port>/status (JSON), GET /health. Binds to
+127.0.0.1 unless --host says otherwise.
+
+Usage:
+    python3 scripts/trickle_scheduler.py                         # 24h calendar, status on :8765
+    python3 scripts/trickle_scheduler.py --interval-hours 12 --workers 4 --live
+    python3 scripts/trickle_scheduler.py --dry-run --port 0      # print the plan, no writes
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import json
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from bulk_refresh_reels import (
+    SUPABASE_KEY, SUPABASE_URL, create_client, diff_update, fetch_all_reels,
+    fetch_cached, flush_to_server, get_url, touch_on_server,
+)
+from throttle_profile import min_delay_sec
+
+RETRY_BASE_SEC = 300          # first retry after a failed refresh
+SELECT = "id,shortcode,permalink,url,inputurl,videoplaycount,likescount,commentscount,lastupdatedat"
+
+
+def _ts(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _iso(t: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(t, tz=timezone.utc).isoformat(timespec="seconds") if t else None
+
+
+class TrickleScheduler:
+    def __init__(self, interval_sec: float, catchup_sec: float, workers: int,
+                 max_per_min: float, live: bool = False, dry_run: bool = False):
+        self.interval = interval_sec
+        self.catchup = catchup_sec
+        self.workers = workers
+        self.max_per_min = max_per_min
+        self.live = live
+        self.dry_run = dry_run
+
+        self.reels: dict[str, dict] = {}      # shortcode -> latest row
+        self.due: dict[str, float] = {}       # shortcode -> due time (authoritative)
+        self.failures: dict[str, int] = {}    # shortcode -> consecutive failures
+        self.backlog: set[str] = set()        # overdue-on-load reels not dispatched yet
+        self.heap: list[tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self.stop = threading.Event()
+        self._slots = threading.Semaphore(workers)
+        self.gap = 0.0
+        self.catchup_gap = 0.0
+        self.last_dispatch = 0.0
+
+        self.started_at = time.time()
+        self.last_reload: Optional[float] = None
+        self.counters = {"dispatched": 0, "changed": 0, "unchanged": 0, "miss": 0, "fail": 0, "in_flight": 0}
+        self.recent = deque(maxlen=20)        # last outcomes for /status
+
+    # -- calendar ------------------------------------------------------------
+
+    def _schedule(self, sc: str, at: float):
+        self.due[sc] = at
+        heapq.heappush(self.heap, (at, next(self._seq), sc))
+
+    def load(self, rows: list[dict]) -> tuple[int, int, int]:
+        """
+        Adds new reels to the calendar, refreshes known rows and drops reels
+        missing from `rows`. Returns (added, overdue, removed).
+        """
+        now = time.time()
+        new, overdue = [], []
+        with self._lock:
+            # An empty list is more likely a failed read than an empty table
+            live = {r.get("shortcode") for r in rows}
+            gone = [sc for sc in self.reels if sc not in live] if rows else []
+            for sc in gone:
+                # Heap entries go stale once `due` forgets them; an in-flight
+                # refresh is not rescheduled because the reel is gone
+                del self.reels[sc]
+                self.due.pop(sc, None)
+                self.failures.pop(sc, None)
+                self.backlog.discard(sc)
+            for r in rows:
+                sc = r.get("shortcode")
+                if not sc:
+                    continue
+                known = sc in self.reels
+                self.reels[sc] = r
+                if known:
+                    continue
+                last = _ts(r.get("lastupdatedat"))
+                at = (last or 0) + self.interval
+                if at <= now:
+                    overdue.append((last or 0, sc))
+                else:
+                    self._schedule(sc, at)
+                new.append(sc)
+            # Overdue backlog: oldest first, evenly over the catch-up window
+            overdue.sort()
+            for i, (_, sc) in enumerate(overdue):
+                self._schedule(sc, now + self.catchup * i / max(1, len(overdue)))
+            self.backlog.update(sc for _, sc in overdue)
+            self._update_gap()
+            self.last_reload = now
+        self._wake.set()
+        return len(new), len(overdue), len(gone)
+
+    def _update_gap(self):
+        steady = self.interval / max(1, len(self.reels))
+        floor = 60.0 / self.max_per_min if self.max_per_min else 0.0
+        if self.live:
+            # Only live scrapes hit Instagram accounts (instagrapi on the VM)
+            floor = max(floor, min_delay_sec(default=0.0, client="instagrapi"))
+        self.gap = max(steady, floor)
+        # The overdue backlog has to fit in the catch-up window; only the
+        # throttle floor limits how fast that goes
+        if self.backlog:
+            self.catchup_gap = max(floor, min(steady, self.catchup / len(self.backlog)))
+        else:
+            self.catchup_gap = self.gap
+
+    def _next(self) -> Optional[tuple[float, str]]:
+        """Earliest live heap entry (stale entries from reschedules are dropped)."""
+        while self.heap:
+            at, _, sc = self.heap[0]
+            if self.due.get(sc) == at:
+                return at, sc
+            heapq.heappop(self.heap)
+        return None
+
+    # -- dispatch ------------------------------------------------------------
+
+    def run(self):
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="trickle")
+        while not self.stop.is_set():
+            with self._lock:
+                nxt = self._next()
+                gap = self.catchup_gap if self.backlog else self.gap
+                start_at = max(nxt[0], self.last_dispatch + gap) if nxt else None
+            if start_at is None or start_at > time.time():
+                self._wake.clear()
+                self._wake.wait(timeout=min(60.0, start_at - time.time()) if start_at else 60.0)
+                continue
+            # All workers busy: wait for a slot rather than queueing work
+            if not self._slots.acquire(timeout=5):
+                continue
+            with self._lock:
+                nxt = self._next()
+                if nxt is None:
+                    self._slots.release()
+                    continue
+                heapq.heappop(self.heap)
+                sc = nxt[1]
+                del self.due[sc]
+                self.backlog.discard(sc)
+                self.last_dispatch = time.time()
+                self.counters["dispatched"] += 1
+                self.counters["in_flight"] += 1
+                reel = self.reels[sc]
+            pool.submit(self._refresh, reel)
+        pool.shutdown(wait=True)
+
+    def _refresh(self, reel: dict):
+        sc = reel["shortcode"]
+        outcome = "fail"
+        try:
+            outcome = self.refresh_one(reel)
+        except Exception as e:
+            print(f"  ⚠️  {sc}: {e}")
+        finally:
+            now = time.time()
+            with self._lock:
+                self.counters["in_flight"] -= 1
+                self.counters[outcome] += 1
+                if outcome in ("changed", "unchanged"):
+                    self.failures.pop(sc, None)
+                    at = now + self.interval
+                else:
+                    n = self.failures[sc] = self.failures.get(sc, 0) + 1
+                    at = now + min(self.interval, RETRY_BASE_SEC * 2 ** (n - 1))
+                if sc in self.reels and sc not in self.due:
+                    self._schedule(sc, at)
+                self.recent.append({"shortcode": sc, "outcome": outcome, "at": _iso(now)})
+            self._slots.release()
+            self._wake.set()
+
+    def refresh_one(self, reel: dict) -> str:
+        """One reel through the bulk_refresh_reels path. Returns changed | unchanged | miss | fail."""
+        url = get_url(reel)
+        if not url:
+            return "fail"
+        counts = fetch_cached(url)
+        if counts is None and self.live:
+            from bulk_refresh_uncached import scrape_live
+            counts = scrape_live(url)
+        if counts is None:
+            return "miss"
+        play, likes, comments = counts
+        changed = diff_update(reel, play, likes, comments)
+        if self.dry_run:
+            return "changed" if changed else "unchanged"
+        if changed:
+            applied, errors = flush_to_server([{"shortcode": reel["shortcode"], **changed}])
+            if errors or not applied:
+                return "fail"
+            reel.update(changed)
+            return "changed"
+        _, errors = touch_on_server([reel["shortcode"]])
+        return "fail" if errors else "unchanged"
+
+    # -- status --------------------------------------------------------------
+
+    def status(self) -> dict:
+        now = time.time()
+        with self._lock:
+            nxt = self._next()
+            due_now = sum(1 for at in self.due.values() if at <= now)
+            return {
+                "started_at": _iso(self.started_at),
+                "last_reload": _iso(self.last_reload),
+                "reels": len(self.reels),
+                "scheduled": len(self.due),
+                "due_now": due_now,
+                "retrying": len(self.failures),
+                "next_due": _iso(nxt[0]) if nxt else None,
+                "next_shortcode": nxt[1] if nxt else None,
+                "interval_hours": self.interval / 3600,
+                "dispatch_gap_sec": round(self.gap, 2),
+                "catchup_backlog": len(self.backlog),
+                "catchup_gap_sec": round(self.catchup_gap, 2),
+                "per_day": round(86400 / self.gap) if self.gap else None,
+                "workers": self.workers,
+                "live_fallback": self.live,
+                "dry_run": self.dry_run,
+                "counters": dict(self.counters),
+                "recent": list(self.recent),
+            }
+
+
+def serve_status(sched: TrickleScheduler, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") in ("", "/status"):
+                body, code = json.dumps(sched.status(), indent=2).encode(), 200
+            elif self.path == "/health":
+                body, code = b'{"status": "ok"}', 200
+            else:
+                body, code = b'{"error": "not found"}', 404
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Trickle-refresh scheduler daemon")
+    ap.add_argument("--interval-hours", type=float, default=24.0, help="Refresh every reel this often (default 24)")
+    ap.add_argument("--catchup-hours", type=float, default=6.0,
+                    help="Spread reels that are already overdue over this window (default 6)")
+    ap.add_argument("--workers", type=int, default=2, help="Concurrent refreshes (default 2)")
+    ap.add_argument("--max-per-min", type=float, default=30.0, help="Dispatch ceiling (default 30/min)")
+    ap.add_argument("--reload-min", type=float, default=60.0, help="Re-read the reel list every N minutes")
+    ap.add_argument("--live", action="store_true", help="Live-scrape on VM cache miss")
+    ap.add_argument("--port", type=int, default=8765, help="Status endpoint port (0 = off)")
+    ap.add_argument("--host", default="127.0.0.1",
+                    help="Status endpoint address (default 127.0.0.1; 0.0.0.0 exposes it)")
+    ap.add_argument("--dry-run", action="store_true", help="Read counts but write nothing")
+    args = ap.parse_args()
+
+    sched = TrickleScheduler(args.interval_hours * 3600, args.catchup_hours * 3600, args.workers,
+                             args.max_per_min, live=args.live, dry_run=args.dry_run)
+    sb = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+    def reload():
+        reels = fetch_all_reels(sb, SELECT)
+        added, overdue, removed = sched.load(reels)
+        print(f"📥 {len(reels)} reels ({added} new, {overdue} overdue, {removed} removed) — "
+              f"one every {sched.gap:.1f}s ≈ {86400 / sched.gap:.0f}/day")
+
+    reload()
+    if args.port:
+        serve_status(sched, args.port, args.host)
+        print(f"📡 Status on http://{args.host}:{args.port}/status")
+
+    def reloader():
+        while not sched.stop.wait(args.reload_min * 60):
+            try:
+                reload()
+            except Exception as e:
+                print(f"  ⚠️  reload failed: {e}")
+
+    threading.Thread(target=reloader, daemon=True).start()
+
+    def shutdown(*_):
+        print("🛑 Stopping after in-flight refreshes…")
+        sched.stop.set()
+        sched._wake.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    print(f"🚀 Trickle scheduler running ({args.workers} workers{', dry-run' if args.dry_run else ''})")
+    sched.run()
+    c = sched.counters
+    print(f"🎉 Stopped. dispatched={c['dispatched']} changed={c['changed']} "
+          f"unchanged={c['unchanged']} miss={c['miss']} fail={c['fail']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,22 @@
 """
 Fill missing takenat (publish date) for reels that have views but no date.
 Reads /tmp/missing_dates.json, scrapes via instagrapi to get timestamp,
-writes back via Render /api/bulk-update-views.
+writes back via Render /api/bulk-update-views. The same scrape also refreshes
+counts and fills caption / owner / audio / duration (ig_sessions.reel_update),
+so these reels don't need another pass from the refreshers.
 
 Uses slower rate (1 worker, 2s delay between requests) to avoid rate limiting
 and maximise timestamp retrieval success.
 """
 import os, sys, time, json, threading
-from datetime import datetime, timezone
 from queue import Queue, Empty
 
 sys.path.insert(0, '/home/ubuntu/instagram_view_counter_api')
 import requests
+from throttle_profile import min_delay_sec
+from traffic_trace import TraceRecorder, classify_error
+from ig_sessions import reel_update
+from shortcodes import reel_url as get_url  # canonical URL, rebuilt from the shortcode
 
 RENDER_API   = "https://instagram-pr-api.onrender.com"
 COOKIE_FILES = [
@@ -22,7 +27,8 @@ COOKIE_FILES = [
     "/home/ubuntu/instagram_view_counter_api/cookies_insta_automation.txt",
 ]
 WRITE_BATCH  = 5
-DELAY_SEC    = 1.5   # slower = fewer rate-limit errors
+DELAY_SEC    = min_delay_sec(default=1.5, client="instagrapi")   # slower = fewer rate-limit errors; IG_RATE_LIMITS_PROFILE overrides
+_trace       = TraceRecorder.from_env("vm_fill_dates")  # TRAFFIC_TRACE=path to record
 
 _idx = [0]
 def next_cookie():
@@ -30,27 +36,19 @@ def next_cookie():
     _idx[0] += 1
     return f
 
-def get_url(reel):
-    for f in ("permalink","url","inputurl"):
-        v = (reel.get(f) or "").strip()
-        if v: return v
-    sc = reel.get("shortcode")
-    return f"https://www.instagram.com/reel/{sc}/" if sc else None
-
-def scrape_timestamp(reel_url):
-    """Returns (timestamp, play_count) or (None, None)."""
-    from scraper_instagrapi import fetch_engagement
+def scrape_reel(reel_url):
+    """Returns the fetch_engagement result or None."""
+    from ig_sessions import fetch_engagement  # warm per-account client
     cf = next_cookie()
     acct = os.path.basename(cf).replace("cookies_","").replace(".txt","")
+    started = time.time()
     try:
         result = fetch_engagement(reel_url, cf, acct)
-        if not result: return None, None
-        ts   = result.get("timestamp")
-        eng  = result.get("engagement") or {}
-        play = eng.get("play_count") or eng.get("view_count") or eng.get("views")
-        return (int(ts) if ts else None, int(play) if play is not None else None)
+        _trace.record(acct, "ok" if result else "empty", time.time() - started)
+        return result
     except Exception as e:
-        return None, None
+        _trace.record(acct, classify_error(e), time.time() - started)
+        return None
 
 def flush(batch):
     if not batch: return 0, 0
@@ -83,14 +81,10 @@ def main():
             err += 1
             continue
 
-        ts, play = scrape_timestamp(reel_url)
+        result = scrape_reel(reel_url)
 
-        if ts:
-            dt = datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
-            upd = {"shortcode": sc, "takenat": dt}
-            if play is not None:
-                old = reel.get("videoplaycount") or 0
-                upd["videoplaycount"] = max(int(play), int(old))
+        if result and result.get("timestamp"):
+            upd = reel_update(reel, result)
             # Flush immediately — don't batch, don't risk losing data
             a, e = flush([upd])
             ok += a
@@ -198,83 +198,202 @@ export async function fetchReelFromApify(url, apiKey) {
   }
 }
 
+// Bulk path tuning. URL sets are split into chunks of APIFY_CHUNK_SIZE, each
+// its own actor run, with up to the account's free actor-run slots running at
+// once (capped by APIFY_MAX_CONCURRENT_RUNS).
+const CHUNK_SIZE = parseInt(process.env.APIFY_CHUNK_SIZE || "25", 10);
+const MAX_CONCURRENT_RUNS = parseInt(process.env.APIFY_MAX_CONCURRENT_RUNS || "5", 10);
+const DATASET_PAGE_SIZE = 250;
+const RUN_POLL_MS = 5000;
+const RUN_MAX_POLLS = 120; // 10 minutes per chunk
+
+function bulkActorInput(urls) {
+  return {
+    directUrls: urls,
+    resultsType: "posts",
+    resultsLimit: Math.max(urls.length, 10),
+    addParentData: false,
+    enhanceUserSearchWithFacebookPage: false,
+    isUserReelFeedURL: false,
+    isUserTaggedFeedURL: false,
+    proxy: {
+      useApifyProxy: true,
+      apifyProxyGroups: ["RESIDENTIAL"]
+    }
+  };
+}
+
 /**
- * Main handler for fetching multiple reels from Apify
+ * Free actor-run slots on the account (plan limit minus runs already active),
+ * so our chunks don't queue behind each other on Apify's side.
  */
-export async function fetchReelsFromApify(urls, apiKey) {
+async function availableRunSlots(token) {
   try {
-    const token = apiKey || DEFAULT_APIFY_TOKEN;
-    // Remove duplicates by using Set
-    const normalizedUrls = [...new Set(urls.map(url => normalizeInstagramUrl(url)))];
-
-    console.log("Triggering bulk actor run for:", normalizedUrls.length, "URLs (after deduplication)");
-
-    const actorInput = {
-      directUrls: normalizedUrls,
-      resultsType: "posts",
-      resultsLimit: Math.max(normalizedUrls.length, 10),
-      addParentData: false,
-      enhanceUserSearchWithFacebookPage: false,
-      isUserReelFeedURL: false,
-      isUserTaggedFeedURL: false,
-      proxy: {
-        useApifyProxy: true,
-        apifyProxyGroups: ["RESIDENTIAL"]
-      }
-    };
-
-    const runResponse = await fetch(`https://api.apify.com/v2/acts/${APIFY_ACTOR_ID}/runs?token=${token}`, {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify(actorInput),
-    });
-
-    if (!runResponse.ok) {
-      const errorText = await runResponse.text();
-      throw new Error(`Failed to start Apify actor run: ${errorText}`);
+    const res = await fetch(`https://api.apify.com/v2/users/me/limits?token=${token}`);
+    if (!res.ok) return MAX_CONCURRENT_RUNS;
+    const { data } = await res.json();
+    const max = data?.limits?.maxConcurrentActorJobs;
+    const active = data?.current?.activeActorJobCount || 0;
+    if (!max) return MAX_CONCURRENT_RUNS;
+    return Math.max(1, Math.min(MAX_CONCURRENT_RUNS, max - active));
+  } catch {
+    return MAX_CONCURRENT_RUNS;
+  }
+}
+
+/**
+ * Asks Apify to stop a run (best-effort; the run is billed until it stops)
+ */
+async function abortRun(runId, token) {
+  try {
+    await fetch(`https://api.apify.com/v2/actor-runs/${runId}/abort?token=${token}`, { method: "POST" });
+  } catch (error) {
+    console.warn(`⚠️ Could not abort Apify run ${runId}:`, error.message);
+  }
+}
+
+/**
+ * Starts one bulk actor run and polls it to a terminal status.
+ * If `signal` aborts while polling, the run is aborted on Apify too.
+ */
+async function runBulkChunk(urls, token, signal) {
+  const runResponse = await fetch(`https://api.apify.com/v2/acts/${APIFY_ACTOR_ID}/runs?token=${token}`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify(bulkActorInput(urls)),
+  });
+
+  if (!runResponse.ok) {
+    const errorText = await runResponse.text();
+    throw new Error(`Failed to start Apify actor run: ${errorText}`);
+  }
+
+  const runData = await runResponse.json();
+  const runId = runData.data.id;
+  const defaultDatasetId = runData.data.defaultDatasetId;
+
+  if (!runId || !defaultDatasetId) {
+    throw new Error("Failed to get run ID or dataset ID from Apify");
+  }
+
+  let status = runData.data.status;
+  let attempts = 0;
+
+  while (status !== "SUCCEEDED" && status !== "FAILED" && status !== "ABORTED" && attempts < RUN_MAX_POLLS) {
+    await new Promise(resolve => setTimeout(resolve, RUN_POLL_MS));
+    if (signal?.aborted) {
+      await abortRun(runId, token);
+      throw new Error(`Caller went away; aborted Apify run ${runId}`);
+    }
+
+    const statusResponse = await fetch(`https://api.apify.com/v2/actor-runs/${runId}?token=${token}`);
+    if (!statusResponse.ok) {
+      throw new Error(`Failed to check run status: ${statusResponse.statusText}`);
     }
 
-    const runData = await runResponse.json();
-    const runId = runData.data.id;
-    const defaultDatasetId = runData.data.defaultDatasetId;
+    const statusData = await statusResponse.json();
+    status = statusData.data.status;
+    attempts++;
+  }
 
-    if (!runId || !defaultDatasetId) {
-      throw new Error("Failed to get run ID or dataset ID from Apify");
+  if (status !== "SUCCEEDED") {
+    throw new Error(`Apify actor run ${status.toLowerCase()}. Run ID: ${runId}`);
+  }
+
+  return { runId, defaultDatasetId };
+}
+
+/**
+ * Yields a dataset's items one page at a time (offset/limit pagination)
+ */
+async function* datasetPages(datasetId, token) {
+  let offset = 0;
+  let retriedEmpty = false;
+  while (true) {
+    const url = `https://api.apify.com/v2/datasets/${datasetId}/items?token=${token}&offset=${offset}&limit=${DATASET_PAGE_SIZE}`;
+    const response = await fetch(url);
+    if (!response.ok) {
+      const errorText = await response.text();
+      throw new Error(`Failed to fetch dataset items: ${response.statusText} - ${errorText}`);
     }
+    const data = await response.json();
+    const items = Array.isArray(data) ? data : [data];
 
-    // Poll for run completion
-    let status = runData.data.status;
-    let attempts = 0;
-    const maxAttempts = 120; // Wait up to 10 minutes for bulk
+    // A just-finished run's dataset can lag a moment behind its status
+    if (offset === 0 && items.length === 0 && !retriedEmpty) {
+      retriedEmpty = true;
+      await new Promise(resolve => setTimeout(resolve, RUN_POLL_MS));
+      continue;
+    }
 
-    while (status !== "SUCCEEDED" && status !== "FAILED" && status !== "ABORTED" && attempts < maxAttempts) {
-      await new Promise(resolve => setTimeout(resolve, 5000));
-      
-      const statusResponse = await fetch(`https://api.apify.com/v2/actor-runs/${runId}?token=${token}`);
-      if (!statusResponse.ok) {
-        throw new Error(`Failed to check run status: ${statusResponse.statusText}`);
+    if (items.length > 0) yield items;
+    if (items.length < DATASET_PAGE_SIZE) return;
+    offset += items.length;
+  }
+}
+
+/**
+ * Main handler for fetching multiple reels from Apify.
+ *
+ * URLs are split into chunks that run as concurrent actor runs. Each chunk's
+ * dataset is read page by page as soon as its run finishes and handed to
+ * `onItems(items, { chunk, chunks })`, so callers can forward partial
+ * results early; with `onItems` the items are not also accumulated.
+ * Returns `{ items, errors }`. A failed chunk is logged and reported in
+ * `errors`; only when every chunk fails does the call throw.
+ *
+ * Pass an AbortSignal as `signal` (e.g. aborted when the HTTP client
+ * disconnects): no further chunks are started, running actor runs are
+ * aborted, and the call returns whatever was collected so far.
+ */
+export async function fetchReelsFromApify(urls, apiKey, { onItems, signal } = {}) {
+  const token = apiKey || DEFAULT_APIFY_TOKEN;
+  // Remove duplicates by using Set
+  const normalizedUrls = [...new Set(urls.map(url => normalizeInstagramUrl(url)))];
+
+  const chunks = [];
+  for (let i = 0; i < normalizedUrls.length; i += CHUNK_SIZE) {
+    chunks.push(normalizedUrls.slice(i, i + CHUNK_SIZE));
+  }
+  const workers = Math.min(chunks.length, await availableRunSlots(token));
+
+  console.log(`Triggering ${chunks.length} bulk actor run(s) for ${normalizedUrls.length} URLs (after deduplication), ${workers} at a time`);
+
+  const collected = [];
+  const errors = [];
+  let next = 0;
+
+  async function worker() {
+    while (next < chunks.length && !signal?.aborted) {
+      const chunk = next++;
+      try {
+        const { runId, defaultDatasetId } = await runBulkChunk(chunks[chunk], token, signal);
+        let count = 0;
+        for await (const items of datasetPages(defaultDatasetId, token)) {
+          if (signal?.aborted) break;
+          count += items.length;
+          if (onItems) await onItems(items, { chunk, chunks: chunks.length });
+          else collected.push(...items);
+        }
+        console.log(`✅ Chunk ${chunk + 1}/${chunks.length} (run ${runId}): ${count} item(s)`);
+      } catch (error) {
+        if (signal?.aborted) break;
+        console.error(`❌ Chunk ${chunk + 1}/${chunks.length} failed:`, error.message);
+        errors.push({ chunk, urls: chunks[chunk], error: error.message });
       }
-      
-      const statusData = await statusResponse.json();
-      status = statusData.data.status;
-      attempts++;
     }
+  }
 
-    if (status !== "SUCCEEDED") {
-      throw new Error(`Apify actor run ${status.toLowerCase()}. Run ID: ${runId}`);
-    }
+  await Promise.all(Array.from({ length: workers }, worker));
+  if (signal?.aborted) {
+    console.log(`🛑 Caller went away; stopped after ${next}/${chunks.length} chunk(s)`);
+    return { items: collected, errors };
+  }
 
-    // Wait for dataset to be ready
-    await new Promise(resolve => setTimeout(resolve, 5000));
-    
-    // Fetch dataset items
-    const items = await fetchApifyDatasetItems(defaultDatasetId, apiKey);
-    
-    return items;
-  } catch (error) {
-    console.error("Error fetching reels from Apify:", error);
-    throw error;
+  if (chunks.length > 0 && errors.length === chunks.length) {
+    throw new Error(`All ${chunks.length} Apify run(s) failed: ${errors[0].error}`);
   }
+  return { items: collected, errors };
 }
@@ -9,6 +9,9 @@ import express from 'express';
 import cors from 'cors';
 import { createClient as createSupabaseClient } from '@supabase/supabase-js';
 import { fetchReelFromApify, fetchReelsFromApify } from './api/apify.js';
+import { createJobStore, WorkerPool } from './jobStore.js';
+import { reelShortcode, canonicalReelUrl, normalizeReelUrl } from './shortcode.js';
+import { wantsNdjson, ndjsonStream } from './ndjson.js';
 
 // Server-side Supabase client with service-role key (bypasses RLS — needed for the
 // sheet-sync cron to insert reels attributed to handler emails like rajoshree@buyhatke.com).
@@ -107,11 +110,40 @@ app.post('/api/apify/reels', async (req, res) => {
     }
 
     console.log('Fetching reels from Apify:', urls.length);
-    const items = await fetchReelsFromApify(urls, apiKey);
+
+    // Stop starting (and abort running) actor runs once nobody is reading
+    const controller = new AbortController();
+    res.on('close', () => {
+      if (!res.writableFinished) controller.abort();
+    });
+
+    // Streaming: one {type:'item'} line per reel as each chunk's dataset pages arrive
+    if (wantsNdjson(req)) {
+      const stream = ndjsonStream(res);
+      let count = 0;
+      try {
+        const { errors } = await fetchReelsFromApify(urls, apiKey, {
+          signal: controller.signal,
+          onItems: async (items) => {
+            for (const item of items) await stream.write({ type: 'item', item });
+            count += items.length;
+          },
+        });
+        for (const e of errors) await stream.write({ type: 'error', ...e });
+        stream.end({ type: 'done', success: true, count, errors: errors.length });
+      } catch (error) {
+        console.error('Error in /api/apify/reels (stream):', error);
+        stream.end({ type: 'done', success: false, count, error: error.message });
+      }
+      return;
+    }
+
+    const { items, errors } = await fetchReelsFromApify(urls, apiKey, { signal: controller.signal });
     
     res.json({ 
       success: true, 
-      items 
+      items,
+      errors
     });
   } catch (error) {
     console.error('Error in /api/apify/reels:', error);
@@ -137,50 +169,92 @@ console.log('✅ Internal API URL loaded from .env:', INTERNAL_API_URL);
 // ============================================
 // ASYNC JOB QUEUE FOR AVOIDING 30s TIMEOUT
 // ============================================
-const jobQueue = new Map(); // jobId -> { status, result, error, createdAt }
+// Jobs are persisted in `scrape_jobs` (see server/jobStore.js) so they survive
+// restarts, and run on a bounded pool so bursts can't spawn unbounded poll loops.
+const JOB_CONCURRENCY = parseInt(process.env.ASYNC_JOB_CONCURRENCY || '8', 10);
+const JOB_MAX_QUEUED = parseInt(process.env.ASYNC_JOB_MAX_QUEUED || '500', 10);
+const JOB_RETENTION_MS = 24 * 60 * 60 * 1000; // finished jobs stay pollable for a day
+
+const jobStore = createJobStore(supabaseAdmin);
+const jobPool = new WorkerPool(processJob, { concurrency: JOB_CONCURRENCY, maxQueued: JOB_MAX_QUEUED });
 
 function generateJobId() {
   return `job_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
 }
 
-// Clean up old jobs (older than 10 minutes)
-setInterval(() => {
-  const tenMinutesAgo = Date.now() - 10 * 60 * 1000;
-  for (const [jobId, job] of jobQueue.entries()) {
-    if (job.createdAt < tenMinutesAgo) {
-      jobQueue.delete(jobId);
-      console.log(`🧹 Cleaned up old job: ${jobId}`);
-    }
+// Clean up finished jobs (cache after 10 minutes, table after JOB_RETENTION_MS)
+setInterval(async () => {
+  try {
+    const removed = await jobStore.purge(JOB_RETENTION_MS);
+    if (removed) console.log(`🧹 Cleaned up ${removed} old jobs`);
+  } catch (e) {
+    console.warn('⚠️ Job cleanup failed:', e.message);
   }
 }, 60000); // Run every minute
 
+// Re-queue jobs that were pending/processing when the server last stopped
+(async () => {
+  try {
+    const active = await jobStore.listActive();
+    for (const job of active) jobPool.push(job);
+    if (active.length) console.log(`♻️ Resumed ${active.length} unfinished async jobs`);
+  } catch (e) {
+    console.warn('⚠️ Could not resume async jobs:', e.message);
+  }
+})();
+
 // Submit async scrape job - returns immediately with job ID
 app.post('/api/async/scrape', async (req, res) => {
   try {
-    const url = req.query.url || req.body.url;
+    const rawUrl = req.query.url || req.body.url;
     
-    if (!url) {
+    if (!rawUrl) {
       return res.status(400).json({ 
         success: false, 
         error: 'URL is required' 
       });
     }
+    const url = normalizeReelUrl(rawUrl);
+
+    // Single-flight: a reel that is already being scraped shares that job
+    const shortcode = reelShortcode(url);
+    const existing = jobStore.findActive(shortcode);
+    if (existing) {
+      console.log(`🔗 ${url} attached to in-flight job ${existing.id}`);
+      return res.json({
+        success: true,
+        job_id: existing.id,
+        status: existing.status,
+        deduplicated: true,
+        message: 'Reel already being scraped. Poll /api/async/status/:jobId for results.'
+      });
+    }
+
+    if (jobPool.full) {
+      res.set('Retry-After', '30');
+      return res.status(429).json({
+        success: false,
+        error: 'Too many scrape jobs queued. Retry later.',
+        retry_after_sec: 30,
+      });
+    }
 
     const jobId = generateJobId();
-    
-    // Initialize job
-    jobQueue.set(jobId, {
+    const job = await jobStore.create({
+      id: jobId,
       status: 'pending',
       result: null,
       error: null,
+      upstreamJobId: null,
       createdAt: Date.now(),
-      url: url
+      url: url,
+      shortcode
     });
 
     console.log(`📋 Job ${jobId} created for URL: ${url}`);
 
-    // Start processing in background (don't await)
-    processJob(jobId, url);
+    // Processed in the background as soon as a worker slot is free
+    jobPool.push(job);
 
     // Return immediately with job ID
     res.json({
@@ -214,21 +288,23 @@ async function trackUpstream(url) {
 // a global rate-limit gate to handle concurrent uploads safely) and polls
 // for the result. Holds NO long HTTP connection on our side: each Node call
 // is a fast submit/poll, so we can run many jobs in parallel cheaply.
-async function processJob(jobId, url) {
-  const job = jobQueue.get(jobId);
-  if (!job) return;
+//
+// Runs inside jobPool. A job resumed after a restart that already has an
+// upstream job id skips straight to polling.
+async function processJob(job) {
+  const { id: jobId, url } = job;
 
-  job.status = 'processing';
+  await jobStore.update(jobId, { status: 'processing' });
   console.log(`⚙️ Processing job ${jobId}...`);
 
   // Auto-register for the daily trickle refresh in parallel (best-effort)
-  trackUpstream(url);
+  if (!job.upstreamJobId) trackUpstream(url);
 
   const POLL_INTERVAL_MS = 3000;
   const MAX_POLL_ATTEMPTS = 120; // up to ~6 min for queue + scrape
   const SUBMIT_RETRY_BACKOFF_MS = 15000; // upstream may 503 if all accounts cooled
 
-  let upstreamJobId = null;
+  let upstreamJobId = job.upstreamJobId || null;
 
   // Submit (with backoff on 503 "all accounts cooled down")
   for (let attempt = 1; attempt <= 3 && !upstreamJobId; attempt++) {
@@ -241,7 +317,7 @@ async function processJob(jobId, url) {
       if (res.status === 503) {
         const wait = (body?.detail?.retry_after_sec || 30) * 1000;
         console.log(`⏸️ Upstream throttled (503). Backing off ${wait/1000}s before retry ${attempt}`);
-        job.status = 'queued_for_retry';
+        await jobStore.update(jobId, { status: 'queued_for_retry' });
         await new Promise(r => setTimeout(r, Math.min(wait, SUBMIT_RETRY_BACKOFF_MS * attempt)));
         continue;
       }
@@ -250,17 +326,24 @@ async function processJob(jobId, url) {
       }
       upstreamJobId = body.job_id;
       if (!upstreamJobId) throw new Error(`No job_id in submit response: ${JSON.stringify(body)}`);
+      await jobStore.update(jobId, { status: 'processing', upstreamJobId });
     } catch (e) {
       console.error(`❌ Submit attempt ${attempt} for ${jobId} failed:`, e.message);
       if (attempt === 3) {
-        job.status = 'failed';
-        job.error = e.message;
+        await jobStore.update(jobId, { status: 'failed', error: e.message });
         return;
       }
       await new Promise(r => setTimeout(r, SUBMIT_RETRY_BACKOFF_MS));
     }
   }
 
+  // Every attempt was a 503: fail now instead of polling status/null for ~6 min
+  if (!upstreamJobId) {
+    await jobStore.update(jobId, { status: 'failed', error: 'upstream throttled (503) after 3 attempts' });
+    console.error(`❌ Job ${jobId} failed: upstream throttled (503) after 3 attempts`);
+    return;
+  }
+
   // Poll upstream status until terminal
   for (let attempt = 1; attempt <= MAX_POLL_ATTEMPTS; attempt++) {
     await new Promise(r => setTimeout(r, POLL_INTERVAL_MS));
@@ -273,15 +356,14 @@ async function processJob(jobId, url) {
       const data = await res.json();
       if (data.status === 'completed' && data.result) {
         // `data.result` already matches the shape clients expect: {success, data, ...}
-        job.status = 'completed';
-        job.result = data.result;
+        await jobStore.update(jobId, { status: 'completed', result: data.result });
         console.log(`✅ Job ${jobId} completed via upstream job ${upstreamJobId}`);
         return;
       }
       if (data.status === 'failed') {
-        job.status = 'failed';
-        job.error = data.error || 'Upstream job failed';
-        console.error(`❌ Job ${jobId} failed: ${job.error}`);
+        const error = data.error || 'Upstream job failed';
+        await jobStore.update(jobId, { status: 'failed', error });
+        console.error(`❌ Job ${jobId} failed: ${error}`);
         return;
       }
       // status is 'pending' or 'processing' — keep polling
@@ -290,9 +372,9 @@ async function processJob(jobId, url) {
     }
   }
 
-  job.status = 'failed';
-  job.error = `Timed out polling upstream after ${MAX_POLL_ATTEMPTS * POLL_INTERVAL_MS / 1000}s`;
-  console.error(`❌ Job ${jobId}: ${job.error}`);
+  const error = `Timed out polling upstream after ${MAX_POLL_ATTEMPTS * POLL_INTERVAL_MS / 1000}s`;
+  await jobStore.update(jobId, { status: 'failed', error });
+  console.error(`❌ Job ${jobId}: ${error}`);
 }
 
 // Read cached reel info from upstream — does NOT hit Instagram. Returns whatever
@@ -304,7 +386,8 @@ app.get('/api/reel-info', async (req, res) => {
     if (!url) {
       return res.status(400).json({ success: false, error: 'url query param required' });
     }
-    const upRes = await fetch(`${INTERNAL_API_URL}/reel-info?url=${encodeURIComponent(url)}`);
+    // Canonical URL so every form of a reel's link hits the same upstream cache entry
+    const upRes = await fetch(`${INTERNAL_API_URL}/reel-info?url=${encodeURIComponent(normalizeReelUrl(url))}`);
     const data = await upRes.json().catch(() => ({}));
     return res.status(upRes.status).json(data);
   } catch (e) {
@@ -323,6 +406,7 @@ app.post('/api/track', async (req, res) => {
     if (typeof req.query.urls === 'string') urls.push(req.query.urls);
     if (Array.isArray(req.query.urls)) urls.push(...req.query.urls);
     urls = urls.filter(u => typeof u === 'string' && u.includes('instagram.com'));
+    urls = [...new Set(urls.map(normalizeReelUrl))];
     if (urls.length === 0) {
       return res.status(400).json({ success: false, error: 'No valid Instagram URLs provided' });
     }
@@ -335,6 +419,57 @@ app.post('/api/track', async (req, res) => {
   }
 });
 
+// Upserts one /api/import-reels row. Returns { status: 'inserted' | 'updated', shortcode },
+// or { status: 'error', row, err } for rows without a usable URL; throws on DB errors.
+async function importReel(r) {
+  const url = r.url || r.permalink;
+  if (!url) return { status: 'error', row: r, err: 'no url' };
+  const shortcode = r.shortcode || reelShortcode(url);
+  if (!shortcode) return { status: 'error', row: r, err: 'no shortcode' };
+
+  const payload = {
+    ownerusername: r.ownerusername || null,
+    permalink: url,
+    url: url,
+    shortcode,
+    payout: r.payout == null ? null : Number(r.payout),
+    created_by_email: r.created_by_email || null,
+    created_by_name: r.created_by_name || null,
+    locationname: r.locationname || null,
+    updated_at: new Date().toISOString(),
+  };
+
+  // Existing row: single equality on the unique shortcode index
+  const { data: existing, error: lookupErr } = await supabaseAdmin
+    .from('reels')
+    .select('id, payout')
+    .eq('shortcode', shortcode)
+    .limit(1);
+  if (lookupErr) throw lookupErr;
+
+  let status;
+  if (existing && existing.length > 0) {
+    const id = existing[0].id;
+    // Don't overwrite payout if our incoming value is 0/null (preserve existing data)
+    const upd = { ...payload };
+    if (payload.payout == null || payload.payout === 0) delete upd.payout;
+    const { error: updErr } = await supabaseAdmin.from('reels').update(upd).eq('id', id);
+    if (updErr) throw updErr;
+    status = 'updated';
+  } else {
+    const { error: insErr } = await supabaseAdmin.from('reels').insert(payload);
+    if (insErr) throw insErr;
+    status = 'inserted';
+  }
+
+  // Auto-register for daily trickle refresh upstream (best-effort, non-fatal)
+  if (INTERNAL_API_URL) {
+    fetch(`${INTERNAL_API_URL}/track?urls=${encodeURIComponent(canonicalReelUrl(shortcode))}`, { method: 'POST' })
+      .catch(() => {});
+  }
+  return { status, shortcode };
+}
+
 // Bulk-import reels from the payment-tracking Google Sheet (or any external source).
 // Uses the service-role Supabase client to upsert reels attributed to each handler's
 // email, then auto-tracks each URL upstream so daily trickle refresh picks it up.
@@ -344,6 +479,9 @@ app.post('/api/track', async (req, res) => {
 //
 // Optional protection — set IMPORT_REELS_TOKEN in env to require a matching
 // X-Import-Token header (so random people on the internet can't insert).
+//
+// With `Accept: application/x-ndjson` the reply streams one
+// { type: 'result', shortcode, status } line per reel, then { type: 'done', ... }.
 app.post('/api/import-reels', async (req, res) => {
   // Token gate (optional)
   const expected = process.env.IMPORT_REELS_TOKEN;
@@ -363,71 +501,48 @@ app.post('/api/import-reels', async (req, res) => {
   if (!reels || reels.length === 0) {
     return res.status(400).json({ success: false, error: 'body.reels[] required' });
   }
-  const shortcodeRe = /instagram\.com\/(?:[^/]+\/)?(?:reels?|p)\/([A-Za-z0-9_-]+)/;
   let inserted = 0, updated = 0, errors = 0;
   const errorDetails = [];
+  const stream = wantsNdjson(req) ? ndjsonStream(res) : null;
+  // Stop importing once the client has gone away; whatever was already
+  // upserted stays, and the sync script re-sends the rest on its next run.
+  let clientGone = false;
+  res.on('close', () => { clientGone = true; });
   for (const r of reels) {
+    if (clientGone) {
+      console.warn(`⚠️ /api/import-reels client disconnected after ${inserted + updated + errors}/${reels.length} reels`);
+      return;
+    }
+    let result;
     try {
-      const url = r.url || r.permalink;
-      if (!url) { errors++; errorDetails.push({ row: r, err: 'no url' }); continue; }
-      let shortcode = r.shortcode;
-      if (!shortcode) {
-        const m = shortcodeRe.exec(url);
-        if (m) shortcode = m[1];
-      }
-      if (!shortcode) { errors++; errorDetails.push({ row: r, err: 'no shortcode' }); continue; }
-
-      const payload = {
-        ownerusername: r.ownerusername || null,
-        permalink: url,
-        url: url,
-        shortcode,
-        payout: r.payout == null ? null : Number(r.payout),
-        created_by_email: r.created_by_email || null,
-        created_by_name: r.created_by_name || null,
-        locationname: r.locationname || null,
-        updated_at: new Date().toISOString(),
-      };
-
-      // Look for an existing row by shortcode (preferred) or url
-      const { data: existing, error: lookupErr } = await supabaseAdmin
-        .from('reels')
-        .select('id, payout')
-        .or(`shortcode.eq.${shortcode},url.eq.${url}`)
-        .limit(1);
-      if (lookupErr) throw lookupErr;
-
-      if (existing && existing.length > 0) {
-        const id = existing[0].id;
-        // Don't overwrite payout if our incoming value is 0/null (preserve existing data)
-        const upd = { ...payload };
-        if (payload.payout == null || payload.payout === 0) delete upd.payout;
-        const { error: updErr } = await supabaseAdmin.from('reels').update(upd).eq('id', id);
-        if (updErr) throw updErr;
-        updated++;
-      } else {
-        const { error: insErr } = await supabaseAdmin.from('reels').insert(payload);
-        if (insErr) throw insErr;
-        inserted++;
-      }
-
-      // Auto-register for daily trickle refresh upstream (best-effort, non-fatal)
-      if (INTERNAL_API_URL) {
-        fetch(`${INTERNAL_API_URL}/track?urls=${encodeURIComponent(url)}`, { method: 'POST' })
-          .catch(() => {});
-      }
+      result = await importReel(r);
     } catch (e) {
+      result = { status: 'error', shortcode: r.shortcode, err: e.message };
+    }
+    if (result.status === 'inserted') inserted++;
+    else if (result.status === 'updated') updated++;
+    else {
       errors++;
-      errorDetails.push({ shortcode: r.shortcode, err: e.message });
+      const { status, ...detail } = result;
+      errorDetails.push(detail);
+    }
+    // Streaming: one line per reel so the client keeps progress if the request dies
+    if (stream) {
+      const line = { type: 'result', shortcode: result.shortcode ?? r.shortcode ?? null, status: result.status };
+      if (result.err) line.error = result.err;
+      await stream.write(line);
     }
   }
 
-  res.json({ success: true, inserted, updated, errors, errorDetails: errorDetails.slice(0, 10) });
+  const summary = { success: true, inserted, updated, errors, errorDetails: errorDetails.slice(0, 10) };
+  if (stream) return stream.end({ type: 'done', ...summary });
+  res.json(summary);
 });
 
 
 // Bulk-update view counts for existing reels (used by bulk_refresh_reels.py).
 // Body: { updates: [{ shortcode, videoplaycount, likescount?, commentscount? }, ...] }
+// Every update that carries counts also appends a views_history snapshot.
 app.post('/api/bulk-update-views', async (req, res) => {
   const expected = process.env.IMPORT_REELS_TOKEN;
   if (expected) {
@@ -438,26 +553,128 @@ app.post('/api/bulk-update-views', async (req, res) => {
   const updates = Array.isArray(req.body?.updates) ? req.body.updates : null;
   if (!updates || updates.length === 0) return res.status(400).json({ success: false, error: 'body.updates[] required' });
 
+  const now = new Date().toISOString();
+  const snapshots = [];
   let applied = 0, errors = 0;
   for (const u of updates) {
     if (!u.shortcode) { errors++; continue; }
-    const patch = { lastupdatedat: new Date().toISOString(), refresh_failed: false };
+    // refresh_failed / is_archived are only set when the caller sends them
+    // (vm_refresh_problems.py marks dead reels); a plain refresh clears refresh_failed.
+    const patch = { lastupdatedat: now, refresh_failed: u.refresh_failed === true };
+    if (u.is_archived    != null) patch.is_archived    = u.is_archived === true;
     if (u.videoplaycount != null) patch.videoplaycount = u.videoplaycount;
     if (u.likescount     != null) patch.likescount     = u.likescount;
     if (u.commentscount  != null) patch.commentscount  = u.commentscount;
     if (u.takenat        != null) patch.takenat        = u.takenat;
     if (u.payout         != null) patch.payout         = u.payout;
+    for (const col of METADATA_COLUMNS) {
+      if (u[col] != null) patch[col] = u[col];
+    }
+    // ownerusername comes from the sheet import; a scrape only fills it in
+    // when the row has none (see the conditional update below).
+    const ownerusername = typeof u.ownerusername === 'string' && u.ownerusername ? u.ownerusername : null;
+    const hasCounts = u.videoplaycount != null || u.likescount != null || u.commentscount != null;
     try {
-      const { error } = await supabaseAdmin.from('reels').update(patch).eq('shortcode', u.shortcode);
+      // Return the post-update row so count changes can be snapshotted below
+      // without a second lookup per reel.
+      let q = supabaseAdmin.from('reels').update(patch).eq('shortcode', u.shortcode);
+      if (hasCounts) q = q.select(SNAPSHOT_COLUMNS);
+      const { data, error } = await q;
       if (error) throw error;
+      if (ownerusername) {
+        const { error: ownerError } = await supabaseAdmin
+          .from('reels')
+          .update({ ownerusername })
+          .eq('shortcode', u.shortcode)
+          .or('ownerusername.is.null,ownerusername.eq.');
+        if (ownerError) throw ownerError;
+      }
       applied++;
+      if (hasCounts) {
+        for (const row of data || []) snapshots.push(toViewsSnapshot(row, now));
+      }
     } catch (e) {
       errors++;
     }
   }
-  res.json({ success: true, applied, errors });
+
+  // One batched insert into views_history for the whole request, so growth
+  // analytics get a data point for every refresher write, not only for the
+  // reels someone happened to refresh from the dashboard.
+  let snapshotted = 0;
+  if (snapshots.length > 0) {
+    const { error } = await supabaseAdmin.from('views_history').insert(snapshots);
+    if (error) console.warn(`⚠️ views_history snapshot insert failed: ${error.message}`);
+    else snapshotted = snapshots.length;
+  }
+  res.json({ success: true, applied, errors, snapshotted });
 });
 
+const TOUCH_CHUNK = 100;
+
+// Mark reels as freshly checked without rewriting their counts (used by
+// bulk_refresh_reels.py for reels whose counts didn't change). One UPDATE
+// per 100 shortcodes; doesn't touch counts, so no snapshot or aggregate work.
+// Body: { shortcodes: [string, ...] }
+app.post('/api/touch-reels', async (req, res) => {
+  const expected = process.env.IMPORT_REELS_TOKEN;
+  if (expected) {
+    const provided = req.get('X-Import-Token') || '';
+    if (provided !== expected) return res.status(401).json({ success: false, error: 'Invalid token' });
+  }
+  if (!supabaseAdmin) return res.status(503).json({ success: false, error: 'no service-role client' });
+  const shortcodes = Array.isArray(req.body?.shortcodes)
+    ? req.body.shortcodes.filter(sc => typeof sc === 'string' && sc)
+    : null;
+  if (!shortcodes || shortcodes.length === 0) return res.status(400).json({ success: false, error: 'body.shortcodes[] required' });
+
+  // The shortcode list goes into the request URL (?shortcode=in.(...)), so
+  // large batches are split to keep each URL short.
+  const now = new Date().toISOString();
+  let touched = 0, errors = 0, lastError = null;
+  for (let i = 0; i < shortcodes.length; i += TOUCH_CHUNK) {
+    const chunk = shortcodes.slice(i, i + TOUCH_CHUNK);
+    const { data, error } = await supabaseAdmin
+      .from('reels')
+      .update({ lastupdatedat: now, refresh_failed: false })
+      .in('shortcode', chunk)
+      .select('id');
+    if (error) { errors += chunk.length; lastError = error.message; continue; }
+    touched += (data || []).length;
+  }
+  res.json({ success: errors === 0, touched, errors, ...(lastError ? { error: lastError } : {}) });
+});
+
+// Descriptive reels columns a refresher may send alongside counts (filled by
+// the single-pass instagrapi fetch in scripts/ig_sessions.py). ownerusername
+// and locationname are left out: both are set by the sheet import, and
+// locationname holds the POC, not the Instagram geotag.
+const METADATA_COLUMNS = [
+  'videoviewcount', 'video_duration', 'caption',
+  'ownerfullname', 'ownerid',
+  'audioname', 'audiourl',
+  'thumbnailurl', 'displayurl', 'videourl',
+  'producttype',
+];
+
+const SNAPSHOT_COLUMNS = 'id, shortcode, ownerusername, videoplaycount, videoviewcount, likescount, commentscount, takenat';
+
+// Shape a reels row as a views_history row (see supabase/migrations/20241214_views_history.sql)
+function toViewsSnapshot(row, recordedAt) {
+  return {
+    reel_id: row.id,
+    shortcode: row.shortcode,
+    ownerusername: row.ownerusername,
+    videoplaycount: row.videoplaycount || 0,
+    videoviewcount: row.videoviewcount || 0,
+    likescount: row.likescount || 0,
+    commentscount: row.commentscount || 0,
+    recorded_at: recordedAt,
+    takenat: row.takenat,
+    updated_by_email: null,
+  };
+}
+
 // Bulk-apply bonus payments to existing reels (additive — adds to existing payout).
 // Body shape: { bonuses: [{ ownerusername, amount, shortcode? }, ...] }
 app.post('/api/apply-bonuses', async (req, res) => {
@@ -489,6 +706,24 @@ app.post('/api/apply-bonuses', async (req, res) => {
   res.json({ success: true, applied, missing, errors });
 });
 
+// Fold old views_history into daily/weekly rollups for deployments without
+// pg_cron. rollup_views_history is service-role only, so it runs here rather
+// than from the browser. Body (optional): { daily_after_days, weekly_after_days }
+app.post('/api/rollup-views-history', async (req, res) => {
+  const expected = process.env.IMPORT_REELS_TOKEN;
+  if (expected) {
+    const provided = req.get('X-Import-Token') || '';
+    if (provided !== expected) return res.status(401).json({ success: false, error: 'Invalid token' });
+  }
+  if (!supabaseAdmin) return res.status(503).json({ success: false, error: 'no service-role client' });
+  const args = {};
+  if (Number.isInteger(req.body?.daily_after_days)) args.daily_after_days = req.body.daily_after_days;
+  if (Number.isInteger(req.body?.weekly_after_days)) args.weekly_after_days = req.body.weekly_after_days;
+  const { data, error } = await supabaseAdmin.rpc('rollup_views_history', args);
+  if (error) return res.status(500).json({ success: false, error: error.message });
+  res.json({ success: true, removed: data || 0 });
+});
+
 
 // Snapshot of all tracked reels + last refresh + latest views (handy admin view)
 app.get('/api/track', async (req, res) => {
@@ -503,9 +738,14 @@ app.get('/api/track', async (req, res) => {
 
 
 // Check job status
-app.get('/api/async/status/:jobId', (req, res) => {
+app.get('/api/async/status/:jobId', async (req, res) => {
   const { jobId } = req.params;
-  const job = jobQueue.get(jobId);
+  let job;
+  try {
+    job = await jobStore.get(jobId);
+  } catch (e) {
+    return res.status(503).json({ success: false, error: e.message });
+  }
 
   if (!job) {
     return res.status(404).json({
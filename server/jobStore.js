@@ -0,0 +1,223 @@
+// Durable store + bounded worker pool for /api/async/scrape jobs.
+//
+// Jobs live in the Supabase `scrape_jobs` table so they survive Render
+// restarts: on boot every job still pending/processing is put back on the
+// pool and picks up where it left off (polling the upstream job if one was
+// already submitted). A write-through Map keeps status lookups O(1) in
+// memory; the table (primary key + status index) is only read on a cache
+// miss, e.g. a client polling a job created before the restart.
+//
+// Without a service-role client the same interface is backed by the Map
+// alone (local dev / tests) — jobs then just don't outlive the process.
+//
+// Active jobs are also indexed by reel shortcode so a second request for a
+// reel that is already being scraped attaches to that job (single-flight)
+// instead of spending another upstream scrape.
+
+export const ACTIVE_STATUSES = ['pending', 'processing', 'queued_for_retry'];
+const TERMINAL_STATUSES = ['completed', 'failed'];
+
+function toRow(job) {
+  return {
+    id: job.id,
+    url: job.url,
+    shortcode: job.shortcode ?? null,
+    status: job.status,
+    upstream_job_id: job.upstreamJobId ?? null,
+    result: job.result ?? null,
+    error: job.error ?? null,
+    created_at: new Date(job.createdAt).toISOString(),
+  };
+}
+
+const PATCH_COLUMNS = {
+  status: 'status', upstreamJobId: 'upstream_job_id', result: 'result', error: 'error',
+};
+
+function patchToRow(patch) {
+  const row = { updated_at: new Date().toISOString() };
+  for (const [key, column] of Object.entries(PATCH_COLUMNS)) {
+    if (key in patch) row[column] = patch[key] ?? null;
+  }
+  return row;
+}
+
+function fromRow(row) {
+  return {
+    id: row.id,
+    url: row.url,
+    shortcode: row.shortcode,
+    status: row.status,
+    upstreamJobId: row.upstream_job_id,
+    result: row.result,
+    error: row.error,
+    createdAt: Date.parse(row.created_at),
+  };
+}
+
+// Map-only store. Also the cache layer of the Supabase store.
+export class MemoryJobStore {
+  constructor() {
+    this.jobs = new Map(); // jobId -> job
+    this.inflight = new Map(); // shortcode -> jobId, active jobs only
+  }
+
+  // Active job already scraping `shortcode`, or null. Synchronous so a
+  // check-then-create in one request handler can't interleave with another.
+  findActive(shortcode) {
+    const jobId = shortcode && this.inflight.get(shortcode);
+    return (jobId && this.jobs.get(jobId)) || null;
+  }
+
+  _track(job) {
+    if (!job.shortcode) return;
+    if (ACTIVE_STATUSES.includes(job.status)) {
+      this.inflight.set(job.shortcode, job.id);
+    } else if (this.inflight.get(job.shortcode) === job.id) {
+      this.inflight.delete(job.shortcode);
+    }
+  }
+
+  async create(job) {
+    this.jobs.set(job.id, job);
+    this._track(job);
+    return job;
+  }
+
+  async get(jobId) {
+    return this.jobs.get(jobId) || null;
+  }
+
+  async update(jobId, patch) {
+    const job = this.jobs.get(jobId);
+    if (job) {
+      Object.assign(job, patch);
+      this._track(job);
+    }
+    return job || null;
+  }
+
+  async listActive() {
+    return [...this.jobs.values()].filter(j => ACTIVE_STATUSES.includes(j.status));
+  }
+
+  // Drops finished jobs older than `maxAgeMs`; returns how many were removed.
+  async purge(maxAgeMs) {
+    const cutoff = Date.now() - maxAgeMs;
+    let removed = 0;
+    for (const [jobId, job] of this.jobs.entries()) {
+      if (TERMINAL_STATUSES.includes(job.status) && job.createdAt < cutoff) {
+        this.jobs.delete(jobId);
+        removed++;
+      }
+    }
+    return removed;
+  }
+}
+
+export class SupabaseJobStore extends MemoryJobStore {
+  constructor(supabase, { table = 'scrape_jobs', cacheTtlMs = 10 * 60 * 1000 } = {}) {
+    super();
+    this.supabase = supabase;
+    this.table = table;
+    this.cacheTtlMs = cacheTtlMs;
+  }
+
+  async create(job) {
+    await super.create(job);
+    const { error } = await this.supabase.from(this.table).insert(toRow(job));
+    if (error) console.warn(`⚠️ scrape_jobs insert ${job.id} failed: ${error.message}`);
+    return job;
+  }
+
+  async get(jobId) {
+    const cached = await super.get(jobId);
+    if (cached) return cached;
+    const { data, error } = await this.supabase
+      .from(this.table).select('*').eq('id', jobId).maybeSingle();
+    if (error) throw new Error(`scrape_jobs lookup failed: ${error.message}`);
+    if (!data) return null;
+    const job = fromRow(data);
+    this.jobs.set(jobId, job);
+    return job;
+  }
+
+  async update(jobId, patch) {
+    const job = await super.update(jobId, patch);
+    const { error } = await this.supabase.from(this.table).update(patchToRow(patch)).eq('id', jobId);
+    if (error) console.warn(`⚠️ scrape_jobs update ${jobId} failed: ${error.message}`);
+    return job;
+  }
+
+  async listActive() {
+    const { data, error } = await this.supabase
+      .from(this.table).select('*').in('status', ACTIVE_STATUSES)
+      .order('created_at', { ascending: true });
+    if (error) throw new Error(`scrape_jobs active scan failed: ${error.message}`);
+    const jobs = (data || []).map(fromRow);
+    for (const job of jobs) {
+      this.jobs.set(job.id, job);
+      this._track(job);
+    }
+    return jobs;
+  }
+
+  // Evicts finished jobs from the cache after `cacheTtlMs` (they are still
+  // served from the table) and deletes table rows older than `maxAgeMs`.
+  async purge(maxAgeMs) {
+    await super.purge(this.cacheTtlMs);
+    const cutoff = new Date(Date.now() - maxAgeMs).toISOString();
+    const { count, error } = await this.supabase
+      .from(this.table).delete({ count: 'exact' })
+      .in('status', TERMINAL_STATUSES).lt('created_at', cutoff);
+    if (error) console.warn(`⚠️ scrape_jobs purge failed: ${error.message}`);
+    return count || 0;
+  }
+}
+
+export function createJobStore(supabase) {
+  return supabase ? new SupabaseJobStore(supabase) : new MemoryJobStore();
+}
+
+// Runs at most `concurrency` jobs at once; the rest wait in FIFO order.
+// `maxQueued` caps the backlog so a burst of submissions is refused (429)
+// instead of piling up unbounded poll loops.
+export class WorkerPool {
+  constructor(handler, { concurrency = 8, maxQueued = 500 } = {}) {
+    this.handler = handler;
+    this.concurrency = concurrency;
+    this.maxQueued = maxQueued;
+    this.queue = [];
+    this.running = 0;
+  }
+
+  get full() {
+    return this.queue.length >= this.maxQueued;
+  }
+
+  // Returns false (and does not enqueue) when the backlog is full.
+  push(job) {
+    if (this.full) return false;
+    this.queue.push(job);
+    this._drain();
+    return true;
+  }
+
+  stats() {
+    return { running: this.running, queued: this.queue.length, concurrency: this.concurrency };
+  }
+
+  _drain() {
+    while (this.running < this.concurrency && this.queue.length > 0) {
+      const job = this.queue.shift();
+      this.running++;
+      Promise.resolve()
+        .then(() => this.handler(job))
+        .catch(e => console.error(`❌ Worker error on ${job.id}:`, e.message))
+        .finally(() => {
+          this.running--;
+          this._drain();
+        });
+    }
+  }
+}
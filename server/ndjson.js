@@ -0,0 +1,45 @@
+// Streaming NDJSON responses for the bulk endpoints.
+//
+// A client opts in with `Accept: application/x-ndjson` (or ?stream=ndjson);
+// everyone else keeps getting the single JSON body. Each result is written as
+// one JSON line the moment it is ready, so callers see progress immediately
+// and keep whatever arrived if the connection drops. Writes wait for the
+// socket to drain, so a slow reader doesn't make the server buffer the
+// whole response.
+
+export function wantsNdjson(req) {
+  return req.query.stream === 'ndjson' || (req.get('Accept') || '').includes('application/x-ndjson');
+}
+
+export function ndjsonStream(res) {
+  res.status(200);
+  res.set({
+    'Content-Type': 'application/x-ndjson; charset=utf-8',
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no', // keep proxies from holding lines back
+  });
+  res.flushHeaders();
+
+  return {
+    async write(obj) {
+      if (res.writableEnded || res.destroyed) return;
+      if (!res.write(JSON.stringify(obj) + '\n')) {
+        // Whichever fires first removes both listeners, so a long stream
+        // doesn't pile up one stale 'close' listener per backpressured write.
+        await new Promise(resolve => {
+          const done = () => {
+            res.off('drain', done);
+            res.off('close', done);
+            resolve();
+          };
+          res.on('drain', done);
+          res.on('close', done);
+        });
+      }
+    },
+    end(obj) {
+      if (res.writableEnded || res.destroyed) return;
+      res.end(obj ? JSON.stringify(obj) + '\n' : undefined);
+    },
+  };
+}
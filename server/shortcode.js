@@ -0,0 +1,23 @@
+// Canonical reel keys, shared by the server's URL-keyed endpoints.
+// Every reel is identified by its shortcode and every URL sent upstream is
+// rebuilt from it, so /reel/, /reels/, /p/ and ?igsh= variants of one reel
+// hit the same cache entry and the same row. Mirrors scripts/shortcodes.py.
+
+const SHORTCODE_RE = /instagram\.com\/(?:[^/]+\/)?(?:reels?|p)\/([A-Za-z0-9_-]+)/;
+
+// Returns the shortcode in an Instagram post/reel URL, or null.
+export function reelShortcode(url) {
+  if (typeof url !== 'string') return null;
+  const m = SHORTCODE_RE.exec(url);
+  return m ? m[1] : null;
+}
+
+export function canonicalReelUrl(shortcode) {
+  return `https://www.instagram.com/reel/${shortcode}/`;
+}
+
+// Canonical form of any reel URL; URLs without a shortcode pass through unchanged.
+export function normalizeReelUrl(url) {
+  const shortcode = reelShortcode(url);
+  return shortcode ? canonicalReelUrl(shortcode) : url;
+}
@@ -8,7 +8,9 @@ import {
   getLatestWeeklySnapshot,
   saveWeeklySnapshot,
   getWeekStart,
+  getSponsoredTotals,
   type WeeklySnapshotRow,
+  type WeeklyTotals,
 } from "@/lib/weeklySnapshot";
 
 const formatViews = (num: number): string => {
@@ -24,21 +26,10 @@ const formatWeekLabel = (isoDate: string): string => {
   return d.toLocaleDateString("en-IN", { day: "numeric", month: "short" });
 };
 
-interface WeeklySummaryProps {
-  totalViews: number;
-  totalReels: number;
-  totalLikes: number;
-  totalComments: number;
-  totalPayout: number;
-}
+const EMPTY_TOTALS: WeeklyTotals = { totalViews: 0, totalReels: 0, totalLikes: 0, totalComments: 0, totalPayout: 0 };
 
-export default function WeeklySummary({
-  totalViews,
-  totalReels,
-  totalLikes,
-  totalComments,
-  totalPayout,
-}: WeeklySummaryProps) {
+export default function WeeklySummary() {
+  const [totals, setTotals] = useState<WeeklyTotals>(EMPTY_TOTALS);
   const [previous, setPrevious] = useState<WeeklySnapshotRow | null>(null);
   const [weekBeforePrevious, setWeekBeforePrevious] = useState<WeeklySnapshotRow | null>(null);
   const [latest, setLatest] = useState<WeeklySnapshotRow | null>(null);
@@ -47,11 +38,21 @@ export default function WeeklySummary({
 
   const loadLatest = async () => {
     setLoading(true);
-    const [twoWeeks, lat] = await Promise.all([getPreviousTwoWeeksSnapshots(), getLatestWeeklySnapshot()]);
-    setPrevious(twoWeeks.previous);
-    setWeekBeforePrevious(twoWeeks.weekBeforePrevious);
-    setLatest(lat);
-    setLoading(false);
+    try {
+      const [twoWeeks, lat, current] = await Promise.all([
+        getPreviousTwoWeeksSnapshots(),
+        getLatestWeeklySnapshot(),
+        getSponsoredTotals(),
+      ]);
+      setTotals(current);
+      setPrevious(twoWeeks.previous);
+      setWeekBeforePrevious(twoWeeks.weekBeforePrevious);
+      setLatest(lat);
+    } catch (e) {
+      toast.error(e instanceof Error ? e.message : "Failed to load weekly totals");
+    } finally {
+      setLoading(false);
+    }
   };
 
   useEffect(() => {
@@ -60,13 +61,17 @@ export default function WeeklySummary({
 
   const handleSave = async () => {
     setSaving(true);
-    const result = await saveWeeklySnapshot({
-      totalViews,
-      totalReels,
-      totalLikes,
-      totalComments,
-      totalPayout,
-    });
+    // Save fresh totals, not the ones loaded when the card mounted
+    let current: WeeklyTotals;
+    try {
+      current = await getSponsoredTotals();
+    } catch (e) {
+      setSaving(false);
+      toast.error(e instanceof Error ? e.message : "Failed to load weekly totals");
+      return;
+    }
+    setTotals(current);
+    const result = await saveWeeklySnapshot(current);
     setSaving(false);
     if (result.success) {
       toast.success("This week’s snapshot saved. Next week you’ll see the comparison here.");
@@ -76,6 +81,7 @@ export default function WeeklySummary({
     }
   };
 
+  const { totalViews, totalReels } = totals;
   const thisWeekStart = getWeekStart();
   const isThisWeekAlreadySaved = latest?.week_start_date === thisWeekStart;
   const viewsGrowth = previous != null ? totalViews - previous.total_views : null;
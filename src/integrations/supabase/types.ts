@@ -14,6 +14,96 @@ export type Database = {
   }
   public: {
     Tables: {
+      creator_stats: {
+        Row: {
+          ownerusername: string
+          total_reels: number
+          total_views: number
+          total_likes: number
+          total_comments: number
+          total_payout: number
+          updated_at: string
+        }
+        Insert: {
+          ownerusername: string
+          total_reels?: number
+          total_views?: number
+          total_likes?: number
+          total_comments?: number
+          total_payout?: number
+          updated_at?: string
+        }
+        Update: {
+          ownerusername?: string
+          total_reels?: number
+          total_views?: number
+          total_likes?: number
+          total_comments?: number
+          total_payout?: number
+          updated_at?: string
+        }
+        Relationships: []
+      }
+      daily_views_growth: {
+        Row: {
+          day: string
+          created_by_email: string
+          shard: number
+          views_growth: number
+          likes_growth: number
+          comments_growth: number
+        }
+        Insert: {
+          day: string
+          created_by_email?: string
+          shard?: number
+          views_growth?: number
+          likes_growth?: number
+          comments_growth?: number
+        }
+        Update: {
+          day?: string
+          created_by_email?: string
+          shard?: number
+          views_growth?: number
+          likes_growth?: number
+          comments_growth?: number
+        }
+        Relationships: []
+      }
+      handler_stats: {
+        Row: {
+          created_by_email: string
+          shard: number
+          total_reels: number
+          total_views: number
+          total_likes: number
+          total_comments: number
+          total_payout: number
+          updated_at: string
+        }
+        Insert: {
+          created_by_email: string
+          shard?: number
+          total_reels?: number
+          total_views?: number
+          total_likes?: number
+          total_comments?: number
+          total_payout?: number
+          updated_at?: string
+        }
+        Update: {
+          created_by_email?: string
+          shard?: number
+          total_reels?: number
+          total_views?: number
+          total_likes?: number
+          total_comments?: number
+          total_payout?: number
+          updated_at?: string
+        }
+        Relationships: []
+      }
       profiles: {
         Row: {
           avatar_url: string | null
@@ -41,6 +131,42 @@ export type Database = {
         }
         Relationships: []
       }
+      scrape_jobs: {
+        Row: {
+          id: string
+          url: string
+          shortcode: string | null
+          status: string
+          upstream_job_id: string | null
+          result: Json | null
+          error: string | null
+          created_at: string
+          updated_at: string
+        }
+        Insert: {
+          id: string
+          url: string
+          shortcode?: string | null
+          status?: string
+          upstream_job_id?: string | null
+          result?: Json | null
+          error?: string | null
+          created_at?: string
+          updated_at?: string
+        }
+        Update: {
+          id?: string
+          url?: string
+          shortcode?: string | null
+          status?: string
+          upstream_job_id?: string | null
+          result?: Json | null
+          error?: string | null
+          created_at?: string
+          updated_at?: string
+        }
+        Relationships: []
+      }
       views_history: {
         Row: {
           id: string
@@ -86,6 +212,33 @@ export type Database = {
         }
         Relationships: []
       }
+      views_history_rollup: {
+        Row: {
+          reel_id: string
+          resolution: string
+          bucket: string
+          videoplaycount: number
+          likescount: number
+          commentscount: number
+        }
+        Insert: {
+          reel_id: string
+          resolution: string
+          bucket: string
+          videoplaycount?: number
+          likescount?: number
+          commentscount?: number
+        }
+        Update: {
+          reel_id?: string
+          resolution?: string
+          bucket?: string
+          videoplaycount?: number
+          likescount?: number
+          commentscount?: number
+        }
+        Relationships: []
+      }
       reels: {
         Row: {
           audioname: string | null
@@ -238,7 +391,18 @@ export type Database = {
       [_ in never]: never
     }
     Functions: {
-      [_ in never]: never
+      count_reels_with_snapshots: {
+        Args: { start_at: string; end_at: string; handler_email?: string }
+        Returns: number
+      }
+      rebuild_dashboard_aggregates: {
+        Args: Record<PropertyKey, never>
+        Returns: undefined
+      }
+      rollup_views_history: {
+        Args: { daily_after_days?: number; weekly_after_days?: number }
+        Returns: number
+      }
     }
     Enums: {
       [_ in never]: never
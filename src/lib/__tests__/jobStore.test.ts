@@ -0,0 +1,138 @@
+/**
+ * Tests for the /api/async/scrape job store and worker pool (server/jobStore.js)
+ *
+ * Covers the job lifecycle in the Map-backed store (enqueue, claim, complete),
+ * the shortcode single-flight index, and the WorkerPool concurrency and
+ * backlog limits.
+ */
+
+import { describe, it, expect, vi } from 'vitest';
+import { MemoryJobStore, WorkerPool, createJobStore } from '../../../server/jobStore.js';
+
+function makeJob(id: string, shortcode: string | null = null) {
+  return { id, url: `https://www.instagram.com/reel/${shortcode ?? id}/`, shortcode, status: 'pending', createdAt: Date.now() };
+}
+
+/** Resolves once every queued microtask / promise callback has run */
+const flush = () => new Promise(resolve => setTimeout(resolve, 0));
+
+describe('MemoryJobStore', () => {
+  it('is used when there is no service-role client', () => {
+    expect(createJobStore(null)).toBeInstanceOf(MemoryJobStore);
+  });
+
+  it('enqueues, claims and completes a job', async () => {
+    const store = new MemoryJobStore();
+    await store.create(makeJob('job-1', 'ABC123'));
+
+    expect((await store.get('job-1'))?.status).toBe('pending');
+    expect((await store.listActive()).map(j => j.id)).toEqual(['job-1']);
+
+    await store.update('job-1', { status: 'processing', upstreamJobId: 'up-1' });
+    const claimed = await store.get('job-1');
+    expect(claimed?.status).toBe('processing');
+    expect(claimed?.upstreamJobId).toBe('up-1');
+    expect(await store.listActive()).toHaveLength(1);
+
+    await store.update('job-1', { status: 'completed', result: { videoplaycount: 42 } });
+    const done = await store.get('job-1');
+    expect(done?.status).toBe('completed');
+    expect(done?.result).toEqual({ videoplaycount: 42 });
+    expect(await store.listActive()).toEqual([]);
+  });
+
+  it('returns null for unknown jobs', async () => {
+    const store = new MemoryJobStore();
+    expect(await store.get('missing')).toBeNull();
+    expect(await store.update('missing', { status: 'failed' })).toBeNull();
+  });
+
+  it('tracks the active job per shortcode until it finishes', async () => {
+    const store = new MemoryJobStore();
+    await store.create(makeJob('job-1', 'ABC123'));
+
+    expect(store.findActive('ABC123')?.id).toBe('job-1');
+    expect(store.findActive('OTHER')).toBeNull();
+
+    await store.update('job-1', { status: 'failed', error: 'boom' });
+    expect(store.findActive('ABC123')).toBeNull();
+  });
+
+  it('purges only finished jobs older than the cutoff', async () => {
+    const store = new MemoryJobStore();
+    const old = Date.now() - 60_000;
+    await store.create({ ...makeJob('done'), status: 'completed', createdAt: old });
+    await store.create({ ...makeJob('running'), status: 'processing', createdAt: old });
+    await store.create({ ...makeJob('fresh'), status: 'completed' });
+
+    expect(await store.purge(30_000)).toBe(1);
+    expect(await store.get('done')).toBeNull();
+    expect(await store.get('running')).not.toBeNull();
+    expect(await store.get('fresh')).not.toBeNull();
+  });
+});
+
+describe('WorkerPool', () => {
+  it('never runs more than `concurrency` jobs at once', async () => {
+    let running = 0;
+    let peak = 0;
+    const release: Array<() => void> = [];
+    const handler = vi.fn(async () => {
+      running++;
+      peak = Math.max(peak, running);
+      await new Promise<void>(resolve => release.push(resolve));
+      running--;
+    });
+
+    const pool = new WorkerPool(handler, { concurrency: 2, maxQueued: 10 });
+    for (let i = 0; i < 5; i++) expect(pool.push(makeJob(`job-${i}`))).toBe(true);
+    await flush();
+
+    expect(handler).toHaveBeenCalledTimes(2);
+    expect(pool.stats()).toEqual({ running: 2, queued: 3, concurrency: 2 });
+
+    // Finishing one job starts exactly one more
+    release.shift()!();
+    await flush();
+    expect(handler).toHaveBeenCalledTimes(3);
+    expect(pool.stats().running).toBe(2);
+
+    while (release.length > 0) {
+      release.shift()!();
+      await flush();
+    }
+    expect(handler).toHaveBeenCalledTimes(5);
+    expect(peak).toBe(2);
+    expect(pool.stats()).toEqual({ running: 0, queued: 0, concurrency: 2 });
+  });
+
+  it('refuses new jobs once the backlog is full', async () => {
+    const handler = vi.fn(() => new Promise<void>(() => {}));
+    const pool = new WorkerPool(handler, { concurrency: 1, maxQueued: 2 });
+
+    expect(pool.push(makeJob('a'))).toBe(true); // starts running
+    expect(pool.push(makeJob('b'))).toBe(true);
+    expect(pool.push(makeJob('c'))).toBe(true);
+    expect(pool.full).toBe(true);
+    expect(pool.push(makeJob('d'))).toBe(false);
+    expect(pool.stats().queued).toBe(2);
+  });
+
+  it('keeps draining after a handler throws', async () => {
+    const errorSpy = vi.spyOn(console, 'error').mockImplementation(() => {});
+    const seen: string[] = [];
+    const pool = new WorkerPool(async (job: { id: string }) => {
+      seen.push(job.id);
+      if (job.id === 'bad') throw new Error('boom');
+    }, { concurrency: 1 });
+
+    pool.push(makeJob('bad'));
+    pool.push(makeJob('good'));
+    await flush();
+    await flush();
+
+    expect(seen).toEqual(['bad', 'good']);
+    expect(pool.stats().running).toBe(0);
+    errorSpy.mockRestore();
+  });
+});
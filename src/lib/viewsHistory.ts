@@ -172,20 +172,26 @@ export async function getViewsInRange(
   try {
     console.log(`📊 Fetching views history from ${startDate.toISOString()} to ${endDate.toISOString()}`);
     
-    // Get all snapshots in the date range
-    const { data: snapshots, error } = await supabase
-      .from('views_history')
-      .select('reel_id, videoplaycount, likescount, shortcode, ownerusername, recorded_at')
-      .gte('recorded_at', startDate.toISOString())
-      .lte('recorded_at', endDate.toISOString())
-      .order('recorded_at', { ascending: true });
+    // Get all snapshots in the date range: raw rows for the recent window,
+    // rolled-up buckets for anything older (see rollup_views_history)
+    const [{ data: raw, error }, rolled] = await Promise.all([
+      supabase
+        .from('views_history')
+        .select('reel_id, videoplaycount, likescount, shortcode, ownerusername, recorded_at')
+        .gte('recorded_at', startDate.toISOString())
+        .lte('recorded_at', endDate.toISOString())
+        .order('recorded_at', { ascending: true }),
+      getRollupSnapshots({ startDate, endDate }),
+    ]);
 
     if (error) {
       console.error('Error fetching views history:', error);
       return [];
     }
 
-    if (!snapshots || snapshots.length === 0) {
+    // Rollup buckets are older than every raw snapshot, so they go first
+    const snapshots = [...rolled, ...(raw || [])];
+    if (snapshots.length === 0) {
       console.log('📊 No views history snapshots found in date range');
       return [];
     }
@@ -248,25 +254,146 @@ export async function getViewsInRange(
   }
 }
 
+export interface DailyViewsGrowth {
+  day: string;
+  views_growth: number;
+  likes_growth: number;
+  comments_growth: number;
+}
+
+export interface StatsTotals {
+  key: string;
+  total_reels: number;
+  total_views: number;
+  total_likes: number;
+  total_comments: number;
+  total_payout: number;
+}
+
 /**
- * Get total views growth for all reels in a date range
+ * Get per-day growth in a date range from the pre-aggregated
+ * daily_views_growth table (one row per day per handler shard).
+ * Pass userEmail to restrict to one handler's reels.
+ */
+export async function getDailyViewsGrowth(
+  startDate: Date,
+  endDate: Date,
+  userEmail?: string
+): Promise<DailyViewsGrowth[]> {
+  try {
+    let query = supabase
+      .from('daily_views_growth')
+      .select('day, views_growth, likes_growth, comments_growth')
+      .gte('day', startDate.toISOString().slice(0, 10))
+      .lte('day', endDate.toISOString().slice(0, 10))
+      .order('day', { ascending: true });
+
+    if (userEmail) {
+      query = query.eq('created_by_email', userEmail);
+    }
+
+    const { data, error } = await query;
+    if (error || !data) {
+      console.error('Error fetching daily views growth:', error);
+      return [];
+    }
+
+    // Collapse handlers and shards into one row per day
+    const byDay = new Map<string, DailyViewsGrowth>();
+    data.forEach(row => {
+      const day = byDay.get(row.day) || { day: row.day, views_growth: 0, likes_growth: 0, comments_growth: 0 };
+      day.views_growth += row.views_growth || 0;
+      day.likes_growth += row.likes_growth || 0;
+      day.comments_growth += row.comments_growth || 0;
+      byDay.set(row.day, day);
+    });
+    return Array.from(byDay.values());
+  } catch (err) {
+    console.error('❌ Error getting daily views growth:', err);
+    return [];
+  }
+}
+
+/**
+ * Get total views growth for all reels in a date range.
+ * Growth is summed from the pre-aggregated daily_views_growth table;
+ * reelsCount is the number of distinct reels with a snapshot in the range.
  */
 export async function getTotalViewsGrowth(
   startDate: Date,
   endDate: Date,
   userEmail?: string
 ): Promise<{ totalViewsGrowth: number; totalLikesGrowth: number; reelsCount: number }> {
-  const viewsData = await getViewsInRange(startDate, endDate, userEmail);
-  
+  const [days, reels] = await Promise.all([
+    getDailyViewsGrowth(startDate, endDate, userEmail),
+    supabase.rpc('count_reels_with_snapshots', {
+      start_at: startDate.toISOString(),
+      end_at: endDate.toISOString(),
+      ...(userEmail ? { handler_email: userEmail } : {}),
+    }),
+  ]);
+  if (reels.error) {
+    console.error('Error counting reels with snapshots:', reels.error);
+  }
+
   return {
-    totalViewsGrowth: viewsData.reduce((sum, r) => sum + r.views_growth, 0),
-    totalLikesGrowth: viewsData.reduce((sum, r) => sum + r.likes_growth, 0),
-    reelsCount: viewsData.length,
+    totalViewsGrowth: days.reduce((sum, d) => sum + d.views_growth, 0),
+    totalLikesGrowth: days.reduce((sum, d) => sum + d.likes_growth, 0),
+    reelsCount: reels.data || 0,
   };
 }
 
 /**
- * Get views history for a specific reel
+ * Get running totals per creator (ownerusername) from creator_stats.
+ * Reels with no ownerusername are under key ''.
+ */
+export async function getCreatorTotals(): Promise<StatsTotals[]> {
+  const { data, error } = await supabase
+    .from('creator_stats')
+    .select('ownerusername, total_reels, total_views, total_likes, total_comments, total_payout')
+    .order('total_views', { ascending: false });
+  if (error || !data) {
+    console.error('Error fetching creator totals:', error);
+    return [];
+  }
+  return data.map(({ ownerusername, ...totals }) => ({ key: ownerusername, ...totals }));
+}
+
+/**
+ * Get running totals per handler (created_by_email) from handler_stats.
+ * Each handler is split over several shard rows, summed here; reels with no
+ * handler are under key ''.
+ */
+export async function getHandlerTotals(userEmail?: string): Promise<StatsTotals[]> {
+  let query = supabase
+    .from('handler_stats')
+    .select('created_by_email, total_reels, total_views, total_likes, total_comments, total_payout');
+  if (userEmail) {
+    query = query.eq('created_by_email', userEmail);
+  }
+  const { data, error } = await query;
+  if (error || !data) {
+    console.error('Error fetching handler totals:', error);
+    return [];
+  }
+  const byHandler = new Map<string, StatsTotals>();
+  data.forEach(row => {
+    const totals = byHandler.get(row.created_by_email) || {
+      key: row.created_by_email, total_reels: 0, total_views: 0, total_likes: 0, total_comments: 0, total_payout: 0,
+    };
+    totals.total_reels += row.total_reels || 0;
+    totals.total_views += row.total_views || 0;
+    totals.total_likes += row.total_likes || 0;
+    totals.total_comments += row.total_comments || 0;
+    totals.total_payout += Number(row.total_payout) || 0;
+    byHandler.set(row.created_by_email, totals);
+  });
+  return Array.from(byHandler.values()).sort((a, b) => b.total_views - a.total_views);
+}
+
+/**
+ * Get views history for a specific reel, newest first. Raw snapshots come
+ * first; once they run out, older daily/weekly rollup buckets fill the rest.
  */
 export async function getReelViewsHistory(
   reelId: string,
@@ -285,13 +412,78 @@ export async function getReelViewsHistory(
       return [];
     }
 
-    return (data as ViewsSnapshot[]) || [];
+    const raw = (data as ViewsSnapshot[]) || [];
+    if (raw.length >= limit) return raw;
+
+    const rolled = await getRollupSnapshots({ reelId, limit: limit - raw.length, template: raw[0] });
+    return [...raw, ...rolled.reverse()];
   } catch (err) {
     console.error('❌ Error getting reel views history:', err);
     return [];
   }
 }
 
+/**
+ * Read views_history_rollup buckets as ViewsSnapshot rows, oldest first.
+ * A bucket's recorded_at is the start of its day (d) or ISO week (w).
+ * Rollups carry only counts, so shortcode/ownerusername come from `template`
+ * or the reels table.
+ */
+async function getRollupSnapshots(opts: {
+  startDate?: Date;
+  endDate?: Date;
+  reelId?: string;
+  limit?: number;
+  template?: ViewsSnapshot;
+}): Promise<ViewsSnapshot[]> {
+  let query = supabase
+    .from('views_history_rollup')
+    .select('reel_id, resolution, bucket, videoplaycount, likescount, commentscount');
+  if (opts.reelId) query = query.eq('reel_id', opts.reelId);
+  if (opts.startDate) query = query.gte('bucket', opts.startDate.toISOString().slice(0, 10));
+  if (opts.endDate) query = query.lte('bucket', opts.endDate.toISOString().slice(0, 10));
+  // With a limit, keep the newest buckets (then flip back to oldest first)
+  query = query.order('bucket', { ascending: opts.limit == null });
+  if (opts.limit != null) query = query.limit(opts.limit);
+
+  const { data, error } = await query;
+  if (error || !data || data.length === 0) {
+    if (error) console.error('Error fetching views history rollup:', error);
+    return [];
+  }
+  const rows = opts.limit == null ? data : [...data].reverse();
+
+  const reels = new Map<string, { shortcode: string; ownerusername: string | null; takenat: string | null }>();
+  if (opts.template) {
+    const { shortcode, ownerusername, takenat } = opts.template;
+    reels.set(opts.template.reel_id, { shortcode, ownerusername, takenat });
+  }
+  const missing = Array.from(new Set(rows.map(r => r.reel_id))).filter(id => !reels.has(id));
+  for (let i = 0; i < missing.length; i += 200) {
+    const { data: found } = await supabase
+      .from('reels')
+      .select('id, shortcode, ownerusername, takenat')
+      .in('id', missing.slice(i, i + 200));
+    (found || []).forEach(r => reels.set(r.id, { shortcode: r.shortcode || '', ownerusername: r.ownerusername, takenat: r.takenat }));
+  }
+
+  return rows.map(r => {
+    const reel = reels.get(r.reel_id);
+    return {
+      reel_id: r.reel_id,
+      shortcode: reel?.shortcode || '',
+      ownerusername: reel?.ownerusername ?? null,
+      videoplaycount: r.videoplaycount || 0,
+      videoviewcount: 0,
+      likescount: r.likescount || 0,
+      commentscount: r.commentscount || 0,
+      recorded_at: new Date(`${r.bucket}T00:00:00Z`).toISOString(),
+      takenat: reel?.takenat ?? null,
+      updated_by_email: null,
+    };
+  });
+}
+
 /**
  * Get latest snapshot for a reel
  */
@@ -314,29 +506,3 @@ export async function getLatestSnapshot(reelId: string): Promise<ViewsSnapshot |
     return null;
   }
 }
-
-/**
- * Delete old snapshots to manage storage
- */
-export async function cleanupOldSnapshots(daysToKeep: number = 90): Promise<number> {
-  try {
-    const cutoffDate = new Date();
-    cutoffDate.setDate(cutoffDate.getDate() - daysToKeep);
-
-    const { data, error } = await supabase
-      .from('views_history')
-      .delete()
-      .lt('recorded_at', cutoffDate.toISOString())
-      .select('id');
-
-    if (error) {
-      console.error('Error cleaning up old snapshots:', error);
-      return 0;
-    }
-
-    return data?.length || 0;
-  } catch (err) {
-    console.error('❌ Error cleaning up old snapshots:', err);
-    return 0;
-  }
-}
\ No newline at end of file
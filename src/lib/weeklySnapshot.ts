@@ -1,4 +1,17 @@
 import { supabase } from "@/integrations/supabase/client";
+import { getCreatorTotals } from "@/lib/viewsHistory";
+
+/** Organic (@buyhatke) reels are left out of the weekly numbers */
+const ORGANIC_OWNER = "buyhatke";
+const ORGANIC_HANDLER = "organic@buyhatke.com";
+
+export interface WeeklyTotals {
+  totalViews: number;
+  totalReels: number;
+  totalLikes: number;
+  totalComments: number;
+  totalPayout: number;
+}
 
 export interface WeeklySnapshotRow {
   id: string;
@@ -21,17 +34,61 @@ export function getWeekStart(date: Date = new Date()): string {
   return d.toISOString().slice(0, 10);
 }
 
+/** Supabase returns at most 1000 rows per request */
+const PAGE_SIZE = 1000;
+
+/**
+ * Current sponsored totals, read from the pre-aggregated creator_stats table.
+ * Same scope as the old client-side count: reels with a creator other than
+ * @buyhatke and a handler other than the organic one. creator_stats can't
+ * split by handler, so the few reels with a real creator but no handler or
+ * the organic handler are fetched (all pages) and subtracted.
+ */
+export async function getSponsoredTotals(): Promise<WeeklyTotals> {
+  const fetchExcluded = async () => {
+    const rows: { videoplaycount: number | null; likescount: number | null; commentscount: number | null; payout: number | null }[] = [];
+    for (let from = 0; ; from += PAGE_SIZE) {
+      const { data, error } = await supabase
+        .from("reels")
+        .select("videoplaycount, likescount, commentscount, payout")
+        .or(`created_by_email.is.null,created_by_email.eq.${ORGANIC_HANDLER}`)
+        .not("ownerusername", "is", null)
+        .neq("ownerusername", ORGANIC_OWNER)
+        .neq("ownerusername", "")
+        .order("id")
+        .range(from, from + PAGE_SIZE - 1);
+      if (error) throw new Error(`Error fetching organic-handler reels: ${error.message}`);
+      rows.push(...(data || []));
+      if (!data || data.length < PAGE_SIZE) return rows;
+    }
+  };
+  const [creators, excluded] = await Promise.all([getCreatorTotals(), fetchExcluded()]);
+
+  const totals: WeeklyTotals = { totalViews: 0, totalReels: 0, totalLikes: 0, totalComments: 0, totalPayout: 0 };
+  for (const c of creators) {
+    // '' holds reels with no ownerusername
+    if (c.key === ORGANIC_OWNER || c.key === "") continue;
+    totals.totalViews += c.total_views;
+    totals.totalReels += c.total_reels;
+    totals.totalLikes += c.total_likes;
+    totals.totalComments += c.total_comments;
+    totals.totalPayout += Number(c.total_payout) || 0;
+  }
+  for (const r of excluded) {
+    totals.totalViews -= Number(r.videoplaycount) || 0;
+    totals.totalReels -= 1;
+    totals.totalLikes -= Number(r.likescount) || 0;
+    totals.totalComments -= Number(r.commentscount) || 0;
+    totals.totalPayout -= Number(r.payout) || 0;
+  }
+  return totals;
+}
+
 /**
  * Save current week's snapshot. Uses week_start_date = Monday of current week.
  * If this week already has a snapshot, it is updated.
  */
-export async function saveWeeklySnapshot(stats: {
-  totalViews: number;
-  totalReels: number;
-  totalLikes: number;
-  totalComments: number;
-  totalPayout: number;
-}): Promise<{ success: boolean; error?: string }> {
+export async function saveWeeklySnapshot(stats: WeeklyTotals): Promise<{ success: boolean; error?: string }> {
   try {
     const weekStart = getWeekStart();
     const { error } = await supabase.from("weekly_snapshots").upsert(
@@ -642,11 +642,6 @@ const Dashboard = () => {
   const yourStats = calculateStats(yourReels);
   const allStats = calculateStats(allReels);
   const globalStats = calculateStats(globalReels.length > 0 ? globalReels : allReels);
-  // Weekly stats exclude @buyhatke (organic profile) so the weekly views/payouts
-  // story isn't polluted by organic content. Organic still shows in totalViews etc.
-  const sponsoredOnly = (globalReels.length > 0 ? globalReels : allReels)
-    .filter(r => r.ownerusername !== "buyhatke");
-  const weeklyStats = calculateStats(sponsoredOnly);
   const organicOnly = (globalReels.length > 0 ? globalReels : allReels)
     .filter(r => r.ownerusername === "buyhatke");
   const organicViews = organicViewsTotal || organicOnly.reduce((sum, r) => sum + (Number(r.videoplaycount) || 0), 0);
@@ -924,13 +919,7 @@ const Dashboard = () => {
               </CardContent>
             </Card>
 
-            <WeeklySummary
-              totalViews={weeklyStats.totalViews}
-              totalReels={weeklyStats.totalReels}
-              totalLikes={weeklyStats.totalLikes}
-              totalComments={weeklyStats.totalComments}
-              totalPayout={weeklyStats.totalPayout}
-            />
+            <WeeklySummary />
             <StatsCards {...allStats} />
             {viewMode === "map" ? (
               <LocationMap 
@@ -0,0 +1,95 @@
+-- Compact, downsampled storage for old views_history snapshots
+-- Raw snapshots (one wide row each) are kept for the recent window only.
+-- Older data is folded into one row per reel per day, and older still into
+-- one row per reel per week, so long-range growth charts keep working while
+-- storage and scan cost stay bounded as reels x snapshots grows.
+
+CREATE TABLE IF NOT EXISTS public.views_history_rollup (
+    reel_id text NOT NULL REFERENCES public.reels(id) ON DELETE CASCADE,
+    -- 'd' = daily bucket, 'w' = weekly bucket (bucket = Monday of the week)
+    resolution char(1) NOT NULL CHECK (resolution IN ('d', 'w')),
+    bucket date NOT NULL,
+
+    -- Highest counts seen in the bucket (counts only grow, so this is the
+    -- value at the end of the bucket)
+    videoplaycount bigint NOT NULL DEFAULT 0,
+    likescount bigint NOT NULL DEFAULT 0,
+    commentscount bigint NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (reel_id, resolution, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS idx_views_history_rollup_bucket ON public.views_history_rollup(resolution, bucket);
+
+ALTER TABLE public.views_history_rollup ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view views history rollup" ON public.views_history_rollup
+    FOR SELECT USING (true);
+
+COMMENT ON TABLE public.views_history_rollup IS 'Daily/weekly downsampled views_history for long-range growth charts';
+COMMENT ON COLUMN public.views_history_rollup.bucket IS 'Start date of the day (resolution d) or ISO week (resolution w)';
+
+-- Fold raw snapshots older than `daily_after_days` into daily buckets, and
+-- daily buckets older than `weekly_after_days` into weekly buckets. Folded
+-- rows are deleted. Safe to run repeatedly; returns number of rows removed.
+CREATE OR REPLACE FUNCTION public.rollup_views_history(
+    daily_after_days int DEFAULT 90,
+    weekly_after_days int DEFAULT 365
+)
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    daily_cutoff timestamptz := now() - make_interval(days => daily_after_days);
+    weekly_cutoff date := (now() - make_interval(days => weekly_after_days))::date;
+    raw_removed int;
+    daily_removed int;
+BEGIN
+    -- 1) raw -> daily
+    INSERT INTO public.views_history_rollup AS r
+        (reel_id, resolution, bucket, videoplaycount, likescount, commentscount)
+    SELECT reel_id, 'd', (recorded_at AT TIME ZONE 'UTC')::date,
+           max(coalesce(videoplaycount, 0)), max(coalesce(likescount, 0)), max(coalesce(commentscount, 0))
+    FROM public.views_history
+    WHERE recorded_at < daily_cutoff
+    GROUP BY reel_id, (recorded_at AT TIME ZONE 'UTC')::date
+    ON CONFLICT (reel_id, resolution, bucket) DO UPDATE SET
+        videoplaycount = greatest(r.videoplaycount, excluded.videoplaycount),
+        likescount     = greatest(r.likescount,     excluded.likescount),
+        commentscount  = greatest(r.commentscount,  excluded.commentscount);
+
+    DELETE FROM public.views_history WHERE recorded_at < daily_cutoff;
+    GET DIAGNOSTICS raw_removed = ROW_COUNT;
+
+    -- 2) daily -> weekly
+    INSERT INTO public.views_history_rollup AS r
+        (reel_id, resolution, bucket, videoplaycount, likescount, commentscount)
+    SELECT reel_id, 'w', date_trunc('week', bucket)::date,
+           max(videoplaycount), max(likescount), max(commentscount)
+    FROM public.views_history_rollup
+    WHERE resolution = 'd' AND bucket < weekly_cutoff
+    GROUP BY reel_id, date_trunc('week', bucket)::date
+    ON CONFLICT (reel_id, resolution, bucket) DO UPDATE SET
+        videoplaycount = greatest(r.videoplaycount, excluded.videoplaycount),
+        likescount     = greatest(r.likescount,     excluded.likescount),
+        commentscount  = greatest(r.commentscount,  excluded.commentscount);
+
+    DELETE FROM public.views_history_rollup WHERE resolution = 'd' AND bucket < weekly_cutoff;
+    GET DIAGNOSTICS daily_removed = ROW_COUNT;
+
+    RETURN raw_removed + daily_removed;
+END;
+$$;
+
+COMMENT ON FUNCTION public.rollup_views_history IS 'Downsample old views_history snapshots into views_history_rollup (daily, then weekly)';
+
+-- Run nightly where pg_cron is available (Supabase: Database -> Extensions -> pg_cron)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule('rollup-views-history', '30 3 * * *', 'SELECT public.rollup_views_history()');
+    END IF;
+END;
+$$;
@@ -0,0 +1,167 @@
+-- Pre-aggregated totals for the dashboard and analytics pages
+-- creator_stats / handler_stats hold running totals per ownerusername and per
+-- created_by_email; daily_views_growth holds per-day, per-handler growth.
+-- They are maintained incrementally by a trigger on reels, so every write
+-- from the Python refreshers (via /api/bulk-update-views) updates a handful
+-- of aggregate rows and dashboards read a few hundred rows instead of
+-- scanning views_history.
+
+CREATE TABLE IF NOT EXISTS public.creator_stats (
+    ownerusername text PRIMARY KEY,
+    total_reels int NOT NULL DEFAULT 0,
+    total_views bigint NOT NULL DEFAULT 0,
+    total_likes bigint NOT NULL DEFAULT 0,
+    total_comments bigint NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.handler_stats (
+    created_by_email text PRIMARY KEY,
+    total_reels int NOT NULL DEFAULT 0,
+    total_views bigint NOT NULL DEFAULT 0,
+    total_likes bigint NOT NULL DEFAULT 0,
+    total_comments bigint NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- created_by_email = '' collects reels with no handler
+CREATE TABLE IF NOT EXISTS public.daily_views_growth (
+    day date NOT NULL,
+    created_by_email text NOT NULL DEFAULT '',
+    views_growth bigint NOT NULL DEFAULT 0,
+    likes_growth bigint NOT NULL DEFAULT 0,
+    comments_growth bigint NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, created_by_email)
+);
+
+CREATE INDEX IF NOT EXISTS idx_daily_views_growth_email_day ON public.daily_views_growth(created_by_email, day);
+
+ALTER TABLE public.creator_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.handler_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.daily_views_growth ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Anyone can view creator stats" ON public.creator_stats FOR SELECT USING (true);
+CREATE POLICY "Anyone can view handler stats" ON public.handler_stats FOR SELECT USING (true);
+CREATE POLICY "Anyone can view daily views growth" ON public.daily_views_growth FOR SELECT USING (true);
+
+COMMENT ON TABLE public.creator_stats IS 'Running reel/view/like/comment totals per ownerusername (maintained by trigger on reels)';
+COMMENT ON TABLE public.handler_stats IS 'Running reel/view/like/comment totals per created_by_email (maintained by trigger on reels)';
+COMMENT ON TABLE public.daily_views_growth IS 'Views/likes/comments gained per day per handler (maintained by trigger on reels)';
+
+-- Add (sign = 1) or remove (sign = -1) one reel's contribution to the totals
+CREATE OR REPLACE FUNCTION public.apply_reel_to_stats(r public.reels, sign int)
+RETURNS void
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+    IF r.ownerusername IS NOT NULL THEN
+        INSERT INTO public.creator_stats AS s (ownerusername, total_reels, total_views, total_likes, total_comments)
+        VALUES (r.ownerusername, sign, sign * coalesce(r.videoplaycount, 0),
+                sign * coalesce(r.likescount, 0), sign * coalesce(r.commentscount, 0))
+        ON CONFLICT (ownerusername) DO UPDATE SET
+            total_reels    = s.total_reels    + excluded.total_reels,
+            total_views    = s.total_views    + excluded.total_views,
+            total_likes    = s.total_likes    + excluded.total_likes,
+            total_comments = s.total_comments + excluded.total_comments,
+            updated_at     = now();
+    END IF;
+
+    IF r.created_by_email IS NOT NULL THEN
+        INSERT INTO public.handler_stats AS s (created_by_email, total_reels, total_views, total_likes, total_comments)
+        VALUES (r.created_by_email, sign, sign * coalesce(r.videoplaycount, 0),
+                sign * coalesce(r.likescount, 0), sign * coalesce(r.commentscount, 0))
+        ON CONFLICT (created_by_email) DO UPDATE SET
+            total_reels    = s.total_reels    + excluded.total_reels,
+            total_views    = s.total_views    + excluded.total_views,
+            total_likes    = s.total_likes    + excluded.total_likes,
+            total_comments = s.total_comments + excluded.total_comments,
+            updated_at     = now();
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.reels_stats_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.apply_reel_to_stats(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.apply_reel_to_stats(NEW, 1);
+    END IF;
+
+    -- Day-level growth only counts count changes on an existing reel
+    IF TG_OP = 'UPDATE' THEN
+        INSERT INTO public.daily_views_growth AS g (day, created_by_email, views_growth, likes_growth, comments_growth)
+        VALUES (
+            (now() AT TIME ZONE 'UTC')::date,
+            coalesce(NEW.created_by_email, ''),
+            coalesce(NEW.videoplaycount, 0) - coalesce(OLD.videoplaycount, 0),
+            coalesce(NEW.likescount, 0)     - coalesce(OLD.likescount, 0),
+            coalesce(NEW.commentscount, 0)  - coalesce(OLD.commentscount, 0)
+        )
+        ON CONFLICT (day, created_by_email) DO UPDATE SET
+            views_growth    = g.views_growth    + excluded.views_growth,
+            likes_growth    = g.likes_growth    + excluded.likes_growth,
+            comments_growth = g.comments_growth + excluded.comments_growth;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS reels_stats_insert ON public.reels;
+DROP TRIGGER IF EXISTS reels_stats_update ON public.reels;
+DROP TRIGGER IF EXISTS reels_stats_delete ON public.reels;
+
+CREATE TRIGGER reels_stats_insert AFTER INSERT ON public.reels
+    FOR EACH ROW EXECUTE FUNCTION public.reels_stats_trigger();
+
+-- Only fire when something the aggregates depend on actually changed, so
+-- lastupdatedat-only touches stay cheap.
+CREATE TRIGGER reels_stats_update AFTER UPDATE ON public.reels
+    FOR EACH ROW
+    WHEN (OLD.videoplaycount   IS DISTINCT FROM NEW.videoplaycount
+       OR OLD.likescount       IS DISTINCT FROM NEW.likescount
+       OR OLD.commentscount    IS DISTINCT FROM NEW.commentscount
+       OR OLD.ownerusername    IS DISTINCT FROM NEW.ownerusername
+       OR OLD.created_by_email IS DISTINCT FROM NEW.created_by_email)
+    EXECUTE FUNCTION public.reels_stats_trigger();
+
+CREATE TRIGGER reels_stats_delete AFTER DELETE ON public.reels
+    FOR EACH ROW EXECUTE FUNCTION public.reels_stats_trigger();
+
+-- Full rebuild of the running totals from reels (initial backfill, or to
+-- repair drift after bulk loads that bypassed triggers). Daily growth is
+-- history and is left untouched.
+CREATE OR REPLACE FUNCTION public.rebuild_dashboard_aggregates()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    DELETE FROM public.creator_stats;
+    INSERT INTO public.creator_stats (ownerusername, total_reels, total_views, total_likes, total_comments)
+    SELECT ownerusername, count(*), sum(coalesce(videoplaycount, 0)),
+           sum(coalesce(likescount, 0)), sum(coalesce(commentscount, 0))
+    FROM public.reels
+    WHERE ownerusername IS NOT NULL
+    GROUP BY ownerusername;
+
+    DELETE FROM public.handler_stats;
+    INSERT INTO public.handler_stats (created_by_email, total_reels, total_views, total_likes, total_comments)
+    SELECT created_by_email, count(*), sum(coalesce(videoplaycount, 0)),
+           sum(coalesce(likescount, 0)), sum(coalesce(commentscount, 0))
+    FROM public.reels
+    WHERE created_by_email IS NOT NULL
+    GROUP BY created_by_email;
+END;
+$$;
+
+SELECT public.rebuild_dashboard_aggregates();
@@ -0,0 +1,25 @@
+-- Durable job store for the server's /api/async/scrape queue
+-- Jobs used to live in an in-process Map and disappeared after 10 minutes or
+-- on any restart, leaving pollers spinning on job ids that no longer existed.
+-- The server now writes every job here and re-queues unfinished ones on boot.
+
+CREATE TABLE IF NOT EXISTS public.scrape_jobs (
+    id text PRIMARY KEY,
+    url text NOT NULL,
+    -- pending | processing | queued_for_retry | completed | failed
+    status text NOT NULL DEFAULT 'pending',
+    -- Job id on the upstream scraper, so a resumed job polls instead of resubmitting
+    upstream_job_id text,
+    result jsonb,
+    error text,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Restart scan (status IN active) and retention purge (status + age)
+CREATE INDEX IF NOT EXISTS idx_scrape_jobs_status ON public.scrape_jobs(status, created_at);
+
+-- Only the server's service-role client touches this table
+ALTER TABLE public.scrape_jobs ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE public.scrape_jobs IS 'Async scrape jobs submitted via /api/async/scrape; finished jobs are purged after a day';
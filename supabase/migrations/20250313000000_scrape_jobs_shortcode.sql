@@ -0,0 +1,9 @@
+-- Single-flight key for async scrape jobs
+-- The server attaches a new /api/async/scrape request to the job already
+-- scraping the same reel. The shortcode is persisted so jobs resumed after a
+-- restart are deduplicated too.
+
+ALTER TABLE public.scrape_jobs
+ADD COLUMN IF NOT EXISTS shortcode text;
+
+COMMENT ON COLUMN public.scrape_jobs.shortcode IS 'Reel shortcode parsed from url; concurrent requests for the same reel share one job';
@@ -0,0 +1,30 @@
+-- Canonical shortcode key for reels
+-- Every reel lookup (import-reels, bulk-update-views, touch-reels) is a single
+-- equality on reels.shortcode, so the column must be filled and unique.
+-- add_video_duration_and_cleanup.sql added the constraint by hand; this makes
+-- it part of the migration history and backfills rows it could not parse.
+
+-- Same pattern as scripts/shortcodes.py / server/shortcode.js: /reel/, /reels/,
+-- /p/ and /<user>/reel/ links
+UPDATE public.reels
+SET shortcode = COALESCE(
+  SUBSTRING(permalink FROM 'instagram\.com/(?:[^/]+/)?(?:reels?|p)/([A-Za-z0-9_-]+)'),
+  SUBSTRING(url       FROM 'instagram\.com/(?:[^/]+/)?(?:reels?|p)/([A-Za-z0-9_-]+)'),
+  SUBSTRING(inputurl  FROM 'instagram\.com/(?:[^/]+/)?(?:reels?|p)/([A-Za-z0-9_-]+)')
+)
+WHERE (shortcode IS NULL OR shortcode = '')
+  AND (permalink IS NOT NULL OR url IS NOT NULL OR inputurl IS NOT NULL);
+
+-- Fails if duplicate shortcodes exist; run the dedupe step in
+-- add_video_duration_and_cleanup.sql first in that case.
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_constraint
+    WHERE conname = 'reels_shortcode_unique' AND conrelid = 'public.reels'::regclass
+  ) THEN
+    ALTER TABLE public.reels ADD CONSTRAINT reels_shortcode_unique UNIQUE (shortcode);
+  END IF;
+END $$;
+
+COMMENT ON COLUMN public.reels.shortcode IS 'Canonical reel key; URLs are rebuilt from it as https://www.instagram.com/reel/<shortcode>/';
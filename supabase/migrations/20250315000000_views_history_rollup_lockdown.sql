@@ -0,0 +1,61 @@
+-- rollup_views_history deletes raw history, so it must not be callable from
+-- the browser: it runs from the nightly pg_cron job, or with the service role
+-- (POST /api/rollup-views-history on the API server). Arguments are clamped
+-- so even a privileged caller can't fold away the recent window.
+
+CREATE OR REPLACE FUNCTION public.rollup_views_history(
+    daily_after_days int DEFAULT 90,
+    weekly_after_days int DEFAULT 365
+)
+RETURNS int
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    -- Raw snapshots are kept at least 30 days, daily buckets at least 180
+    daily_days int := greatest(coalesce(daily_after_days, 90), 30);
+    weekly_days int := greatest(coalesce(weekly_after_days, 365), 180, daily_days);
+    daily_cutoff timestamptz := now() - make_interval(days => daily_days);
+    weekly_cutoff date := (now() - make_interval(days => weekly_days))::date;
+    raw_removed int;
+    daily_removed int;
+BEGIN
+    -- 1) raw -> daily
+    INSERT INTO public.views_history_rollup AS r
+        (reel_id, resolution, bucket, videoplaycount, likescount, commentscount)
+    SELECT reel_id, 'd', (recorded_at AT TIME ZONE 'UTC')::date,
+           max(coalesce(videoplaycount, 0)), max(coalesce(likescount, 0)), max(coalesce(commentscount, 0))
+    FROM public.views_history
+    WHERE recorded_at < daily_cutoff
+    GROUP BY reel_id, (recorded_at AT TIME ZONE 'UTC')::date
+    ON CONFLICT (reel_id, resolution, bucket) DO UPDATE SET
+        videoplaycount = greatest(r.videoplaycount, excluded.videoplaycount),
+        likescount     = greatest(r.likescount,     excluded.likescount),
+        commentscount  = greatest(r.commentscount,  excluded.commentscount);
+
+    DELETE FROM public.views_history WHERE recorded_at < daily_cutoff;
+    GET DIAGNOSTICS raw_removed = ROW_COUNT;
+
+    -- 2) daily -> weekly
+    INSERT INTO public.views_history_rollup AS r
+        (reel_id, resolution, bucket, videoplaycount, likescount, commentscount)
+    SELECT reel_id, 'w', date_trunc('week', bucket)::date,
+           max(videoplaycount), max(likescount), max(commentscount)
+    FROM public.views_history_rollup
+    WHERE resolution = 'd' AND bucket < weekly_cutoff
+    GROUP BY reel_id, date_trunc('week', bucket)::date
+    ON CONFLICT (reel_id, resolution, bucket) DO UPDATE SET
+        videoplaycount = greatest(r.videoplaycount, excluded.videoplaycount),
+        likescount     = greatest(r.likescount,     excluded.likescount),
+        commentscount  = greatest(r.commentscount,  excluded.commentscount);
+
+    DELETE FROM public.views_history_rollup WHERE resolution = 'd' AND bucket < weekly_cutoff;
+    GET DIAGNOSTICS daily_removed = ROW_COUNT;
+
+    RETURN raw_removed + daily_removed;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.rollup_views_history(int, int) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rollup_views_history(int, int) TO service_role;
@@ -0,0 +1,191 @@
+-- Follow-up to 20250311000000_dashboard_aggregates.sql
+--
+-- * handler_stats and daily_views_growth are split into 16 shards per handler
+--   (per handler and day) picked from the reel id, so concurrent refresher
+--   writes for one handler no longer queue on a single aggregate row.
+--   Readers sum the shards.
+-- * Reels with no ownerusername / created_by_email are kept under '' instead
+--   of being dropped, and payout is tracked, so the dashboard totals can be
+--   read from these tables.
+-- * daily_views_growth is backfilled from views_history (and its rollup) for
+--   the days before the trigger started recording.
+-- * The maintenance functions are service-role only.
+
+-- 16 shards: the low 4 bits of the reel id's hash
+CREATE OR REPLACE FUNCTION public.stats_shard(reel_id text)
+RETURNS smallint
+LANGUAGE sql
+IMMUTABLE
+AS $$ SELECT (hashtext(reel_id) & 15)::smallint $$;
+
+ALTER TABLE public.creator_stats ADD COLUMN IF NOT EXISTS total_payout numeric NOT NULL DEFAULT 0;
+ALTER TABLE public.handler_stats ADD COLUMN IF NOT EXISTS total_payout numeric NOT NULL DEFAULT 0;
+
+ALTER TABLE public.handler_stats ADD COLUMN IF NOT EXISTS shard smallint NOT NULL DEFAULT 0;
+ALTER TABLE public.handler_stats DROP CONSTRAINT IF EXISTS handler_stats_pkey;
+ALTER TABLE public.handler_stats ADD PRIMARY KEY (created_by_email, shard);
+
+ALTER TABLE public.daily_views_growth ADD COLUMN IF NOT EXISTS shard smallint NOT NULL DEFAULT 0;
+ALTER TABLE public.daily_views_growth DROP CONSTRAINT IF EXISTS daily_views_growth_pkey;
+ALTER TABLE public.daily_views_growth ADD PRIMARY KEY (day, created_by_email, shard);
+
+COMMENT ON COLUMN public.handler_stats.shard IS 'stats_shard(reel id); sum all shards of a handler for its totals';
+COMMENT ON COLUMN public.daily_views_growth.shard IS 'stats_shard(reel id); sum all shards of a day for its growth';
+
+-- Add (sign = 1) or remove (sign = -1) one reel's contribution to the totals
+CREATE OR REPLACE FUNCTION public.apply_reel_to_stats(r public.reels, sign int)
+RETURNS void
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+BEGIN
+    INSERT INTO public.creator_stats AS s (ownerusername, total_reels, total_views, total_likes, total_comments, total_payout)
+    VALUES (coalesce(r.ownerusername, ''), sign, sign * coalesce(r.videoplaycount, 0),
+            sign * coalesce(r.likescount, 0), sign * coalesce(r.commentscount, 0), sign * coalesce(r.payout, 0))
+    ON CONFLICT (ownerusername) DO UPDATE SET
+        total_reels    = s.total_reels    + excluded.total_reels,
+        total_views    = s.total_views    + excluded.total_views,
+        total_likes    = s.total_likes    + excluded.total_likes,
+        total_comments = s.total_comments + excluded.total_comments,
+        total_payout   = s.total_payout   + excluded.total_payout,
+        updated_at     = now();
+
+    INSERT INTO public.handler_stats AS s (created_by_email, shard, total_reels, total_views, total_likes, total_comments, total_payout)
+    VALUES (coalesce(r.created_by_email, ''), public.stats_shard(r.id), sign, sign * coalesce(r.videoplaycount, 0),
+            sign * coalesce(r.likescount, 0), sign * coalesce(r.commentscount, 0), sign * coalesce(r.payout, 0))
+    ON CONFLICT (created_by_email, shard) DO UPDATE SET
+        total_reels    = s.total_reels    + excluded.total_reels,
+        total_views    = s.total_views    + excluded.total_views,
+        total_likes    = s.total_likes    + excluded.total_likes,
+        total_comments = s.total_comments + excluded.total_comments,
+        total_payout   = s.total_payout   + excluded.total_payout,
+        updated_at     = now();
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.reels_stats_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.apply_reel_to_stats(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.apply_reel_to_stats(NEW, 1);
+    END IF;
+
+    -- Day-level growth only counts count changes on an existing reel
+    IF TG_OP = 'UPDATE' THEN
+        INSERT INTO public.daily_views_growth AS g (day, created_by_email, shard, views_growth, likes_growth, comments_growth)
+        VALUES (
+            (now() AT TIME ZONE 'UTC')::date,
+            coalesce(NEW.created_by_email, ''),
+            public.stats_shard(NEW.id),
+            coalesce(NEW.videoplaycount, 0) - coalesce(OLD.videoplaycount, 0),
+            coalesce(NEW.likescount, 0)     - coalesce(OLD.likescount, 0),
+            coalesce(NEW.commentscount, 0)  - coalesce(OLD.commentscount, 0)
+        )
+        ON CONFLICT (day, created_by_email, shard) DO UPDATE SET
+            views_growth    = g.views_growth    + excluded.views_growth,
+            likes_growth    = g.likes_growth    + excluded.likes_growth,
+            comments_growth = g.comments_growth + excluded.comments_growth;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS reels_stats_update ON public.reels;
+CREATE TRIGGER reels_stats_update AFTER UPDATE ON public.reels
+    FOR EACH ROW
+    WHEN (OLD.videoplaycount   IS DISTINCT FROM NEW.videoplaycount
+       OR OLD.likescount       IS DISTINCT FROM NEW.likescount
+       OR OLD.commentscount    IS DISTINCT FROM NEW.commentscount
+       OR OLD.payout           IS DISTINCT FROM NEW.payout
+       OR OLD.ownerusername    IS DISTINCT FROM NEW.ownerusername
+       OR OLD.created_by_email IS DISTINCT FROM NEW.created_by_email)
+    EXECUTE FUNCTION public.reels_stats_trigger();
+
+CREATE OR REPLACE FUNCTION public.rebuild_dashboard_aggregates()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    DELETE FROM public.creator_stats;
+    INSERT INTO public.creator_stats (ownerusername, total_reels, total_views, total_likes, total_comments, total_payout)
+    SELECT coalesce(ownerusername, ''), count(*), sum(coalesce(videoplaycount, 0)),
+           sum(coalesce(likescount, 0)), sum(coalesce(commentscount, 0)), sum(coalesce(payout, 0))
+    FROM public.reels
+    GROUP BY coalesce(ownerusername, '');
+
+    DELETE FROM public.handler_stats;
+    INSERT INTO public.handler_stats (created_by_email, shard, total_reels, total_views, total_likes, total_comments, total_payout)
+    SELECT coalesce(created_by_email, ''), public.stats_shard(id), count(*), sum(coalesce(videoplaycount, 0)),
+           sum(coalesce(likescount, 0)), sum(coalesce(commentscount, 0)), sum(coalesce(payout, 0))
+    FROM public.reels
+    GROUP BY coalesce(created_by_email, ''), public.stats_shard(id);
+END;
+$$;
+
+SELECT public.rebuild_dashboard_aggregates();
+
+-- Backfill daily growth from snapshot history: a reel's growth on a day is
+-- its highest count that day minus its highest count on its previous
+-- snapshot day. Only days before the trigger's first recorded day are
+-- filled, so nothing is counted twice.
+WITH points AS (
+    SELECT reel_id, (recorded_at AT TIME ZONE 'UTC')::date AS day,
+           coalesce(videoplaycount, 0) AS v, coalesce(likescount, 0) AS l, coalesce(commentscount, 0) AS c
+    FROM public.views_history
+    UNION ALL
+    SELECT reel_id, bucket, videoplaycount, likescount, commentscount
+    FROM public.views_history_rollup
+), per_day AS (
+    SELECT reel_id, day, max(v) AS v, max(l) AS l, max(c) AS c
+    FROM points
+    GROUP BY reel_id, day
+), deltas AS (
+    SELECT reel_id, day,
+           v - lag(v) OVER w AS dv, l - lag(l) OVER w AS dl, c - lag(c) OVER w AS dc
+    FROM per_day
+    WINDOW w AS (PARTITION BY reel_id ORDER BY day)
+)
+INSERT INTO public.daily_views_growth (day, created_by_email, shard, views_growth, likes_growth, comments_growth)
+SELECT d.day, coalesce(r.created_by_email, ''), public.stats_shard(r.id), sum(d.dv), sum(d.dl), sum(d.dc)
+FROM deltas d
+JOIN public.reels r ON r.id = d.reel_id
+WHERE d.dv IS NOT NULL
+  AND d.day < (SELECT coalesce(min(day), (now() AT TIME ZONE 'UTC')::date + 1) FROM public.daily_views_growth)
+GROUP BY d.day, coalesce(r.created_by_email, ''), public.stats_shard(r.id)
+ON CONFLICT (day, created_by_email, shard) DO NOTHING;
+
+-- Distinct reels with a snapshot in a range (reelsCount in getTotalViewsGrowth)
+CREATE OR REPLACE FUNCTION public.count_reels_with_snapshots(
+    start_at timestamptz,
+    end_at timestamptz,
+    handler_email text DEFAULT NULL
+)
+RETURNS int
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT count(DISTINCT s.reel_id)::int
+    FROM (
+        SELECT reel_id FROM public.views_history WHERE recorded_at BETWEEN start_at AND end_at
+        UNION ALL
+        SELECT reel_id FROM public.views_history_rollup
+        WHERE bucket BETWEEN (start_at AT TIME ZONE 'UTC')::date AND (end_at AT TIME ZONE 'UTC')::date
+    ) s
+    JOIN public.reels r ON r.id = s.reel_id
+    WHERE handler_email IS NULL OR r.created_by_email = handler_email
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.rebuild_dashboard_aggregates() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.apply_reel_to_stats(public.reels, int) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rebuild_dashboard_aggregates() TO service_role;